@@ -0,0 +1,105 @@
+"""
+Compares the old pandas response path of AnalyticsViewSet with the plain
+row/columnar path: latency and peak memory per response, plus the one-off
+cost of importing pandas.
+
+    python benchmarks/analytics_response.py [rows ...]
+"""
+import datetime
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'real_estate_project.settings')
+
+import django
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer
+
+from realty.analytics import revenue_statistics, to_columns
+
+REPEAT = 5
+
+
+def make_rows(count):
+    start = datetime.date(2000, 1, 1)
+    return [
+        {
+            'month': start + datetime.timedelta(days=31 * i),
+            'name': f"Settlement {i % 500}",
+            'total_revenue': Decimal(1000 + i % 977) / 7,
+            'total_deals': i % 40,
+        }
+        for i in range(count)
+    ]
+
+
+def pandas_records(rows):
+    import pandas as pd
+    df = pd.DataFrame(list(rows))
+    df.fillna(0)
+    return df.to_dict(orient='records')
+
+
+def pandas_statistics(rows):
+    import pandas as pd
+    df = pd.DataFrame(list(rows))
+    return {
+        "mean": round(df['total_revenue'].mean(), 2),
+        "median": round(df['total_revenue'].median(), 2),
+        "max": round(df['total_revenue'].max(), 2),
+        "min": round(df['total_revenue'].min(), 2)
+    }
+
+
+PATHS = {
+    'pandas records': lambda rows: JSONRenderer().render(pandas_records(rows)),
+    'plain records': lambda rows: JSONRenderer().render(list(rows)),
+    'plain columns': lambda rows: JSONRenderer().render(to_columns(rows)),
+    'pandas statistics': pandas_statistics,
+    'single-pass statistics': revenue_statistics,
+}
+
+
+def measure(fn, rows):
+    fn(rows)  # warm-up, also pays any lazy import outside the timing
+
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(timings), peak
+
+
+def pandas_import_seconds():
+    code = "import time; t = time.perf_counter(); import pandas; print(time.perf_counter() - t)"
+    return float(subprocess.check_output([sys.executable, '-c', code]).decode())
+
+
+def main(sizes):
+    print(f"pandas cold import: {pandas_import_seconds() * 1000:.1f} ms\n")
+    print(f"{'rows':>8}  {'path':<24} {'best ms':>10} {'peak KiB':>10}")
+    for size in sizes:
+        rows = make_rows(size)
+        for name, fn in PATHS.items():
+            seconds, peak = measure(fn, rows)
+            print(f"{size:>8}  {name:<24} {seconds * 1000:>10.2f} {peak / 1024:>10.1f}")
+        print()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [12, 1000, 100000])
@@ -0,0 +1,58 @@
+"""
+Throughput of the same reads served three ways: WSGI (sync views on a thread
+per request), ASGI with the sync DRF views, and ASGI with the async views in
+realty/async_views.py. The analytics query cache is off so every request
+reaches the database.
+
+    BENCHMARK_SQLITE=/tmp/bench.sqlite3 python manage.py benchmark --seed --requests 1
+    BENCHMARK_SQLITE=/tmp/bench.sqlite3 python benchmarks/asgi_throughput.py [requests] [concurrency ...]
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'real_estate_project.settings')
+
+import django
+
+django.setup()
+
+from django.test.utils import override_settings
+
+from real_estate_project.benchmark.runners import RUNNERS, client_settings
+from real_estate_project.benchmark.stats import summarise_latencies
+
+OVERRIDES = {'QUERY_CACHE_ENABLED': False}
+
+# Case -> runner; WORKLOADS picks each case's scenario.
+CASES = {
+    'WSGI': 'threaded',
+    'ASGI sync views': 'asyncio',
+    'ASGI async views': 'asyncio',
+}
+WORKLOADS = {
+    'analytics': {'WSGI': 'analytics', 'ASGI sync views': 'analytics', 'ASGI async views': 'async_analytics'},
+    'list': {'WSGI': 'crud_list', 'ASGI sync views': 'crud_list', 'ASGI async views': 'async_list'},
+}
+
+
+def main(requests, concurrency):
+    print(f"{'workload':<10} {'case':<18} {'conc':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    with override_settings(**client_settings(OVERRIDES)):
+        for workload, scenarios in WORKLOADS.items():
+            for level in concurrency:
+                for case, runner_name in CASES.items():
+                    runner = RUNNERS[runner_name](client_settings(OVERRIDES))
+                    latencies, errors, duration = runner.run(scenarios[case], requests, level)
+                    latency = summarise_latencies(latencies)['latency_ms']
+                    print(
+                        f"{workload:<10} {case:<18} {level:>5} {len(latencies) / duration:>9.1f} "
+                        f"{latency['p50']:>9.2f} {latency['p95']:>9.2f} {errors:>7}"
+                    )
+            print()
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 200, args[1:] or [1, 8, 32])
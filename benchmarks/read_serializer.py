@@ -0,0 +1,108 @@
+"""
+Rows/sec of the two list serialisation paths on synthetic rows, from database
+tuples to rendered JSON: model instances through the ModelSerializer, and
+.values_list() tuples through serialisers.ValuesSerializer. Also checks that
+both render the same bytes.
+
+    python benchmarks/read_serializer.py [rows]
+"""
+import datetime
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'real_estate_project.settings')
+
+import django
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer
+
+from realty import serialisers as s
+from realty.models import Person
+
+SERIALIZERS = (s.ContractSerializer, s.EstateSerializer, s.ApartmentSerializer, s.HouseSerializer)
+
+
+def synthetic_value(field, rng, i):
+    if field.primary_key:
+        return i
+    if field.null and rng.random() < 0.2:
+        return None
+    internal = field.get_internal_type()
+    if internal == 'DecimalField':
+        return Decimal(rng.randint(0, 10 ** min(7, field.max_digits) - 1)).scaleb(-field.decimal_places)
+    if internal == 'DateField':
+        return datetime.date(2020, 1, 1) + datetime.timedelta(days=rng.randint(0, 1500))
+    if internal in ('CharField', 'TextField'):
+        return f"value {rng.randint(0, 10 ** 6)}"
+    return rng.randint(0, 10 ** 5)
+
+
+def build(reader, model, count):
+    rng = random.Random(1)
+    fields = [model._meta.get_field(name) for name in _column_fields(reader, model)]
+    rows = [tuple(synthetic_value(field, rng, i) for field in fields) for i in range(1, count + 1)]
+    related = {
+        name: {row[reader.pk_index]: sorted(rng.sample(range(1, 1000), 2)) for row in rows}
+        for name, _ in reader.relations
+    }
+    return rows, related
+
+
+def _column_fields(reader, model):
+    by_attname = {field.attname: field.name for field in model._meta.concrete_fields}
+    return [by_attname[column] for column in reader.columns]
+
+
+def instances(model, reader, rows, related):
+    # What the ORM hands the ModelSerializer: from_db() instances with the
+    # many-to-many ids prefetched.
+    # from_db() takes the columns in concrete field order.
+    attnames = [field.attname for field in model._meta.concrete_fields if field.attname in reader.columns]
+    order = [reader.columns.index(attname) for attname in attnames]
+    objs = []
+    for row in rows:
+        obj = model.from_db('default', attnames, [row[i] for i in order])
+        if related:
+            obj._prefetched_objects_cache = {}
+            for name, source in reader.relations:
+                people = Person.objects.none()
+                people._result_cache = [Person(pk=pk) for pk in related[name][row[reader.pk_index]]]
+                people._prefetch_done = True
+                obj._prefetched_objects_cache[source] = people
+        objs.append(obj)
+    return objs
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main(count):
+    renderer = JSONRenderer()
+    print(f"{'serializer':<22} {'ModelSerializer rows/s':>24} {'ValuesSerializer rows/s':>25} {'speedup':>8} same")
+    for serializer_class in SERIALIZERS:
+        model = serializer_class.Meta.model
+        reader = s.values_serializer(serializer_class)
+        rows, related = build(reader, model, count)
+
+        slow, slow_seconds = timed(
+            lambda: renderer.render(serializer_class(instances(model, reader, rows, related), many=True).data)
+        )
+        fast, fast_seconds = timed(lambda: renderer.render(reader.to_representation(rows, related)))
+        print(
+            f"{serializer_class.__name__:<22} {count / slow_seconds:>24,.0f} {count / fast_seconds:>25,.0f} "
+            f"{slow_seconds / fast_seconds:>7.1f}x {slow == fast}"
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
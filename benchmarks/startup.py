@@ -0,0 +1,60 @@
+"""
+Measures what a fresh worker pays to load the URLconf (and so every view
+module), with and without the lazily imported Bokeh dashboard. Each case runs
+in its own interpreter; the figures are the median of several runs.
+
+    python benchmarks/startup.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, os, resource, sys, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'real_estate_project.settings')
+
+def rss_kib():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+started = time.perf_counter()
+import django
+django.setup()
+import importlib
+for module in {modules!r}:
+    importlib.import_module(module)
+print(json.dumps({{'seconds': time.perf_counter() - started, 'rss_kib': rss_kib()}}))
+"""
+
+CASES = {
+    'CRUD worker (URLconf only)': ['real_estate_project.urls'],
+    'dashboard loaded': ['real_estate_project.urls', 'realty.dashboard'],
+}
+
+
+def probe(modules):
+    code = PROBE.format(root=str(ROOT), modules=modules)
+    output = subprocess.check_output([sys.executable, '-c', code], env=os.environ.copy())
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main(runs):
+    print(f"{'case':<30} {'import ms':>10} {'RSS MiB':>10}")
+    for name, modules in CASES.items():
+        samples = [probe(modules) for _ in range(runs)]
+        seconds = statistics.median(sample['seconds'] for sample in samples)
+        rss = statistics.median(sample['rss_kib'] for sample in samples)
+        print(f"{name:<30} {seconds * 1000:>10.1f} {rss / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
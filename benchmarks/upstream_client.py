@@ -0,0 +1,108 @@
+"""
+NetworkHelper against a local stub of the companies API: a fresh connection
+per call (the old behaviour), the keep-alive session, and the asyncio batch
+methods. The stub adds fixed latency and answers every item's first request
+with 503 when --flaky is given, so the batch retries are exercised too.
+
+    python benchmarks/upstream_client.py [items] [latency_ms] [--flaky]
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from real_estate_project.NetworkHelper import NetworkHelper
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm delays every keep-alive response.
+    disable_nagle_algorithm = True
+    latency = 0.0
+    flaky = False
+    seen = set()
+    seen_lock = threading.Lock()
+
+    def _reply(self, status, body=None):
+        time.sleep(self.latency)
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _item_id(self):
+        parts = [part for part in self.path.split('/') if part]
+        return parts[1] if len(parts) > 1 else None
+
+    def _flake(self):
+        key = (self.command, self.path)
+        with self.seen_lock:
+            first = key not in self.seen
+            self.seen.add(key)
+        return self.flaky and first
+
+    def do_GET(self):
+        item_id = self._item_id()
+        if item_id is None:
+            self._reply(200, [{'company_id': i, 'name_company': f"Company {i}"} for i in range(10)])
+        elif self._flake():
+            self._reply(503)
+        else:
+            self._reply(200, {'company_id': int(item_id), 'name_company': f"Company {item_id}"})
+
+    def do_DELETE(self):
+        self._reply(503 if self._flake() else 204)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {(time.perf_counter() - started) * 1000:>9.1f} ms")
+    return result
+
+
+def main(items, latency_ms, flaky):
+    StubHandler.latency = latency_ms / 1000
+    StubHandler.flaky = flaky
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_port}/companies"
+    ids = list(range(items))
+
+    helper = NetworkHelper(api_url, token='stub')
+    headers = helper.headers
+    timed("fresh connection per call", lambda: [
+        requests.get(f"{api_url}/{item_id}/", headers=headers, timeout=helper.timeout) for item_id in ids
+    ])
+    StubHandler.seen.clear()
+    timed("keep-alive session", lambda: [helper.get_item_api(item_id) for item_id in ids])
+    StubHandler.seen.clear()
+    fetched = timed("async batch fetch", lambda: asyncio.run(helper.aget_items_api(ids)))
+    deleted = timed("async batch delete", lambda: asyncio.run(helper.adelete_items_api(ids)))
+
+    failed_fetches = [item_id for item_id, item in fetched.items() if not isinstance(item, dict)]
+    failed_deletes = [item_id for item_id, response in deleted.items()
+                      if isinstance(response, Exception) or response.status_code != 204]
+    print(f"failed fetches: {len(failed_fetches)}, failed deletes: {len(failed_deletes)}")
+
+    helper.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    flags = {arg for arg in sys.argv[1:] if arg.startswith('--')}
+    args = [int(arg) for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(args[0] if args else 100, args[1] if len(args) > 1 else 20, '--flaky' in flags)
@@ -1,27 +1,115 @@
+import asyncio
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Upstream statuses worth retrying: throttling and transient server errors.
+RETRY_STATUSES = (429, 502, 503, 504)
+
 
 class NetworkHelper:
-    def __init__(self, api_url, token=None):
+    # (connect, read) seconds; requests has no default and would wait forever.
+    timeout = (3.05, 10)
+    # Keep-alive connections kept per upstream host; also the most requests
+    # a batch runs at once.
+    pool_size = 10
+    retries = 3
+    backoff = 0.2
+
+    def __init__(self, api_url, token=None, timeout=None, pool_size=None):
         self.api_url = api_url
         self.token = token
         self.headers = {
             "Authorization": f"Token {self.token}",
             "Content-Type": "application/json",
         }
+        if timeout is not None:
+            self.timeout = timeout
+        if pool_size is not None:
+            self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        # One keep-alive session per helper, shared by all threads.
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                # Retries cover idempotent methods only (never POST), with
+                # exponential backoff plus jitter; Retry-After is honoured.
+                retry = Retry(
+                    total=self.retries, backoff_factor=self.backoff, backoff_jitter=self.backoff,
+                    status_forcelist=RETRY_STATUSES, raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _request(self, method, url, **kwargs) -> requests.Response:
+        return self.session.request(method, url, timeout=self.timeout, **kwargs)
 
     def get_list_api(self):
-        items = requests.get(f"{self.api_url}/", headers=self.headers)
-        return items.json()
+        return self._request('GET', f"{self.api_url}/").json()
 
     def get_item_api(self, item_id):
-        return requests.get(f"{self.api_url}/{item_id}/", headers=self.headers).json()
+        return self._request('GET', f"{self.api_url}/{item_id}/").json()
 
     def create_item_api(self, data):
-        return requests.post(f"{self.api_url}/", json=data, headers=self.headers).json()
+        return self._request('POST', f"{self.api_url}/", json=data).json()
 
     def update_item_api(self, item_id, data):
-        return requests.put(f"{self.api_url}/{item_id}/", json=data, headers=self.headers).json()
+        return self._request('PUT', f"{self.api_url}/{item_id}/", json=data).json()
 
     def delete_item_api(self, item_id):
-        return requests.delete(f"{self.api_url}/{item_id}/", headers=self.headers)
+        return self._request('DELETE', f"{self.api_url}/{item_id}/")
+
+    # asyncio side: the pooled session runs in worker threads, at most
+    # `pool_size` at a time, so batches overlap upstream latency without
+    # opening more connections than the pool keeps alive.
+
+    async def _arequest(self, method, url, semaphore=None, **kwargs) -> requests.Response:
+        if semaphore is None:
+            return await asyncio.to_thread(self._request, method, url, **kwargs)
+        async with semaphore:
+            return await asyncio.to_thread(self._request, method, url, **kwargs)
+
+    async def aget_list_api(self):
+        return (await self._arequest('GET', f"{self.api_url}/")).json()
+
+    async def aget_item_api(self, item_id):
+        return (await self._arequest('GET', f"{self.api_url}/{item_id}/")).json()
+
+    async def adelete_item_api(self, item_id):
+        return await self._arequest('DELETE', f"{self.api_url}/{item_id}/")
+
+    async def _batch(self, method, item_ids) -> dict:
+        semaphore = asyncio.Semaphore(self.pool_size)
+        responses = await asyncio.gather(
+            *(self._arequest(method, f"{self.api_url}/{item_id}/", semaphore) for item_id in item_ids),
+            return_exceptions=True,
+        )
+        return dict(zip(item_ids, responses))
+
+    async def aget_items_api(self, item_ids) -> dict:
+        """{item_id: parsed JSON, or the exception / failed Response}."""
+        results = await self._batch('GET', item_ids)
+        return {
+            item_id: response.json() if isinstance(response, requests.Response) and response.ok else response
+            for item_id, response in results.items()
+        }
 
+    async def adelete_items_api(self, item_ids) -> dict:
+        """{item_id: final Response, or the exception that ended its retries}."""
+        return await self._batch('DELETE', item_ids)
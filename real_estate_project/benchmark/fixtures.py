@@ -0,0 +1,106 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection, transaction
+
+from realty import models as m
+from realty.query_cache import invalidate_tables
+from realty.summaries import ALL_SUMMARIES
+
+SETTLEMENT_TYPES = ('місто', 'село', 'селище')
+TRANSACTION_TYPES = ('sale', 'rent')
+STATUSES = ('active', 'sold', 'reserved')
+
+
+def ensure_schema():
+    """
+    Creates the Django tables and, for the unmanaged realty models, whatever
+    tables the database lacks. Meant for SQLite fixture databases; on MySQL
+    the schema comes from the dump and sql/.
+    """
+    call_command('migrate', verbosity=0)
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config('realty').get_models():
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+
+
+def seed(scale=1, seed_value=1) -> dict:
+    """Fills empty realty tables with deterministic data; returns row counts."""
+    if m.Estate.objects.exists():
+        return {}
+
+    rng = random.Random(seed_value)
+    counts = {
+        'settlements': 50 * scale,
+        'people': 300 * scale,
+        'estates': 2000 * scale,
+        'contracts': 5000 * scale,
+    }
+
+    settlements = [
+        m.Settlement(
+            settlement_id=i, name=f"Settlement {i % (counts['settlements'] // 2 or 1)}",
+            amalgamated_hromada=f"Hromada {i % 20}", oblast=f"Oblast {i % 24}",
+            settlement_type=rng.choice(SETTLEMENT_TYPES),
+        )
+        for i in range(1, counts['settlements'] + 1)
+    ]
+    people = [
+        m.Person(person_id=i, surname=f"Surname {i}", name=f"Name {i % 97}")
+        for i in range(1, counts['people'] + 1)
+    ]
+    estates, apartments, houses, offices, owners, employees = [], [], [], [], [], []
+    for i in range(1, counts['estates'] + 1):
+        estates.append(m.Estate(
+            estate_id=i, settlement_id=rng.randint(1, counts['settlements']),
+            street=f"Street {i % 173}", house_number=str(i % 300 + 1),
+            year_built=rng.randint(1950, 2024), transaction_type=rng.choice(TRANSACTION_TYPES),
+            price=Decimal(rng.randint(10_000, 1_000_000)), status=rng.choice(STATUSES),
+        ))
+        kind = i % 3
+        if kind == 0:
+            apartments.append(m.Apartment(
+                estate_id=i, residential_complex_name=f"Complex {i % 40}", area=Decimal(rng.randint(25, 150)),
+                rooms=rng.randint(1, 5), floor=rng.randint(1, 20), total_floors=20,
+                elevator=rng.randint(0, 1), balcony=rng.randint(0, 1),
+            ))
+        elif kind == 1:
+            houses.append(m.House(
+                estate_id=i, land_area=Decimal(rng.randint(2, 40)), floors=rng.randint(1, 3),
+                rooms=rng.randint(2, 8), garage=rng.randint(0, 1), parking=rng.randint(0, 1),
+                basement=rng.randint(0, 1), garden=rng.randint(0, 1), heating_type='gas',
+            ))
+        else:
+            offices.append(m.Office(
+                estate_id=i, area=Decimal(rng.randint(40, 600)), floor=rng.randint(1, 10), total_floors=10,
+                openspace=rng.randint(0, 1), conference_rooms=rng.randint(0, 4),
+                parking=rng.randint(0, 1), elevator=rng.randint(0, 1),
+            ))
+        owners.append(m.EstateOwner(estate_id=i, owner_id=rng.randint(1, counts['people'])))
+        employees.append(m.EstateEmployee(estate_id=i, person_id=rng.randint(1, counts['people'])))
+
+    contracts = [
+        m.Contract(
+            contract_id=i, estate_id=rng.randint(1, counts['estates']),
+            employee_id=rng.randint(1, counts['people']), client_id=rng.randint(1, counts['people']),
+            contract_type=rng.choice(TRANSACTION_TYPES),
+            date_signed=datetime.date(2020, 1, 1) + datetime.timedelta(days=rng.randint(0, 1800)),
+            payment_amount=Decimal(rng.randint(500, 500_000)), fee_percentage=Decimal('3.00'),
+            terms="Standard terms. " * rng.randint(1, 20),
+        )
+        for i in range(1, counts['contracts'] + 1)
+    ]
+
+    with transaction.atomic():
+        for objects in (settlements, people, estates, apartments, houses, offices, owners, employees, contracts):
+            type(objects[0]).objects.bulk_create(objects, batch_size=500)
+        for summary in ALL_SUMMARIES:
+            summary.rebuild()
+
+    invalidate_tables(*(model._meta.db_table for model in apps.get_app_config('realty').get_models()))
+    return counts
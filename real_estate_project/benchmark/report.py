@@ -0,0 +1,120 @@
+import datetime
+import platform
+
+import django
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from realty.db_pool import get_pool
+
+from .runners import RUNNERS, client_settings
+from .scenarios import SCENARIOS, send
+from .stats import count_queries, summarise_latencies
+
+# Metric -> direction that counts as worse, for compare().
+COMPARED_METRICS = {
+    ('latency_ms', 'p50'): 1,
+    ('latency_ms', 'p95'): 1,
+    ('latency_ms', 'p99'): 1,
+    ('rps',): -1,
+    ('queries_per_request', 'mean'): 1,
+}
+
+
+def probe_queries(scenario_name, count) -> dict:
+    # Sequential requests on this thread, so every query (including ones the
+    # view hands to worker threads) belongs to the request being counted.
+    scenario = SCENARIOS[scenario_name](0)
+    scenario.setup()
+    client = Client(raise_request_exception=False)
+    headers = scenario.headers()
+
+    counts = []
+    for _ in range(count):
+        with count_queries() as counter:
+            send(client, *scenario.next_request(), headers)
+        counts.append(counter.count)
+
+    return {'mean': round(sum(counts) / len(counts), 2), 'max': max(counts)} if counts else None
+
+
+def run_suite(scenarios, runners, requests, workers, warmup=10, overrides=None) -> dict:
+    with override_settings(**client_settings(overrides)):
+        results = _run(scenarios, runners, requests, workers, warmup, client_settings(overrides))
+
+    return {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': requests,
+            'warmup': warmup,
+            'overrides': overrides or {},
+        },
+        'results': results,
+    }
+
+
+def _run(scenarios, runners, requests, workers, warmup, overrides):
+    results = []
+    for scenario_name in scenarios:
+        # The warm-up doubles as the query count probe and primes caches.
+        queries = probe_queries(scenario_name, warmup)
+
+        for runner_name in runners:
+            runner = RUNNERS[runner_name](overrides)
+            for worker_count in ([1] if runner_name == 'sync' else workers):
+                get_pool().reset_metrics()
+                latencies, errors, duration = runner.run(scenario_name, requests, worker_count)
+                results.append({
+                    'scenario': scenario_name,
+                    'runner': runner_name,
+                    'workers': worker_count,
+                    'requests': len(latencies),
+                    'errors': errors,
+                    'duration_s': round(duration, 4),
+                    'rps': round(len(latencies) / duration, 2) if duration else None,
+                    **summarise_latencies(latencies),
+                    'queries_per_request': queries,
+                    # Child processes have pools of their own.
+                    'pool': None if runner_name == 'process' else get_pool().metrics(),
+                })
+    return results
+
+
+def _metric(result, path):
+    value = result
+    for key in path:
+        value = (value or {}).get(key)
+    return value
+
+
+def compare(baseline, current, tolerance=0.1) -> list:
+    """Lists metrics of `current` that are worse than `baseline` by more than `tolerance`."""
+    def key(result):
+        return result['scenario'], result['runner'], result['workers']
+
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        for path, worse in COMPARED_METRICS.items():
+            old, new = _metric(before, path), _metric(result, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * worse > tolerance:
+                regressions.append({
+                    'scenario': result['scenario'],
+                    'runner': result['runner'],
+                    'workers': result['workers'],
+                    'metric': '.'.join(path),
+                    'baseline': old,
+                    'current': new,
+                    'change': round(change, 4),
+                })
+    return regressions
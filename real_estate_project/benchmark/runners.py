@@ -0,0 +1,156 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.test import AsyncClient, Client
+
+from .worker import drive as drive_in_process, init_process
+from .scenarios import SCENARIOS, send
+
+
+def client_settings(overrides=None) -> dict:
+    # The test clients send Host: testserver, as Django's own test runner does.
+    # For runs outside a request only (manage.py benchmark): inside one, pass
+    # the runner the request's host instead of changing settings.
+    return {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'], **(overrides or {})}
+
+
+def split(requests, workers):
+    share, extra = divmod(requests, workers)
+    return [share + (1 if worker < extra else 0) for worker in range(workers)]
+
+
+def _headers(scenario, host):
+    headers = scenario.headers()
+    return {**headers, 'host': host} if host else headers
+
+
+def drive(scenario_name, worker, count, host=None):
+    """
+    Issues `count` requests of one scenario through the full Django stack.
+    Returns (latencies, errors, started, finished); wall-clock bounds let the
+    caller compute throughput across threads and processes alike.
+    """
+    scenario = SCENARIOS[scenario_name](worker)
+    scenario.setup()
+    client = Client(raise_request_exception=False)
+    headers = _headers(scenario, host)
+
+    latencies, errors = [], 0
+    started = time.time()
+    for _ in range(count):
+        method, path, body = scenario.next_request()
+        begin = time.perf_counter()
+        response = send(client, method, path, body, headers)
+        latencies.append(time.perf_counter() - begin)
+        errors += response.status_code >= 400
+    return latencies, errors, started, time.time()
+
+
+class Runner:
+    name = None
+
+    def __init__(self, overrides=None, host=None):
+        # Settings overrides the caller already runs under (see client_settings());
+        # only runners that start new interpreters need to re-apply them.
+        self.overrides = overrides or {}
+        # Host header of the requests; None sends Django's 'testserver'.
+        self.host = host
+
+    def run(self, scenario_name, requests, workers):
+        """Returns (latencies, errors, duration seconds)."""
+        results = self.execute(scenario_name, split(requests, workers))
+
+        latencies = [latency for result in results for latency in result[0]]
+        errors = sum(result[1] for result in results)
+        duration = max(result[3] for result in results) - min(result[2] for result in results)
+        return latencies, errors, duration
+
+    def execute(self, scenario_name, shares):
+        raise NotImplementedError
+
+
+class SyncRunner(Runner):
+    name = 'sync'
+
+    def execute(self, scenario_name, shares):
+        return [drive(scenario_name, 0, sum(shares), self.host)]
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _thread_executor(workers) -> ThreadPoolExecutor:
+    # Kept for the life of the process: its threads, and so their persistent
+    # connections (CONN_MAX_AGE), are reused by every run at this concurrency.
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='benchmark')
+        return _executors[workers]
+
+
+class ThreadedRunner(Runner):
+    name = 'threaded'
+
+    def execute(self, scenario_name, shares):
+        executor = _thread_executor(len(shares))
+        futures = [
+            executor.submit(drive, scenario_name, worker, count, self.host) for worker, count in enumerate(shares)
+        ]
+        return [future.result() for future in futures]
+
+
+class ProcessRunner(Runner):
+    name = 'process'
+
+    def execute(self, scenario_name, shares):
+        # Spawned rather than forked: the parent's DB connections and thread
+        # pools must not be shared with children.
+        with ProcessPoolExecutor(
+            max_workers=len(shares),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_process,
+            initargs=(self.overrides,),
+        ) as executor:
+            futures = [
+                executor.submit(drive_in_process, scenario_name, worker, count, self.host)
+                for worker, count in enumerate(shares)
+            ]
+            return [future.result() for future in futures]
+
+
+class AsyncioRunner(Runner):
+    """Concurrent requests through the ASGI handler with AsyncClient."""
+    name = 'asyncio'
+
+    def execute(self, scenario_name, shares):
+        return asyncio.run(self._execute(scenario_name, shares))
+
+    async def _execute(self, scenario_name, shares):
+        return await asyncio.gather(*(
+            self._drive(scenario_name, worker, count) for worker, count in enumerate(shares)
+        ))
+
+    async def _drive(self, scenario_name, worker, count):
+        scenario = SCENARIOS[scenario_name](worker)
+        await sync_to_async(scenario.setup)()
+        client = AsyncClient(raise_request_exception=False)
+        headers = await sync_to_async(_headers)(scenario, self.host)
+
+        latencies, errors = [], 0
+        started = time.time()
+        for _ in range(count):
+            method, path, body = scenario.next_request()
+            begin = time.perf_counter()
+            response = await send(client, method, path, body, headers)
+            latencies.append(time.perf_counter() - begin)
+            errors += response.status_code >= 400
+        return latencies, errors, started, time.time()
+
+
+RUNNERS = {runner.name: runner for runner in (SyncRunner, ThreadedRunner, ProcessRunner, AsyncioRunner)}
@@ -0,0 +1,160 @@
+import json
+import random
+
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from realty.models import Contract, Estate, Person
+from realty.repositories import UnitOfWork
+
+
+class Scenario:
+    """One kind of request mix. Each worker gets its own instance."""
+    name = None
+    authenticated = False
+    # Writes real rows: only for `manage.py benchmark` on a disposable database.
+    writes = False
+
+    def __init__(self, worker=0):
+        self.worker = worker
+        self.random = random.Random(worker)
+
+    def setup(self):
+        pass
+
+    def headers(self):
+        if not self.authenticated:
+            return {}
+        user, _ = get_user_model().objects.get_or_create(username='benchmark')
+        token, _ = Token.objects.get_or_create(user=user)
+        return {'authorization': f"Token {token.key}"}
+
+    def next_request(self):
+        """Returns (method, path, json body or None)."""
+        raise NotImplementedError
+
+
+class CrudList(Scenario):
+    name = 'crud_list'
+    paths = ('/api/estates/', '/api/contracts/', '/api/apartments/')
+
+    def next_request(self):
+        return 'get', self.random.choice(self.paths), None
+
+
+class CrudRetrieve(Scenario):
+    name = 'crud_retrieve'
+
+    def setup(self):
+        self.pks = list(Estate.objects.order_by('pk').values_list('pk', flat=True)[:1000])
+
+    def next_request(self):
+        return 'get', f"/api/estates/{self.random.choice(self.pks)}/", None
+
+
+class AnalyticsAggregates(Scenario):
+    name = 'analytics'
+    paths = (
+        '/api/analytics/financials/monthly/',
+        '/api/analytics/settlements/hot/?limit=20',
+        '/api/analytics/settlements/market/?by_name=1',
+        '/api/analytics/apartments/rooms/',
+        '/api/analytics/employees/top/?limit=10',
+        '/api/analytics/owners/whales/?limit=5',
+        '/api/analytics/general-statistics/',
+    )
+
+    def next_request(self):
+        return 'get', self.random.choice(self.paths), None
+
+
+class AsyncAnalyticsAggregates(AnalyticsAggregates):
+    name = 'async_analytics'
+    paths = (
+        '/api/async/analytics/monthly_revenue/',
+        '/api/async/analytics/hot_settlements/?limit=20',
+        '/api/async/analytics/market_analysis/?by_name=1',
+        '/api/async/analytics/stats_by_rooms/',
+        '/api/async/analytics/top_employees/?limit=10',
+        '/api/async/analytics/whale_owners/?limit=5',
+    )
+
+
+class AsyncCrudList(CrudList):
+    name = 'async_list'
+    paths = ('/api/async/estates/', '/api/async/contracts/', '/api/async/apartments/')
+
+
+class BulkWrites(Scenario):
+    """Creates a batch of contracts, then deletes it on the next request."""
+    name = 'bulk_writes'
+    authenticated = True
+    writes = True
+    batch_size = 100
+    # Each worker owns a disjoint contract_id range far above real data.
+    id_base = 1_000_000_000
+    id_span = 1_000_000
+
+    def setup(self):
+        self.low = self.id_base + self.worker * self.id_span
+        self.sequence = 0
+        self.created = None
+
+        leftovers = list(
+            Contract.objects.filter(pk__gte=self.low, pk__lt=self.low + self.id_span).values_list('pk', flat=True)
+        )
+        if leftovers:
+            UnitOfWork().contracts.bulk_delete(leftovers)
+
+        self.estates = list(Estate.objects.order_by('pk').values_list('pk', flat=True)[:500])
+        self.people = list(Person.objects.order_by('pk').values_list('pk', flat=True)[:500])
+
+    def next_request(self):
+        if self.created:
+            ids, self.created = self.created, None
+            return 'delete', '/api/contracts/bulk/', ids
+
+        start = self.low + (self.sequence * self.batch_size) % self.id_span
+        self.sequence += 1
+        self.created = list(range(start, start + self.batch_size))
+        rows = [
+            {
+                'contract_id': contract_id,
+                'estate': self.random.choice(self.estates),
+                'employee': self.random.choice(self.people),
+                'client': self.random.choice(self.people),
+                'contract_type': 'sale',
+                'date_signed': f"2024-{self.random.randint(1, 12):02d}-01",
+                'payment_amount': f"{self.random.randint(1000, 500000)}.00",
+                'fee_percentage': '3.00',
+            }
+            for contract_id in self.created
+        ]
+        return 'post', '/api/contracts/bulk/', rows
+
+
+class DashboardRendering(Scenario):
+    name = 'dashboard'
+    paths = ('/api/dashboard/v2/', '/api/dashboard/v2/?top_cities=10&min_rooms=2')
+
+    def next_request(self):
+        return 'get', self.random.choice(self.paths), None
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        CrudList, CrudRetrieve, AnalyticsAggregates, BulkWrites, DashboardRendering,
+        AsyncCrudList, AsyncAnalyticsAggregates,
+    )
+}
+
+READ_ONLY_SCENARIOS = tuple(name for name, scenario in SCENARIOS.items() if not scenario.writes)
+
+
+def send(client, method, path, body, headers=None):
+    # Works for both Client and AsyncClient; the latter returns a coroutine.
+    # Headers go on each request: AsyncClient does not apply constructor headers.
+    if body is None:
+        return getattr(client, method)(path, headers=headers)
+    return getattr(client, method)(path, data=json.dumps(body), content_type='application/json', headers=headers)
@@ -0,0 +1,84 @@
+import bisect
+import threading
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def percentile(ordered, fraction):
+    # Nearest-rank on an already sorted list.
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def histogram(latencies_ms) -> dict:
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for value in latencies_ms:
+        counts[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, value)] += 1
+    labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+    return dict(zip(labels, counts))
+
+
+def summarise_latencies(latencies) -> dict:
+    ordered = sorted(seconds * 1000 for seconds in latencies)
+    if not ordered:
+        return {'latency_ms': None, 'histogram_ms': histogram(())}
+
+    return {
+        'latency_ms': {
+            'min': round(ordered[0], 3),
+            'mean': round(sum(ordered) / len(ordered), 3),
+            'p50': round(percentile(ordered, 0.50), 3),
+            'p95': round(percentile(ordered, 0.95), 3),
+            'p99': round(percentile(ordered, 0.99), 3),
+            'max': round(ordered[-1], 3),
+        },
+        'histogram_ms': histogram(ordered),
+    }
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts queries on this thread's open connections and on every connection
+    opened while the block runs, including ones in other threads (e.g. the
+    analytics bundle pool).
+    """
+    counter = QueryCounter()
+    wrapped = []
+
+    def attach(connection):
+        if counter not in connection.execute_wrappers:
+            connection.execute_wrappers.append(counter)
+            wrapped.append(connection)
+
+    def on_connection_created(sender, connection, **kwargs):
+        attach(connection)
+
+    for connection in connections.all(initialized_only=True):
+        attach(connection)
+    connection_created.connect(on_connection_created, weak=False)
+    try:
+        yield counter
+    finally:
+        connection_created.disconnect(on_connection_created)
+        for connection in wrapped:
+            if counter in connection.execute_wrappers:
+                connection.execute_wrappers.remove(counter)
@@ -0,0 +1,15 @@
+# Entry points for spawned benchmark processes. Unpickling them imports this
+# module before Django is set up, so it must not import models at load time.
+import django
+
+
+def init_process(overrides):
+    django.setup()
+    if overrides:
+        from django.test.utils import override_settings
+        override_settings(**overrides).enable()
+
+
+def drive(*args):
+    from .runners import drive
+    return drive(*args)
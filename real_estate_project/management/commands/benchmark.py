@@ -0,0 +1,100 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from real_estate_project.benchmark.fixtures import ensure_schema, seed
+from real_estate_project.benchmark.report import compare, run_suite
+from real_estate_project.benchmark.runners import RUNNERS
+from real_estate_project.benchmark.scenarios import READ_ONLY_SCENARIOS, SCENARIOS
+
+
+def _names(value, choices):
+    names = [name for name in value.split(',') if name]
+    unknown = set(names) - set(choices)
+    if unknown:
+        raise CommandError(f"Unknown: {', '.join(sorted(unknown))}. Choose from {', '.join(choices)}.")
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the API through the full Django stack and write a JSON report. "
+        "Use BENCHMARK_SQLITE=<path> with --seed to run against a local fixture database; "
+        "scenarios that write (bulk_writes) only run there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', help="Comma-separated scenario names. Default: all on a "
+                                                "BENCHMARK_SQLITE database, the read-only ones otherwise.")
+        parser.add_argument('--runners', default='sync,threaded', help=f"Comma-separated: {', '.join(RUNNERS)}.")
+        parser.add_argument('--workers', default='1,4,8', help="Comma-separated worker counts.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per scenario, runner and worker count.")
+        parser.add_argument('--warmup', type=int, default=10, help="Sequential requests that count queries first.")
+        parser.add_argument('--cold-cache', action='store_true', help="Disable the analytics query cache.")
+        parser.add_argument('--seed', action='store_true', help="Create missing tables and seed empty ones.")
+        parser.add_argument('--scale', type=int, default=1, help="Fixture size multiplier for --seed.")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--compare', help="Baseline report to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.1, help="Allowed relative regression.")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        disposable = bool(os.environ.get('BENCHMARK_SQLITE'))
+        default = SCENARIOS if disposable else READ_ONLY_SCENARIOS
+        scenarios = _names(options['scenarios'] or ','.join(default), SCENARIOS)
+        writing = [name for name in scenarios if SCENARIOS[name].writes]
+        if writing and not disposable:
+            raise CommandError(
+                f"{', '.join(writing)} write to the database; run them with BENCHMARK_SQLITE=<path>."
+            )
+        runners = _names(options['runners'], RUNNERS)
+        try:
+            workers = [int(count) for count in options['workers'].split(',') if count]
+        except ValueError:
+            raise CommandError("--workers must be comma-separated integers.")
+        if not workers or min(workers) < 1 or options['requests'] < 1:
+            raise CommandError("--workers and --requests must be positive.")
+
+        if options['seed']:
+            ensure_schema()
+            counts = seed(options['scale'])
+            self.stdout.write(f"Seeded: {counts}" if counts else "Fixture data already present.")
+
+        overrides = {'QUERY_CACHE_ENABLED': False} if options['cold_cache'] else {}
+        report = run_suite(scenarios, runners, options['requests'], workers, options['warmup'], overrides)
+
+        self._print(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                regressions = compare(json.load(f), report, options['tolerance'])
+            for item in regressions:
+                self.stdout.write(self.style.WARNING(
+                    f"{item['scenario']}/{item['runner']}x{item['workers']} {item['metric']}: "
+                    f"{item['baseline']} -> {item['current']} ({item['change']:+.1%})"
+                ))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+            elif options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) beyond {options['tolerance']:.0%}.")
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{'scenario':<14} {'runner':<9} {'wrk':>4} {'rps':>9} {'p50':>8} {'p95':>8} {'p99':>8} "
+            f"{'q/req':>6} {'err':>5} {'pool wait ms':>12}"
+        )
+        for result in report['results']:
+            latency = result['latency_ms'] or {}
+            queries = result['queries_per_request'] or {}
+            pool = result['pool'] or {}
+            self.stdout.write(
+                f"{result['scenario']:<14} {result['runner']:<9} {result['workers']:>4} "
+                f"{result['rps'] or 0:>9.1f} {latency.get('p50', 0):>8.2f} {latency.get('p95', 0):>8.2f} "
+                f"{latency.get('p99', 0):>8.2f} {queries.get('mean', 0):>6} {result['errors']:>5} "
+                f"{pool.get('wait_seconds_max', 0) * 1000:>12.2f}"
+            )
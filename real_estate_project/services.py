@@ -1,47 +1,45 @@
-import time
-import concurrent.futures
-from django.db import connections
-from realty.models import Contract
+from django.db import OperationalError
+
+from .benchmark.runners import RUNNERS
+from .benchmark.stats import summarise_latencies
+
 
 class BenchmarkService:
-    def __init__(self, query_count=100):
+    # Runs inside a request: settings are left alone and the nested requests
+    # carry the caller's (already validated) host.
+    def __init__(self, query_count=100, scenario='crud_list', host=None):
         self.query_count = query_count
+        self.scenario = scenario
+        self.host = host
 
-    def _single_db_query(self):
-        try:
-            count = Contract.objects.filter(payment_amount__gt=5000).count()
-            return count
-        except OperationalError:
-            connections.close_all()
-            return 0
+    def _run(self, runner_name, workers):
+        return RUNNERS[runner_name](host=self.host).run(self.scenario, self.query_count, workers)
 
     def run_sync(self):
-        start_time = time.time()
-        for _ in range(self.query_count):
-            self._single_db_query()
-        return time.time() - start_time
+        return self._run('sync', 1)[2]
 
     def run_multithreaded(self, max_workers=4):
-        start_time = time.time()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(self._single_db_query) for _ in range(self.query_count)]
-            concurrent.futures.wait(futures)
-        return time.time() - start_time
+        return self._run('threaded', max_workers)[2]
 
-    def run_benchmark_experiment(self):
+    def run_benchmark_experiment(self, max_workers=None):
         worker_options = [1, 2, 4, 8, 16, 32, 64]
+        if max_workers is not None:
+            worker_options = [workers for workers in worker_options if workers <= max_workers]
         results = []
 
         for workers in worker_options:
-            connections.close_all()
-
-            duration = self.run_multithreaded(workers)
-            rps = self.query_count / duration
+            try:
+                latencies, errors, duration = self._run('threaded', workers)
+            except OperationalError as e:
+                results.append({'workers': workers, 'duration': None, 'rps': 0, 'error': str(e)})
+                continue
 
             results.append({
                 'workers': workers,
                 'duration': round(duration, 4),
-                'rps': round(rps, 2),
+                'rps': round(len(latencies) / duration, 2) if duration else 0,
+                'errors': errors,
+                **(summarise_latencies(latencies)['latency_ms'] or {}),
             })
 
         return results
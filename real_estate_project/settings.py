@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +47,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'realty.db_pool.ConnectionPoolMiddleware',
+    'realty.query_stats.QueryStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,9 +90,33 @@ DATABASES = {
         'PASSWORD': '30061941',
         'HOST': '127.0.0.1',
         'PORT': '3306',
+        # Seconds a thread keeps its connection between requests (0 closes it
+        # after each request, None never). Django advises 0 under ASGI, where
+        # requests do not reuse threads: set DB_CONN_MAX_AGE=0 there.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Benchmarks and pre-deploy regression runs can use a local SQLite fixture
+# database instead (see `manage.py benchmark --seed`).
+if os.environ.get('BENCHMARK_SQLITE'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ['BENCHMARK_SQLITE'],
+            'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+            'CONN_HEALTH_CHECKS': True,
+            # Concurrent writers wait for the lock instead of failing with
+            # "database is locked" when a read transaction upgrades.
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 30,
+                'init_command': 'PRAGMA journal_mode=WAL;',
+            },
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,16 +154,151 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# BokehJS ships with the bokeh package; exposing it as static files lets
+# browsers and proxies cache it instead of receiving it inline on every page.
+_bokeh_spec = find_spec('bokeh')
+STATICFILES_DIRS = [
+    ('bokeh/static', Path(_bokeh_spec.origin).parent / 'server' / 'static'),
+] if _bokeh_spec else []
+
+# How dashboard_bokeh.html loads BokehJS: 'static', 'cdn' or 'inline'.
+BOKEH_RESOURCES = 'static'
+# Seconds a rendered dashboard stays cached; None uses the cache's TIMEOUT.
+BOKEH_DASHBOARD_CACHE_TIMEOUT = None
+
+# contract_list: rows per page, and seconds a rendered page stays cached
+# (writes through the repositories invalidate it sooner).
+CONTRACT_LIST_PAGE_SIZE = 100
+CONTRACT_LIST_CACHE_TIMEOUT = 300
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The 'analytics' alias holds repository query results (see realty/query_cache.py)
+# and the per-table version stamps that invalidate them on writes; the API's
+# ETag/Last-Modified validators (realty/conditional.py) come from the same
+# stamps. LocMemCache is an LRU bounded by MAX_ENTRIES but is private to each
+# worker process: there the stamps expire after TABLE_VERSION_TTL seconds, so
+# other workers serve stale results and answer 304 for at most that long (and
+# rebuild the search index as often). `manage.py check --deploy` warns about
+# it. With several workers switch to a shared backend so writes invalidate
+# everywhere at once:
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': BASE_DIR / 'cache' / 'analytics',
+# or
+#   'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+#   'LOCATION': 'analytics_cache',  # python manage.py createcachetable
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'analytics',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+QUERY_CACHE_ALIAS = 'analytics'
+QUERY_CACHE_ENABLED = True
+TABLE_VERSION_TTL = 60
+
+# Opt-in: analytics read the materialized tables from sql/summary_tables.sql,
+# which the repositories keep current inside every write transaction. The
+# tables are not created by migrations; to turn this on:
+#   1. mysql real_estate_agency < sql/summary_tables.sql
+#   2. python manage.py rebuild_summaries
+#   3. set USE_SUMMARY_TABLES = True and restart the workers.
+# Rerun rebuild_summaries after writes that bypassed the repositories.
+USE_SUMMARY_TABLES = False
+
+# Size of the shared thread pool behind /api/analytics/bundle/, i.e. the most
+# database connections the bundle queries hold at once per process.
+ANALYTICS_BUNDLE_WORKERS = 4
+
+# Per-process cap on threads using a database connection at once (requests,
+# bundle workers, benchmark threads; see realty/db_pool.py). Keep
+# DB_POOL_SIZE x worker processes under MySQL's max_connections. Requests that
+# wait longer than DB_POOL_TIMEOUT seconds for a slot get a 503.
+DB_POOL_SIZE = 20
+DB_POOL_TIMEOUT = 10
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'realty.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ]
 }
+
+# realty.query_stats.QueryStatsMiddleware keeps the QUERY_STATS_SLOWEST
+# slowest statements of each request and logs those over SLOW_QUERY_MS to
+# 'realty.queries'. With QUERY_TIMING_HEADER responses carry a Server-Timing
+# header with the DB time and query count.
+SLOW_QUERY_MS = 200
+QUERY_STATS_SLOWEST = 3
+QUERY_TIMING_HEADER = True
+
+# Most queries a view may run per request (url name -> count, token lookup
+# included). Over budget is logged; tests set QUERY_BUDGETS_STRICT = True so
+# an N+1 raises QueryBudgetExceeded instead.
+QUERY_BUDGETS = {
+    'estate-list': 4,
+    'estate-detail': 4,
+    'estate-listings': 4,
+    'estate-search': 4,
+    'apartment-list': 2,
+    'house-list': 2,
+    'contract-list': 2,
+    'settlement-list': 2,
+    'person-list': 2,
+    'analytics-get-general-statistics': 2,
+    'analytics-hot-settlements': 2,
+    'analytics-top-employees': 2,
+    'analytics-whale-owners': 2,
+    'analytics-market-analysis': 2,
+    'analytics-monthly-revenue': 2,
+    'analytics-stats-by-rooms': 2,
+    'analytics-bundle': 8,
+    'async-estate-list': 4,
+    'contract_list': 2,
+}
+QUERY_BUDGETS_STRICT = False
+
+# Times every repository method (calls, errors, rows, latency histogram) for
+# /api/metrics/. Read when realty.repositories is imported; off, the methods
+# are left unwrapped.
+REPOSITORY_METRICS = False
+
+# Client addresses that may read /api/metrics/ without a staff session, e.g.
+# the Prometheus scraper's. Empty: staff only. REMOTE_ADDR is matched; behind
+# a reverse proxy on the same host every client is 127.0.0.1, so list
+# loopback only when the scraper reaches the app server directly.
+METRICS_ALLOWED_IPS = []
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'realty.queries': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+# CachedTokenAuthentication keeps validated tokens per process. Deleting a
+# token or saving/deleting its user evicts it at once in this process;
+# elsewhere it expires after the TTL (seconds).
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 60
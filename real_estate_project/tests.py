@@ -0,0 +1,175 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from realty.db_pool import get_pool
+from .NetworkHelper import NetworkHelper
+from .benchmark.fixtures import ensure_schema
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the companies API. Each path answers 503 for its first
+    `failures[path]` requests; every request and the client port it came
+    from (one per TCP connection) is recorded.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+    lock = threading.Lock()
+    failures = {}
+    requests = []
+    ports = set()
+    in_flight = 0
+    peak_in_flight = 0
+
+    @classmethod
+    def reset(cls, failures=None, latency=0.0):
+        cls.failures = dict(failures or {})
+        cls.latency = latency
+        cls.requests = []
+        cls.ports = set()
+        cls.in_flight = cls.peak_in_flight = 0
+
+    def _handle(self, status, body=None):
+        cls = type(self)
+        with cls.lock:
+            cls.requests.append((self.command, self.path, time.perf_counter()))
+            cls.ports.add(self.client_address[1])
+            remaining = cls.failures.get(self.path, 0)
+            if remaining:
+                cls.failures[self.path] = remaining - 1
+                status, body = 503, None
+            cls.in_flight += 1
+            cls.peak_in_flight = max(cls.peak_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.latency)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        payload = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _item_id(self):
+        parts = [part for part in self.path.split('/') if part]
+        return int(parts[1]) if len(parts) > 1 else None
+
+    def do_GET(self):
+        item_id = self._item_id()
+        if item_id is None:
+            self._handle(200, [{'company_id': 1}, {'company_id': 2}])
+        else:
+            self._handle(200, {'company_id': item_id})
+
+    def do_POST(self):
+        self._handle(201, {'company_id': 3})
+
+    def do_DELETE(self):
+        self._handle(204)
+
+    def log_message(self, *args):
+        pass
+
+
+class NetworkHelperTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_url = f"http://127.0.0.1:{cls.server.server_port}/companies"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubHandler.reset()
+        self.helper = NetworkHelper(self.api_url, token='test-token', timeout=(1, 2), pool_size=2)
+        self.helper.backoff = 0.05
+        self.addCleanup(self.helper.close)
+
+    def paths(self):
+        return [path for _, path, _ in StubHandler.requests]
+
+    def test_session_keeps_one_connection_alive(self):
+        for item_id in range(5):
+            self.assertEqual(self.helper.get_item_api(item_id), {'company_id': item_id})
+        self.assertEqual(len(StubHandler.requests), 5)
+        self.assertEqual(len(StubHandler.ports), 1)
+
+    def test_retries_transient_errors_with_backoff(self):
+        StubHandler.reset({'/companies/7/': 2})
+        self.assertEqual(self.helper.get_item_api(7), {'company_id': 7})
+        self.assertEqual(self.paths(), ['/companies/7/'] * 3)
+        # urllib3 retries the first failure at once and backs off from the second.
+        first, second, third = (at for _, _, at in StubHandler.requests)
+        self.assertGreaterEqual(third - second, self.helper.backoff * 2)
+
+    def test_gives_up_after_retries(self):
+        StubHandler.reset({'/companies/7/': 10})
+        response = self.helper.delete_item_api(7)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(StubHandler.requests), self.helper.retries + 1)
+
+    def test_post_is_not_retried(self):
+        StubHandler.reset({'/companies/': 1})
+        with self.assertRaises(ValueError):
+            # The 503 carries no JSON body.
+            self.helper.create_item_api({'name_company': 'New'})
+        self.assertEqual(len(StubHandler.requests), 1)
+
+    async def test_async_batch_retries_and_stays_within_pool(self):
+        StubHandler.reset({'/companies/1/': 1, '/companies/4/': 1}, latency=0.02)
+        results = await self.helper.aget_items_api(range(6))
+        self.assertEqual(results, {item_id: {'company_id': item_id} for item_id in range(6)})
+        self.assertEqual(len(StubHandler.requests), 8)
+        self.assertLessEqual(StubHandler.peak_in_flight, self.helper.pool_size)
+        self.assertLessEqual(len(StubHandler.ports), self.helper.pool_size)
+
+    async def test_async_delete_batch(self):
+        StubHandler.reset({'/companies/2/': 1})
+        results = await self.helper.adelete_items_api([1, 2, 3])
+        self.assertEqual({item_id: response.status_code for item_id, response in results.items()},
+                         {1: 204, 2: 204, 3: 204})
+        self.assertEqual(await self.helper.aget_list_api(), [{'company_id': 1}, {'company_id': 2}])
+
+
+class BenchmarkViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ensure_schema()
+        super().setUpClass()
+
+    @override_settings(DEBUG=True)
+    def test_staff_only(self):
+        self.assertEqual(self.client.get('/api/benchmark/?requests=1').status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('member'))
+        self.assertEqual(self.client.get('/api/benchmark/?requests=1').status_code, 403)
+
+    @override_settings(ALLOWED_HOSTS=['bench.example'])
+    def test_runs_with_request_host_and_pool_bound(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', is_staff=True))
+        response = self.client.get('/api/benchmark/?requests=16', HTTP_HOST='bench.example')
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()
+        # The nested requests were accepted without widening ALLOWED_HOSTS.
+        self.assertEqual(settings.ALLOWED_HOSTS, ['bench.example'])
+        self.assertEqual([row['errors'] for row in results], [0] * len(results))
+        self.assertLess(max(row['workers'] for row in results), get_pool().size)
@@ -1,13 +1,42 @@
+import logging
+
 from django.shortcuts import render, redirect
 from .NetworkHelper import NetworkHelper
 from django.http import JsonResponse
+from realty.db_pool import get_pool
+from .benchmark.scenarios import READ_ONLY_SCENARIOS
 from .services import BenchmarkService
 
+logger = logging.getLogger(__name__)
+
+# Requests per worker count; the experiment runs 7 worker counts.
+BENCHMARK_MAX_REQUESTS = 500
+
+
 def benchmark_data_api(request):
-    requests_count = int(request.GET.get('requests', 100))
+    # Load-tests the live database: staff only, read-only scenarios only.
+    # Write scenarios run through `manage.py benchmark` against a disposable
+    # BENCHMARK_SQLITE database.
+    if not request.user.is_staff:
+        return JsonResponse({'detail': "Staff only."}, status=403)
+
+    try:
+        requests_count = int(request.GET.get('requests', 100))
+    except ValueError:
+        requests_count = 0
+    if not 1 <= requests_count <= BENCHMARK_MAX_REQUESTS:
+        return JsonResponse({'detail': f"'requests' must be between 1 and {BENCHMARK_MAX_REQUESTS}."}, status=400)
 
-    service = BenchmarkService(query_count=requests_count)
-    data = service.run_benchmark_experiment()
+    scenario = request.GET.get('scenario', 'crud_list')
+    if scenario not in READ_ONLY_SCENARIOS:
+        return JsonResponse(
+            {'detail': f"Unknown scenario. Choose from {', '.join(READ_ONLY_SCENARIOS)}."}, status=400
+        )
+
+    service = BenchmarkService(query_count=requests_count, scenario=scenario, host=request.get_host())
+    # Every nested request holds a pool slot, and this request holds one too:
+    # more workers than the slots left would only queue or 503.
+    data = service.run_benchmark_experiment(max_workers=get_pool().size - 1)
 
     return JsonResponse(data, safe = False)
 
@@ -21,21 +50,27 @@ helper_2 = NetworkHelper(
     token="ac45e86b0efaa07abfe666c2ae110dece7b46670"
 )
 
-def list_companies_api(request):
-    items = helper_1.get_list_api()
+async def _proxy_list(request, helper, template, url_name):
+    # Several delete_id values are deleted concurrently; the list is only
+    # fetched when it is rendered.
     if request.method == "POST":
-        item_id = request.POST.get("delete_id")
-        response = helper_1.delete_item_api(item_id)
-        print("DELETE response:", response.status_code, response.text)
-        return redirect("list_companies_api")
-    return render(request, "list_companies_api.html", {"items": items})
+        results = await helper.adelete_items_api(request.POST.getlist("delete_id"))
+        for item_id, response in results.items():
+            if isinstance(response, Exception):
+                logger.warning("DELETE %s/%s/ failed: %s", helper.api_url, item_id, response)
+            elif not response.ok:
+                logger.warning("DELETE %s/%s/ returned %s: %s", helper.api_url, item_id, response.status_code,
+                               response.text)
+            else:
+                logger.info("DELETE %s/%s/ returned %s", helper.api_url, item_id, response.status_code)
+        return redirect(url_name)
+    items = await helper.aget_list_api()
+    return render(request, template, {"items": items})
 
 
-def list_directors_api(request):
-    items = helper_2.get_list_api()
-    if request.method == "POST":
-        item_id = request.POST.get("delete_id")
-        response = helper_2.delete_item_api(item_id)
-        print("DELETE response:", response.status_code, response.text)
-        return redirect("list_directors_api")
-    return render(request, "list_directors_api.html", {"items": items})
\ No newline at end of file
+async def list_companies_api(request):
+    return await _proxy_list(request, helper_1, "list_companies_api.html", "list_companies_api")
+
+
+async def list_directors_api(request):
+    return await _proxy_list(request, helper_2, "list_directors_api.html", "list_directors_api")
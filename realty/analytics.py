@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+from .db_pool import get_pool
+
+# Bundle entry -> (UnitOfWork attribute, repository method).
+BUNDLE_QUERIES = {
+    'monthly_revenue': ('contracts', 'monthly_revenue_stream'),
+    'hot_settlements': ('settlements', 'hot_settlements'),
+    'market_analysis': ('settlements', 'market_analysis'),
+    'stats_by_rooms': ('apartments', 'stats_by_rooms'),
+    'top_employees': ('people', 'top_revenue_employees'),
+    'whale_owners': ('people', 'top_owners'),
+}
+
+
+def _limit(value):
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("must be a positive integer")
+    return limit
+
+
+def finite_decimal(value):
+    # Decimal() also accepts 'NaN' and 'Infinity', which the ORM rejects.
+    number = Decimal(value)
+    if not number.is_finite():
+        raise ValueError("must be a finite number")
+    return number
+
+
+def _flag(value):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError("must be a boolean")
+
+
+# Bundle entry -> query parameters its repository method accepts, with parsers.
+# They compile to WHERE/HAVING/LIMIT, so rows are filtered before they leave the database.
+QUERY_FILTERS = {
+    'monthly_revenue': {},
+    'hot_settlements': {'threshold': int, 'limit': _limit, 'by_name': _flag},
+    'market_analysis': {'by_name': _flag},
+    'stats_by_rooms': {'min_rooms': int},
+    'top_employees': {'limit': _limit},
+    'whale_owners': {'threshold': finite_decimal, 'limit': _limit},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # One process-wide pool: its size is the upper bound on database
+    # connections the bundle queries can hold at the same time.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ANALYTICS_BUNDLE_WORKERS', 4),
+                thread_name_prefix='analytics-bundle',
+            )
+        return _executor
+
+
+def _query(uow, repository_name, method_name, kwargs):
+    return list(getattr(getattr(uow, repository_name), method_name)(**kwargs))
+
+
+def _run_query(uow, repository_name, method_name, kwargs):
+    # Runs on a pool worker with a slot the submitting thread reserved; the
+    # worker's connection persists per CONN_MAX_AGE like a request thread's.
+    with get_pool().checkout(acquired=True):
+        return _query(uow, repository_name, method_name, kwargs)
+
+
+def _submit_bundle(uow, names, filters) -> tuple:
+    # Only queries that get a free pool slot right away go to the workers;
+    # the rest run on the calling thread, under the connection it already
+    # holds. A request waiting on workers that wait on slots held by other
+    # such requests would otherwise deadlock.
+    pool, executor = get_pool(), _get_executor()
+    futures, inline = {}, []
+    for name in names:
+        if pool.try_acquire():
+            # The request's context goes along, so its query stats see the worker's SQL.
+            futures[name] = executor.submit(
+                contextvars.copy_context().run, _run_query, uow, *BUNDLE_QUERIES[name], filters.get(name, {})
+            )
+        else:
+            inline.append(name)
+    return futures, inline
+
+
+def revenue_statistics(monthly_revenue) -> dict | None:
+    # One row per month, so sorting for the median is cheap.
+    revenue = sorted(row['total_revenue'] for row in monthly_revenue if row['total_revenue'] is not None)
+
+    if not revenue:
+        return None
+
+    return {
+        "mean": round(sum(revenue) / len(revenue), 2),
+        "median": round(statistics.median(revenue), 2),
+        "max": round(revenue[-1], 2),
+        "min": round(revenue[0], 2)
+    }
+
+
+def general_statistics(monthly_revenue) -> dict:
+    return {
+        "description": "Monthly revenue statistics (based on signed contracts)",
+        "data": revenue_statistics(monthly_revenue)
+    }
+
+
+def parse_filters(name, params, prefix='') -> dict:
+    return parse_params(QUERY_FILTERS[name], params, prefix)
+
+
+def parse_params(parsers, params, prefix='') -> dict:
+    # {param: parser} -> kwargs for the params present; ValueError names the bad one.
+    kwargs = {}
+    for param, parse in parsers.items():
+        raw = params.get(prefix + param)
+        if raw is None:
+            continue
+        try:
+            kwargs[param] = parse(raw)
+        except (ValueError, InvalidOperation):
+            raise ValueError(f"Invalid value for '{prefix + param}': {raw!r}.")
+    return kwargs
+
+
+def bundle_filters(params, names=None) -> dict:
+    # Bundle requests scope each filter by entry, e.g. ?whale_owners.limit=5.
+    return {name: parse_filters(name, params, f"{name}.") for name in names or BUNDLE_QUERIES}
+
+
+def to_columns(rows) -> dict:
+    columns = {}
+    for row in rows:
+        for key, value in row.items():
+            columns.setdefault(key, []).append(value)
+    return columns
+
+
+def bundle_tables(uow, names=None) -> list:
+    tables = set()
+    for name in names or BUNDLE_QUERIES:
+        repository_name, method_name = BUNDLE_QUERIES[name]
+        method = getattr(type(getattr(uow, repository_name)), method_name)
+        tables.update(method.cached_tables)
+    return sorted(tables)
+
+
+def collect_bundle(uow, names=None, filters=None) -> dict:
+    names = list(names or BUNDLE_QUERIES)
+    filters = filters or {}
+    futures, inline = _submit_bundle(uow, names, filters)
+
+    results = {name: _query(uow, *BUNDLE_QUERIES[name], filters.get(name, {})) for name in inline}
+    results.update((name, future.result()) for name, future in futures.items())
+    return {name: results[name] for name in names}
+
+
+async def acollect_bundle(uow, names=None, filters=None) -> dict:
+    # Same pool as collect_bundle(): the queries overlap on their own
+    # connections while the event loop stays free.
+    names = list(names or BUNDLE_QUERIES)
+    filters = filters or {}
+    futures, inline = _submit_bundle(uow, names, filters)
+
+    results = {}
+    for name in inline:
+        method = getattr(getattr(uow, BUNDLE_QUERIES[name][0]), f"a{BUNDLE_QUERIES[name][1]}")
+        results[name] = await method(**filters.get(name, {}))
+    pending = [asyncio.wrap_future(future) for future in futures.values()]
+    results.update(zip(futures, await asyncio.gather(*pending)))
+    return {name: results[name] for name in names}
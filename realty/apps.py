@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RealtyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'realty'
+
+    def ready(self):
+        # Connect the token cache invalidation and query timing signals, and
+        # register the table version cache check.
+        from . import authentication, query_cache, query_stats  # noqa: F401
@@ -0,0 +1,118 @@
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from .analytics import (
+    BUNDLE_QUERIES, acollect_bundle, bundle_filters, bundle_tables, general_statistics, parse_filters, to_columns,
+)
+from .conditional import aconditional_response
+from .repositories import UnitOfWork
+from .serialisers import values_serializer
+
+# Async twins of the read-only API: under ASGI a slow aggregate awaits its
+# query instead of holding a worker thread. Payloads match the DRF views.
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, encoder=JSONEncoder, status=status, safe=False,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
+
+
+def _rows_response(request, rows):
+    return _json(to_columns(rows) if request.GET.get('orient') == 'columns' else rows)
+
+
+def _conditional(request, tables, respond):
+    # Validated like the DRF views; these always render JSON.
+    return aconditional_response(request, tables, respond, (request.get_full_path(), 'application/json'))
+
+
+@require_GET
+async def analytics_query(request, name):
+    if name not in BUNDLE_QUERIES:
+        return _json({"detail": "Not found."}, status=404)
+
+    try:
+        filters = parse_filters(name, request.GET)
+    except ValueError as e:
+        return _json({"detail": str(e)}, status=400)
+
+    repository_name, method_name = BUNDLE_QUERIES[name]
+    repository = getattr(UnitOfWork(), repository_name)
+
+    async def respond():
+        return _rows_response(request, await getattr(repository, f"a{method_name}")(**filters))
+
+    return await _conditional(request, getattr(repository, method_name).cached_tables, respond)
+
+
+@require_GET
+async def analytics_bundle(request):
+    include = request.GET.get('include')
+    names = [name for name in include.split(',') if name] if include else None
+
+    unknown = set(names or ()) - set(BUNDLE_QUERIES)
+    if unknown:
+        return _json({"detail": f"Unknown bundle entries: {', '.join(sorted(unknown))}."}, status=400)
+
+    try:
+        filters = bundle_filters(request.GET, names)
+    except ValueError as e:
+        return _json({"detail": str(e)}, status=400)
+
+    uow = UnitOfWork()
+
+    async def respond():
+        data = await acollect_bundle(uow, names, filters)
+        stats = general_statistics(data['monthly_revenue']) if 'monthly_revenue' in data else None
+
+        if request.GET.get('orient') == 'columns':
+            data = {name: to_columns(rows) for name, rows in data.items()}
+        if stats is not None:
+            data['general_statistics'] = stats
+        return _json(data)
+
+    return await _conditional(request, bundle_tables(uow, names), respond)
+
+
+@require_GET
+async def resource_list(request, viewset):
+    repository = getattr(UnitOfWork(), viewset.repository_name)
+
+    async def respond():
+        paginator = viewset.pagination_class()
+        try:
+            if viewset.fast_read:
+                reader = values_serializer(viewset.serializer_class)
+                rows = await paginator.apaginate_values(repository, request, reader.columns, reader.pk_index)
+                return _json(paginator.get_response_data(await reader.aserialize(repository, rows)))
+            items = await paginator.apaginate(repository, request)
+        except ValueError as e:
+            return _json({"detail": str(e)}, status=400)
+
+        # Serialisation needs no queries: relations are pk-only or prefetched.
+        serializer = viewset.serializer_class(items, many=True)
+        return _json(paginator.get_response_data(serializer.data))
+
+    return await _conditional(request, repository.read_tables(), respond)
+
+
+@require_GET
+async def resource_detail(request, pk, viewset):
+    repository = getattr(UnitOfWork(), viewset.repository_name)
+    # Routed for single-column keys only (realty/urls.py).
+    try:
+        pk = repository.model._meta.pk.to_python(pk)
+    except ValidationError:
+        return _json({"detail": "Not found."}, status=404)
+
+    async def respond():
+        item = await repository.aget_by_id(pk)
+        if item is None:
+            return _json({"detail": "Not found."}, status=404)
+        return _json(viewset.serializer_class(item).data)
+
+    return await _conditional(request, repository.read_tables(), respond)
@@ -0,0 +1,108 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import AuthUser
+
+
+class TokenCache:
+    """
+    Recently validated tokens: an LRU bounded by `size` whose entries expire
+    after `ttl` seconds. Private to the process, so a token revoked through
+    another process (or by a queryset.update() that sends no signals) stays
+    valid here for at most `ttl`.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires < time.monotonic():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return user, token
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._evict(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.size:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1].pk]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._evict(key)
+
+    def invalidate_user(self, user_pk):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_pk, ())):
+                self._evict(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+
+token_cache = TokenCache(
+    getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10_000),
+    getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication without the token + user SELECT for a cached token."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            cached = user, token
+        # Each request gets its own instance: views may modify request.user.
+        user, token = cached
+        return copy.copy(user), token
+
+
+@receiver(post_delete, sender=Token, dispatch_uid='realty.token_cache.token_deleted')
+def _token_deleted(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+# realty.models.AuthUser is an unmanaged model over the same auth_user table;
+# its queryset updates are covered by AuthUserRepository._written().
+@receiver(post_save, sender=get_user_model(), dispatch_uid='realty.token_cache.user_saved')
+@receiver(post_delete, sender=get_user_model(), dispatch_uid='realty.token_cache.user_deleted')
+@receiver(post_save, sender=AuthUser, dispatch_uid='realty.token_cache.auth_user_saved')
+@receiver(post_delete, sender=AuthUser, dispatch_uid='realty.token_cache.auth_user_deleted')
+def _user_changed(sender, instance, **kwargs):
+    # Deactivation, permission changes, deletion: the cached user is stale.
+    token_cache.invalidate_user(instance.pk)
@@ -0,0 +1,55 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .query_cache import table_versions
+
+# Conditional GET from the table version stamps in realty/query_cache.py:
+# a response only changes when one of the tables it reads is written, so the
+# stamps are its validators and a matching If-None-Match or If-Modified-Since
+# is answered with 304 before any query runs.
+
+
+def validators(tables, variant=()) -> tuple:
+    # `variant`: everything else the body depends on (path and query string,
+    # negotiated media type).
+    versions = table_versions(*tables)
+    digest = hashlib.md5(repr((sorted(tables), versions, variant)).encode(), usedforsecurity=False).hexdigest()
+    # Stamps are time_ns() of the last committed write, or of the stamp's
+    # re-initialisation after eviction or TABLE_VERSION_TTL. Last-Modified has
+    # whole seconds: until the newest stamp's second is over, another write
+    # could land in it without changing the date and If-Modified-Since would
+    # get a 304 for stale data, so only the ETag is sent.
+    last_modified = max(versions) // 1_000_000_000 if versions else None
+    if last_modified is not None and last_modified >= time.time_ns() // 1_000_000_000:
+        last_modified = None
+    return f'W/"{digest}"', last_modified
+
+
+def _finish(request, response, etag, last_modified):
+    if request.method in ('GET', 'HEAD') and response.status_code == 200:
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
+
+
+def conditional_response(request, tables, respond, variant=()):
+    """Returns 304 for a fresh client copy, otherwise respond() with validators."""
+    etag, last_modified = validators(tables, variant)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+    return _finish(request, respond(), etag, last_modified)
+
+
+async def aconditional_response(request, tables, respond, variant=()):
+    # conditional_response() for an async `respond`.
+    etag, last_modified = await sync_to_async(validators)(tables, variant)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+    return _finish(request, await respond(), etag, last_modified)
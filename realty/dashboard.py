@@ -0,0 +1,200 @@
+from functools import lru_cache
+
+import pandas as pd
+from django.conf import settings
+from django.shortcuts import render
+from math import pi
+from bokeh.plotting import figure
+from bokeh.embed import components
+from bokeh.models import ColumnDataSource, HoverTool
+from bokeh.palettes import Spectral6, Magma256, Viridis256
+from bokeh.transform import cumsum, factor_cmap
+from bokeh.resources import CDN, INLINE, Resources
+from .analytics import bundle_tables, collect_bundle
+from .query_cache import get_or_compute
+from .repositories import UnitOfWork
+
+
+@lru_cache(maxsize=None)
+def render_resources(mode: str) -> str:
+    # 'inline' embeds the whole BokehJS bundle (megabytes) in every page;
+    # 'cdn' and 'static' emit <script src> tags the browser caches.
+    if mode == 'cdn':
+        return CDN.render()
+    if mode == 'static':
+        # Served by staticfiles from the 'bokeh/static' prefix in STATICFILES_DIRS.
+        return Resources(mode='server', root_url=f"{settings.STATIC_URL}bokeh/").render()
+    return INLINE.render()
+
+
+def analytics_dashboard_bokeh(request):
+    uow = UnitOfWork()
+
+    try:
+        top_cities_filter = int(request.GET.get('top_cities', 20))
+        min_rooms_filter = int(request.GET.get('min_rooms', 0))
+    except ValueError:
+        top_cities_filter = 20
+        min_rooms_filter = 0
+
+    # The rendered figures are cached per filter combination and keyed on the
+    # versions of every table the dashboard reads, so writes invalidate them.
+    script, divs = get_or_compute(
+        'dashboard.bokeh',
+        bundle_tables(uow),
+        (top_cities_filter, min_rooms_filter),
+        lambda: build_components(uow, top_cities_filter, min_rooms_filter),
+        getattr(settings, 'BOKEH_DASHBOARD_CACHE_TIMEOUT', None),
+    )
+
+    return render(request, "dashboard_bokeh.html", {
+        'script': script,
+        'divs': divs,
+        'resources': render_resources(getattr(settings, 'BOKEH_RESOURCES', 'inline')),
+        'current_filters': {
+            'top_cities': top_cities_filter,
+            'min_rooms': min_rooms_filter
+        }
+    })
+
+
+def build_components(uow, top_cities_filter, min_rooms_filter):
+    def safe_dataframe(data, float_cols=None, str_cols=None):
+        df = pd.DataFrame(list(data))
+
+        if df.empty:
+            all_cols = (float_cols or []) + (str_cols or [])
+            return pd.DataFrame({c: [] for c in all_cols})
+
+        if float_cols:
+            for col in float_cols:
+                if col in df.columns:
+                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(float)
+
+        if str_cols:
+            for col in str_cols:
+                if col in df.columns:
+                    df[col] = df[col].astype(str).fillna("")
+
+        from decimal import Decimal
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].apply(lambda x: float(x) if isinstance(x, Decimal) else x)
+
+        return df
+
+    # Grouping, filtering and top-N cuts run in SQL; only plotted rows come back.
+    data = collect_bundle(uow, filters={
+        'hot_settlements': {'by_name': True, 'limit': max(top_cities_filter, 0)},
+        'market_analysis': {'by_name': True},
+        'stats_by_rooms': {'min_rooms': min_rooms_filter},
+        'top_employees': {'limit': 10},
+        'whale_owners': {'limit': 5},
+    })
+
+    df_rev = safe_dataframe(
+        data['monthly_revenue'],
+        float_cols=['total_revenue']
+    )
+
+    if not df_rev.empty and 'month' in df_rev.columns:
+        df_rev['month'] = pd.to_datetime(df_rev['month'])
+
+    df_hot = safe_dataframe(
+        data['hot_settlements'],
+        float_cols=['number_of_estates'],
+        str_cols=['name']
+    )
+
+    df_mkt = safe_dataframe(
+        data['market_analysis'],
+        float_cols=['avg_house_price', 'avg_apartment_price'],
+        str_cols=['name']
+    )
+
+    df_rooms = safe_dataframe(
+        data['stats_by_rooms'],
+        float_cols=['avg_price', 'rooms']
+    )
+
+    df_emp = safe_dataframe(
+        data['top_employees'],
+        float_cols=['total_sales_volume'],
+        str_cols=['surname']
+    )
+
+    df_whale = safe_dataframe(
+        data['whale_owners'],
+        float_cols=['total_assets'],
+        str_cols=['surname']
+    )
+
+    source_rev = ColumnDataSource(df_rev)
+    p1 = figure(title="Monthly Revenue Trend", x_axis_type="datetime", height=350, sizing_mode="stretch_width")
+    if not df_rev.empty:
+        p1.line(x='month', y='total_revenue', source=source_rev, line_width=3, color="green", legend_label="Revenue")
+        p1.scatter(x='month', y='total_revenue', source=source_rev, size=8, color="green")
+        p1.add_tools(HoverTool(tooltips=[("Date", "@month{%F}"), ("Revenue", "$@total_revenue{0.00 a}")],
+                               formatters={'@month': 'datetime'}))
+
+    source_hot = ColumnDataSource(df_hot)
+    cities = df_hot['name'].tolist()
+    p2 = figure(x_range=cities, title=f"Most Active Markets (Top {top_cities_filter})", height=350,
+                sizing_mode="stretch_width")
+    if not df_hot.empty:
+        palette = Magma256[:len(cities)] if len(cities) <= 256 else Magma256
+        p2.vbar(x='name', top='number_of_estates', width=0.8, source=source_hot,
+                line_color='white', fill_color=factor_cmap('name', palette=palette, factors=cities))
+    p2.xaxis.major_label_orientation = 1.2
+
+    source_rooms = ColumnDataSource(df_rooms)
+    p3 = figure(title="Price vs Rooms Correlation", height=350, sizing_mode="stretch_width")
+    if not df_rooms.empty:
+        p3.scatter(x='rooms', y='avg_price', size=15, source=source_rooms, color="navy", alpha=0.6)
+        p3.add_tools(HoverTool(tooltips=[("Rooms", "@rooms"), ("Avg Price", "$@avg_price{0.00 a}")]))
+    p3.xaxis.axis_label = "Number of Rooms"
+    p3.yaxis.axis_label = "Average Price"
+
+    df_emp_sorted = df_emp.sort_values('total_sales_volume', ascending=True)
+    source_emp = ColumnDataSource(df_emp_sorted)
+    employees = df_emp_sorted['surname'].tolist()
+    p4 = figure(y_range=employees, title="Top Agents", height=350, sizing_mode="stretch_width")
+    if not df_emp.empty:
+        p4.hbar(y='surname', right='total_sales_volume', height=0.8, source=source_emp, color="#8B5CF6")
+        p4.add_tools(HoverTool(tooltips=[("Agent", "@surname"), ("Sales", "$@total_sales_volume{0.00 a}")]))
+
+    source_mkt = ColumnDataSource(df_mkt)
+    mkt_cities = df_mkt['name'].tolist()
+    p5 = figure(x_range=mkt_cities, title="House (Blue) vs Apt (Red) Prices", height=350, sizing_mode="stretch_width")
+    if not df_mkt.empty:
+        p5.vbar(x='name', top='avg_house_price', width=0.4, source=source_mkt, color="blue", legend_label="House")
+        p5.scatter(x='name', y='avg_apartment_price', size=10, source=source_mkt, color="red", legend_label="Apartment")
+        p5.add_tools(
+            HoverTool(tooltips=[("City", "@name"), ("House", "$@avg_house_price"), ("Apt", "$@avg_apartment_price")]))
+    p5.xaxis.major_label_orientation = 1.2
+
+    if not df_whale.empty and df_whale['total_assets'].sum() > 0:
+        df_whale['angle'] = df_whale['total_assets'] / df_whale['total_assets'].sum() * 2 * pi
+        count = len(df_whale)
+        if count <= 6:
+            df_whale['color'] = Spectral6[:count]
+        else:
+            df_whale['color'] = Magma256[:count] if count <= 256 else Magma256[:256]
+    else:
+        df_whale['angle'] = []
+        df_whale['color'] = []
+
+    source_whale = ColumnDataSource(df_whale)
+    p6 = figure(title="Top 20 Whale Owners", height=350, sizing_mode="stretch_width",
+                tooltips="@surname: @total_assets{0.00 a}")
+    if not df_whale.empty:
+        p6.wedge(x=0, y=1, radius=0.4, start_angle=cumsum('angle', include_zero=True), end_angle=cumsum('angle'),
+                 line_color="white", fill_color='color', legend_field='surname', source=source_whale)
+    p6.axis.axis_label = None
+    p6.axis.visible = False
+    p6.grid.grid_line_color = None
+
+    return components({
+        'revenue': p1, 'hot': p2, 'rooms': p3,
+        'employees': p4, 'market': p5, 'whale': p6
+    })
@@ -0,0 +1,179 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import OperationalError, close_old_connections
+from django.http import JsonResponse
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounds how many threads use a database connection at once. Request
+    handlers (ConnectionPoolMiddleware), the analytics bundle pool and the
+    benchmark threads all check out from the same pool, so together they
+    never hold more than `size` connections busy.
+
+    Connections themselves stay per thread, as Django keeps them: with
+    CONN_MAX_AGE > 0 a thread reuses its connection across checkouts.
+    """
+
+    def __init__(self, size: int, timeout: float | None = None):
+        self.size = size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self._lock:
+            self._peak = self._in_use
+            self._checkouts = 0
+            self._waited = 0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+            self._timeouts = 0
+            self._rejected = 0
+
+    def _checked_out(self, waited: float):
+        with self._lock:
+            self._in_use += 1
+            self._peak = max(self._peak, self._in_use)
+            self._checkouts += 1
+            if waited > 0:
+                self._waited += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def acquire(self, timeout: float | None = None):
+        timeout = self.timeout if timeout is None else timeout
+        if self._slots.acquire(blocking=False):
+            self._checked_out(0.0)
+            return
+
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(f"No database connection free within {timeout}s (pool size {self.size}).")
+        self._checked_out(time.perf_counter() - started)
+
+    def try_acquire(self) -> bool:
+        if self._slots.acquire(blocking=False):
+            self._checked_out(0.0)
+            return True
+        with self._lock:
+            self._rejected += 1
+        return False
+
+    def release(self):
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None, acquired=False):
+        # `acquired`: the slot was taken by another thread on our behalf.
+        if not acquired:
+            self.acquire(timeout)
+        close_old_connections()
+        try:
+            yield
+        finally:
+            # Closes only connections past CONN_MAX_AGE or broken ones.
+            close_old_connections()
+            self.release()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'peak_in_use': self._peak,
+                'saturation': round(self._in_use / self.size, 4),
+                'peak_saturation': round(self._peak / self.size, 4),
+                'checkouts': self._checkouts,
+                'waited': self._waited,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+                'timeouts': self._timeouts,
+                'rejected': self._rejected,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                getattr(settings, 'DB_POOL_SIZE', 20),
+                getattr(settings, 'DB_POOL_TIMEOUT', None),
+            )
+        return _pool
+
+
+class ConnectionPoolMiddleware:
+    """Holds a pool slot for the whole request, including streamed bodies."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        pool = get_pool()
+        try:
+            pool.acquire()
+        except PoolTimeout as e:
+            return self._busy(e)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            pool.release()
+            raise
+        return self._release_after(response, pool)
+
+    async def __acall__(self, request):
+        pool = get_pool()
+        # Waiting for a slot must not block the event loop.
+        try:
+            await sync_to_async(pool.acquire, thread_sensitive=False)()
+        except PoolTimeout as e:
+            return self._busy(e)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            pool.release()
+            raise
+        return self._release_after(response, pool)
+
+    @staticmethod
+    def _busy(error):
+        response = JsonResponse({"detail": str(error)}, status=503)
+        response['Retry-After'] = '1'
+        return response
+
+    @staticmethod
+    def _release_after(response, pool):
+        if response.streaming:
+            # Streamed rows are read from the database after the view returns.
+            response._resource_closers.append(pool.release)
+        else:
+            pool.release()
+        return response
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from .analytics import finite_decimal, parse_params
+from .models import Apartment, Estate, House, Office
+
+KINDS = ('apartment', 'house', 'office')
+TABLES = tuple(model._meta.db_table for model in (Estate, Apartment, House, Office))
+
+
+def _kind(value):
+    if value not in KINDS:
+        raise ValueError(f"must be one of {', '.join(KINDS)}")
+    return value
+
+
+# Query parameter -> parser for GET /api/estates/listings/.
+LISTING_FILTERS = {
+    'settlement': int,
+    'transaction_type': str,
+    'status': str,
+    'min_price': finite_decimal,
+    'max_price': finite_decimal,
+    'kind': _kind,
+    'min_rooms': int,
+    'max_rooms': int,
+    'min_area': finite_decimal,
+    'max_area': finite_decimal,
+}
+
+# Filter shapes buyers use most, checked by `manage.py explain_listings`.
+# sql/listing_indexes.sql has the composite indexes meant to serve them.
+FILTER_SHAPES = {
+    'settlement': {'settlement': 1},
+    'settlement+type+status': {'settlement': 1, 'transaction_type': 'sale', 'status': 'active'},
+    'type+status': {'transaction_type': 'sale', 'status': 'active'},
+    'type+status+price': {
+        'transaction_type': 'sale', 'status': 'active', 'min_price': Decimal(50_000), 'max_price': Decimal(150_000),
+    },
+    'apartment rooms+area': {'kind': 'apartment', 'min_rooms': 2, 'max_rooms': 3, 'min_area': Decimal(40)},
+    'house rooms': {'kind': 'house', 'min_rooms': 4},
+    'office area': {'kind': 'office', 'min_area': Decimal(100)},
+    'rooms, any kind': {'min_rooms': 3},
+}
+
+
+def parse_listing_filters(params) -> dict:
+    return parse_params(LISTING_FILTERS, params)
@@ -0,0 +1,75 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from realty.listings import FILTER_SHAPES
+from realty.pagination import KeysetPagination
+from realty.repositories import UnitOfWork
+from realty.serialisers import EstateSerializer, values_serializer
+
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def _mysql_scans(node) -> list:
+    scans = []
+    if isinstance(node, dict):
+        if node.get('access_type') == 'ALL':
+            scans.append(node.get('table_name'))
+        for value in node.values():
+            scans += _mysql_scans(value)
+    elif isinstance(node, list):
+        for value in node:
+            scans += _mysql_scans(value)
+    return scans
+
+
+def full_scans(plan: str) -> list:
+    """Tables the plan reads in full, for the current database vendor."""
+    if connection.vendor == 'mysql':
+        return _mysql_scans(json.loads(plan))
+    if connection.vendor == 'postgresql':
+        return POSTGRES_SCAN.findall(plan)
+    if connection.vendor == 'sqlite':
+        return [table for table in SQLITE_SCAN.findall(plan) if table != 'CONSTANT']
+    return []
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the first page of each common estate listing filter shape and flag full table scans. "
+        "sql/listing_indexes.sql holds the indexes meant to avoid them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shape', action='append', choices=list(FILTER_SHAPES),
+                            help="Only this shape; repeatable.")
+        parser.add_argument('--fail-on-full-scan', action='store_true')
+
+    def handle(self, *args, **options):
+        repository = UnitOfWork().estates
+        reader = values_serializer(EstateSerializer)
+        explain_options = {'format': 'json'} if connection.vendor == 'mysql' else {}
+
+        flagged = []
+        for name in options['shape'] or FILTER_SHAPES:
+            where = repository.listing_conditions(**FILTER_SHAPES[name])
+            queryset = repository.values_page_queryset(
+                reader.columns, limit=KeysetPagination.page_size + 1, where=where
+            )
+            plan = queryset.explain(**explain_options)
+            scans = full_scans(plan)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for line in plan.splitlines():
+                self.stdout.write(f"  {line}")
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f"  full scan: {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS("  no full table scans"))
+
+        if flagged and options['fail_on_full_scan']:
+            raise CommandError(f"Full table scans in: {', '.join(flagged)}.")
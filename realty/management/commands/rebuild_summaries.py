@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from realty.models import Apartment, Contract, Estate, House, Settlement
+from realty.query_cache import invalidate_tables
+from realty.summaries import ALL_SUMMARIES
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized summary tables from the fact tables."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for summary in ALL_SUMMARIES:
+                rows = summary.rebuild()
+                self.stdout.write(f"{summary.model._meta.db_table}: {rows} rows")
+
+        # Cached analytics may have been computed from drifted summaries.
+        invalidate_tables(*(model._meta.db_table for model in (Apartment, Contract, Estate, House, Settlement)))
+        self.stdout.write(self.style.SUCCESS("Summaries rebuilt."))
@@ -0,0 +1,197 @@
+import inspect
+import threading
+import time
+from functools import wraps
+
+from django.db.models import QuerySet
+
+from .db_pool import get_pool
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# ConnectionPool.metrics() key -> (Prometheus type, help).
+POOL_METRICS = {
+    'size': ('gauge', 'Connection pool slots.'),
+    'in_use': ('gauge', 'Connection pool slots checked out.'),
+    'peak_in_use': ('gauge', 'Most connection pool slots checked out at once.'),
+    'saturation': ('gauge', 'Share of connection pool slots checked out.'),
+    'peak_saturation': ('gauge', 'Peak share of connection pool slots checked out.'),
+    'checkouts': ('counter', 'Connection pool checkouts.'),
+    'waited': ('counter', 'Checkouts that waited for a free slot.'),
+    'wait_seconds_total': ('counter', 'Time spent waiting for a free slot.'),
+    'wait_seconds_max': ('gauge', 'Longest wait for a free slot.'),
+    'timeouts': ('counter', 'Checkouts that timed out.'),
+    'rejected': ('counter', 'Non-blocking checkouts refused.'),
+}
+
+
+class MethodStats:
+    __slots__ = ('calls', 'errors', 'rows', 'duration', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.duration = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+
+class RepositoryMetrics:
+    """Call counts, latency histograms and rows returned per repository method."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def observe(self, repository: str, method: str, duration: float, rows=None, failed=False):
+        index = next((i for i, bound in enumerate(BUCKETS) if duration <= bound), len(BUCKETS))
+        with self._lock:
+            stats = self._stats.get((repository, method))
+            if stats is None:
+                stats = self._stats[(repository, method)] = MethodStats()
+            stats.calls += 1
+            stats.errors += failed
+            stats.rows += rows or 0
+            stats.duration += duration
+            stats.buckets[index] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                key: (stats.calls, stats.errors, stats.rows, stats.duration, list(stats.buckets))
+                for key, stats in sorted(self._stats.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+repository_metrics = RepositoryMetrics()
+
+
+def _rows(result):
+    # Lazy querysets are not evaluated to be counted.
+    if result is None or isinstance(result, QuerySet):
+        return None
+    if isinstance(result, (bool, int)):
+        # Bulk writes and deletes return rows affected or a flag.
+        return int(result)
+    if isinstance(result, (list, tuple, dict, set)):
+        return len(result)
+    return 1
+
+
+def _timed_iterator(iterator, observe, started):
+    rows = 0
+    try:
+        for row in iterator:
+            rows += 1
+            yield row
+    except BaseException:
+        observe(time.perf_counter() - started, rows, True)
+        raise
+    observe(time.perf_counter() - started, rows)
+
+
+async def _timed_aiterator(iterator, observe, started):
+    rows = 0
+    try:
+        async for row in iterator:
+            rows += 1
+            yield row
+    except BaseException:
+        observe(time.perf_counter() - started, rows, True)
+        raise
+    observe(time.perf_counter() - started, rows)
+
+
+def _instrumented(repository: str, name: str, method):
+    def observe(duration, rows=None, failed=False):
+        repository_metrics.observe(repository, name, duration, rows, failed)
+
+    if inspect.iscoroutinefunction(method):
+        @wraps(method)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await method(*args, **kwargs)
+            except BaseException:
+                observe(time.perf_counter() - started, failed=True)
+                raise
+            observe(time.perf_counter() - started, _rows(result))
+            return result
+        return timed
+
+    @wraps(method)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except BaseException:
+            observe(time.perf_counter() - started, failed=True)
+            raise
+        # Iterators run their queries as they are consumed: timed until exhausted.
+        if hasattr(result, '__anext__'):
+            return _timed_aiterator(result, observe, started)
+        if hasattr(result, '__next__'):
+            return _timed_iterator(result, observe, started)
+        observe(time.perf_counter() - started, _rows(result))
+        return result
+    return timed
+
+
+def instrument(cls, exclude=()):
+    """Wraps every public method of a repository class, inherited ones included."""
+    for name, attribute in inspect.getmembers(cls, inspect.isfunction):
+        if name.startswith('_') or name in exclude:
+            continue
+        setattr(cls, name, _instrumented(cls.__name__, name, attribute))
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+def _bound(value) -> str:
+    return f"{value:g}"
+
+
+def render_prometheus() -> str:
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    snapshot = repository_metrics.snapshot()
+    for name, position, help_text in (
+        ('realty_repository_calls_total', 0, 'Repository method calls.'),
+        ('realty_repository_errors_total', 1, 'Repository method calls that raised.'),
+        ('realty_repository_rows_total', 2, 'Rows returned or affected by repository methods.'),
+    ):
+        family(name, 'counter', help_text)
+        for (repository, method), values in snapshot.items():
+            lines.append(f"{name}{_labels(repository=repository, method=method)} {values[position]}")
+
+    name = 'realty_repository_duration_seconds'
+    family(name, 'histogram', 'Repository method latency.')
+    for (repository, method), (calls, _, _, duration, buckets) in snapshot.items():
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), buckets):
+            cumulative += count
+            le = bound if bound == '+Inf' else _bound(bound)
+            lines.append(f"{name}_bucket{_labels(repository=repository, method=method, le=le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(repository=repository, method=method)} {duration:.6f}")
+        lines.append(f"{name}_count{_labels(repository=repository, method=method)} {calls}")
+
+    for key, value in get_pool().metrics().items():
+        kind, help_text = POOL_METRICS.get(key, ('gauge', key))
+        name = f"realty_db_pool_{key}"
+        if kind == 'counter' and not name.endswith('_total'):
+            name += '_total'
+        family(name, kind, help_text)
+        lines.append(f"{name} {value}")
+
+    return '\n'.join(lines) + '\n'
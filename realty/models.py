@@ -366,4 +366,49 @@ class Settlement(models.Model):
 
     class Meta:
         managed = False
-        db_table = 'settlement'
\ No newline at end of file
+        db_table = 'settlement'
+
+class MonthlyRevenueSummary(models.Model):
+    month = models.DateField(primary_key=True)
+    total_revenue = models.DecimalField(max_digits=20, decimal_places=2)
+    total_deals = models.IntegerField()
+
+    def __str__(self):
+        return f"Revenue {self.month:%Y-%m}: {self.total_revenue}"
+
+    class Meta:
+        managed = False
+        db_table = 'summary_monthly_revenue'
+
+
+class PriceMatrixSummary(models.Model):
+    pk = models.CompositePrimaryKey('settlement_id', 'transaction_type')
+    settlement = models.ForeignKey(Settlement, models.DO_NOTHING, related_name='price_matrix_summaries')
+    transaction_type = models.CharField(max_length=50)
+    price_sum = models.DecimalField(max_digits=20, decimal_places=2)
+    priced_count = models.IntegerField()
+    max_price = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True)
+    inventory_count = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.settlement_id}/{self.transaction_type}: {self.inventory_count} estates"
+
+    class Meta:
+        managed = False
+        db_table = 'summary_price_matrix'
+
+
+class SettlementStatsSummary(models.Model):
+    settlement = models.OneToOneField(Settlement, models.DO_NOTHING, primary_key=True, related_name='stats_summary')
+    number_of_estates = models.IntegerField()
+    house_price_sum = models.DecimalField(max_digits=20, decimal_places=2)
+    house_priced_count = models.IntegerField()
+    apartment_price_sum = models.DecimalField(max_digits=20, decimal_places=2)
+    apartment_priced_count = models.IntegerField()
+
+    def __str__(self):
+        return f"Stats for settlement {self.settlement_id}"
+
+    class Meta:
+        managed = False
+        db_table = 'summary_settlement_stats'
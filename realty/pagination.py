@@ -0,0 +1,128 @@
+import base64
+import json
+from functools import cached_property
+
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(obj) -> str:
+    return encode_cursor_values([getattr(obj, field.attname) for field in obj._meta.pk_fields])
+
+
+def encode_cursor_values(values) -> str:
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, model):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor.")
+
+    fields = model._meta.pk_fields
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError("Cursor does not match the primary key.")
+
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except Exception:
+        raise ValueError("Cursor does not match the primary key.")
+
+    return tuple(values) if len(values) > 1 else values[0]
+
+
+class KeysetPagination:
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, page_size=None, max_page_size=None):
+        if page_size is not None:
+            self.page_size = page_size
+        if max_page_size is not None:
+            self.max_page_size = max_page_size
+        self.request = None
+        self.next_cursor = None
+
+    # request.GET rather than query_params: the async views pass a plain HttpRequest.
+
+    def get_page_size(self, request) -> int:
+        raw = request.GET.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        size = int(raw)
+        if size < 1:
+            raise ValueError("page_size must be positive.")
+        return min(size, self.max_page_size)
+
+    def _bounds(self, repository, request):
+        self.request = request
+        cursor = request.GET.get(self.cursor_query_param)
+        after = decode_cursor(cursor, repository.model) if cursor else None
+        return after, self.get_page_size(request)
+
+    def _trim(self, items, limit, pk_index=None) -> list:
+        # One extra row is fetched to know whether a next page exists.
+        # `pk_index`: items are value tuples with the (single-column) pk there.
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            self.next_cursor = encode_cursor(last) if pk_index is None else encode_cursor_values([last[pk_index]])
+        return items
+
+    def paginate(self, repository, request) -> list:
+        after, limit = self._bounds(repository, request)
+        return self._trim(repository.get_page(after=after, limit=limit + 1), limit)
+
+    async def apaginate(self, repository, request) -> list:
+        after, limit = self._bounds(repository, request)
+        return self._trim(await repository.aget_page(after=after, limit=limit + 1), limit)
+
+    def lazy_page(self, repository, request, fetch=None) -> 'LazyPage':
+        # The cursor is validated now (ValueError), rows are fetched on first use.
+        after, limit = self._bounds(repository, request)
+        return LazyPage(self, fetch or repository.get_page, after, limit)
+
+    def paginate_values(self, repository, request, columns, pk_index, where=None) -> list:
+        after, limit = self._bounds(repository, request)
+        rows = repository.get_page_values(columns, after=after, limit=limit + 1, where=where)
+        return self._trim(rows, limit, pk_index)
+
+    async def apaginate_values(self, repository, request, columns, pk_index, where=None) -> list:
+        after, limit = self._bounds(repository, request)
+        rows = await repository.aget_page_values(columns, after=after, limit=limit + 1, where=where)
+        return self._trim(rows, limit, pk_index)
+
+    def get_next_link(self) -> str | None:
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_response_data(self, results) -> dict:
+        return {
+            'next': self.get_next_link(),
+            'results': results,
+        }
+
+
+class LazyPage:
+    """A page whose query only runs when a template reads it, e.g. inside a {% cache %} miss."""
+
+    def __init__(self, paginator, fetch, after, limit):
+        self.paginator = paginator
+        self.fetch = fetch
+        self.after = after
+        self.limit = limit
+
+    @cached_property
+    def items(self) -> list:
+        return self.paginator._trim(self.fetch(after=self.after, limit=self.limit + 1), self.limit)
+
+    @property
+    def next_link(self) -> str | None:
+        self.items
+        return self.paginator.get_next_link()
@@ -0,0 +1,144 @@
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Tags, Warning, register
+from django.db import transaction
+
+
+def get_query_cache():
+    return caches[getattr(settings, 'QUERY_CACHE_ALIAS', 'analytics')]
+
+
+def _version_key(table: str) -> str:
+    return f"table-version:{table}"
+
+
+# Backends private to each worker process: a write bumps its tables' stamps
+# only in the worker that made it.
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def _version_timeout():
+    # On a process-local backend stamps expire after TABLE_VERSION_TTL seconds
+    # and are re-initialised to "now": other workers then serve stale query
+    # results, ETags and pages for at most that long. Shared stamps never expire.
+    backend = settings.CACHES[getattr(settings, 'QUERY_CACHE_ALIAS', 'analytics')]['BACKEND']
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return getattr(settings, 'TABLE_VERSION_TTL', 60)
+    return None
+
+
+def table_versions(*tables: str) -> list:
+    # Every table has a version stamp. A missing stamp (first use, eviction,
+    # expiry) is initialised to "now", so entries keyed on an older stamp can
+    # never be served again.
+    cache = get_query_cache()
+    keys = [_version_key(table) for table in tables]
+    versions = cache.get_many(keys)
+
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=_version_timeout())
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def invalidate_tables(*tables: str) -> None:
+    def bump():
+        now = time.time_ns()
+        get_query_cache().set_many({_version_key(table): now for table in tables}, timeout=_version_timeout())
+
+    # Readers must not cache rows of a transaction that may still roll back.
+    transaction.on_commit(bump)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_versions(app_configs, **kwargs):
+    alias = getattr(settings, 'QUERY_CACHE_ALIAS', 'analytics')
+    if settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [Warning(
+        f"The '{alias}' cache is private to each process, so writes reach other workers' query "
+        f"cache, ETags and search index only when their table versions expire "
+        f"(TABLE_VERSION_TTL = {_version_timeout()}s).",
+        hint="Use a shared cache backend for it when running several worker processes.",
+        id='realty.W001',
+    )]
+
+
+def _query_key(name: str, tables, arguments) -> str:
+    digest = hashlib.md5(repr(arguments).encode(), usedforsecurity=False).hexdigest()
+    versions = '.'.join(str(v) for v in table_versions(*tables))
+    return f"query:{name}:{digest}:{versions}"
+
+
+def get_or_compute(name: str, tables, arguments, compute, timeout=None):
+    if not getattr(settings, 'QUERY_CACHE_ENABLED', True):
+        return compute()
+
+    key = _query_key(name, tables, arguments)
+    cache = get_query_cache()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if timeout is None:
+            cache.set(key, value)
+        else:
+            cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_compute(name: str, tables, arguments, compute, timeout=None):
+    # get_or_compute() for an async `compute`.
+    if not getattr(settings, 'QUERY_CACHE_ENABLED', True):
+        return await compute()
+
+    key = await sync_to_async(_query_key)(name, tables, arguments)
+    cache = get_query_cache()
+    value = await cache.aget(key)
+    if value is None:
+        value = await compute()
+        if timeout is None:
+            await cache.aset(key, value)
+        else:
+            await cache.aset(key, value, timeout)
+    return value
+
+
+def cached_query(*models, timeout=None):
+    tables = [model._meta.db_table for model in models]
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return get_or_compute(
+                f"{type(self).__name__}.{method.__name__}",
+                tables,
+                (args, sorted(kwargs.items())),
+                lambda: list(method(self, *args, **kwargs)),
+                timeout,
+            )
+
+        async def acall(self, *args, **kwargs):
+            # Same cache entry as the sync call; misses run on the async ORM.
+            async def compute():
+                return [row async for row in method(self, *args, **kwargs)]
+
+            return await aget_or_compute(
+                f"{type(self).__name__}.{method.__name__}",
+                tables,
+                (args, sorted(kwargs.items())),
+                compute,
+                timeout,
+            )
+
+        wrapper.cached_tables = tables
+        wrapper.acall = acall
+        return wrapper
+
+    return decorator
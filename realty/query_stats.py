@@ -0,0 +1,156 @@
+import heapq
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('realty.queries')
+
+_current = ContextVar('realty_query_stats', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """Queries run on behalf of one request: count, total time and the slowest few."""
+
+    def __init__(self, keep: int = 3):
+        self.keep = keep
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+        # Analytics bundle workers record into the request's stats too.
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, duration: float):
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            # Min-heap of (duration, sql): the root is the fastest one kept.
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, (duration, sql))
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (duration, sql))
+
+    def top(self) -> list:
+        return sorted(self.slowest, reverse=True)
+
+
+def _record(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created, dispatch_uid='realty.query_stats.install')
+def _install(sender, connection, **kwargs):
+    # Connections are per thread; the context variable finds the request,
+    # including from sync_to_async threads of async views.
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts and times the SQL each request runs (all database aliases), adds a
+    Server-Timing header, logs statements slower than SLOW_QUERY_MS to the
+    'realty.queries' logger and checks QUERY_BUDGETS: url name -> most
+    queries allowed. Over budget is logged, or raises QueryBudgetExceeded
+    when QUERY_BUDGETS_STRICT is set, as tests should.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, started = self._start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _current.set(None)
+            raise
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, started = self._start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _current.set(None)
+            raise
+        return self._finish(request, response, stats, started)
+
+    @staticmethod
+    def _start():
+        stats = QueryStats(getattr(settings, 'QUERY_STATS_SLOWEST', 3))
+        _current.set(stats)
+        return stats, time.perf_counter()
+
+    def _finish(self, request, response, stats, started):
+        elapsed = time.perf_counter() - started
+        if getattr(settings, 'QUERY_TIMING_HEADER', True):
+            timing = [
+                f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+                f'app;dur={elapsed * 1000:.1f}',
+            ]
+            if response.has_header('Server-Timing'):
+                timing.insert(0, response['Server-Timing'])
+            response['Server-Timing'] = ', '.join(timing)
+
+        if response.streaming:
+            # Streamed rows are queried while the body is sent; report them then.
+            response._resource_closers.append(lambda: self._report(request, stats, elapsed))
+        else:
+            self._report(request, stats, elapsed)
+        return response
+
+    @staticmethod
+    def _report(request, stats, elapsed):
+        _current.set(None)
+        match = request.resolver_match
+        view = match.view_name if match else None
+        details = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 3),
+            'request_ms': round(elapsed * 1000, 3),
+        }
+
+        threshold = getattr(settings, 'SLOW_QUERY_MS', 200) / 1000
+        for duration, sql in stats.top():
+            if duration < threshold:
+                break
+            logger.warning(
+                "Slow query (%.1f ms) in %s %s: %s", duration * 1000, request.method, request.path, sql,
+                extra={**details, 'duration_ms': round(duration * 1000, 3), 'sql': sql},
+            )
+        logger.debug("%s %s: %d queries, %.1f ms", request.method, request.path, stats.count,
+                     stats.duration * 1000, extra=details)
+
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+        if budget is not None and stats.count > budget:
+            message = f"{view} ran {stats.count} queries, budget is {budget}."
+            if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, extra={**details, 'budget': budget})
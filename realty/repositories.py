@@ -1,14 +1,24 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Generic, List, Type, TypeVar
+from contextlib import nullcontext
+from decimal import Decimal
+from typing import AsyncIterator, Generic, Iterator, List, Type, TypeVar
 
-from django.db.models import Count, Sum, Avg, Q, Max
-from django.db.models.functions import TruncMonth
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Sum, Avg, Q, Max, F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Substr, TruncMonth
 
 from .models import (
     Apartment, AuthGroup, AuthUser, Contact, Contract, Email, Estate, EstateEmployee,
-    EstateOwner, House, Office, Person, PersonRole, Phone, Role, Settlement,
+    EstateOwner, House, MonthlyRevenueSummary, Office, Person, PersonRole, Phone,
+    PriceMatrixSummary, Role, Settlement,
 )
-from django.db import models
+from django.db import models, transaction
+
+from . import metrics, search, summaries
+from .authentication import token_cache
+from .query_cache import cached_query, invalidate_tables
 
 T = TypeVar('T', bound=models.Model)
 
@@ -23,6 +33,26 @@ class AbstractRepository(ABC, Generic[T]):
     def get_all(self) -> List[T]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_page(self, after=None, limit: int = 50) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iterate(self, chunk_size: int = 2000) -> Iterator[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_page_values(self, columns, after=None, limit: int = 50, where=None) -> List[tuple]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iterate_values(self, columns, chunk_size: int = 2000) -> Iterator[tuple]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_related_ids(self, relation: str, obj_ids: list) -> dict:
+        raise NotImplementedError
+
     @abstractmethod
     def get_by_id(self, obj_id: int) -> T | None:
         raise NotImplementedError
@@ -36,45 +66,332 @@ class AbstractRepository(ABC, Generic[T]):
         raise NotImplementedError
 
     @abstractmethod
-    def delete(self, obj_id: int) -> None:
+    def update_fields(self, obj_id: int, **kwargs) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, obj_id: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def bulk_create(self, rows: List[dict], batch_size: int = 500) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def bulk_update(self, rows: List[dict], batch_size: int = 500) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def bulk_delete(self, obj_ids: list, batch_size: int = 500) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aget_all(self) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aget_page(self, after=None, limit: int = 50) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def aiterate(self, chunk_size: int = 2000) -> AsyncIterator[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aget_page_values(self, columns, after=None, limit: int = 50, where=None) -> List[tuple]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aget_related_ids(self, relation: str, obj_ids: list) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aget_by_id(self, obj_id: int) -> T | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def acreate(self, **kwargs) -> T:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aupdate(self, obj_id: int, **kwargs) -> T | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aupdate_fields(self, obj_id: int, **kwargs) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def adelete(self, obj_id: int) -> bool:
         raise NotImplementedError
 
 
 class DjangoORMRepository(AbstractRepository[T]):
+    # Read query plan used by get_all/get_page/iterate/get_by_id.
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+    deferred_fields: tuple = ()
+    # Materialized summaries (realty/summaries.py) fed by this table.
+    summaries: tuple = ()
+    # Writes refresh the estate search index (realty/search.py).
+    search_indexed = False
+    # Public methods that build queries rather than run them; not timed.
+    metrics_exclude = ('values_page_queryset', 'read_tables', 'listing_conditions')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Each @cached_query analytics method gets an awaitable twin,
+        # e.g. hot_settlements() -> ahot_settlements().
+        for name, attribute in list(vars(cls).items()):
+            if hasattr(attribute, 'acall'):
+                setattr(cls, f"a{name}", attribute.acall)
+        # Decided at import: with metrics off the methods are not wrapped at all.
+        if getattr(settings, 'REPOSITORY_METRICS', False):
+            metrics.instrument(cls, cls.metrics_exclude)
+
+    def _read_queryset(self):
+        queryset = self.model.objects.all()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.deferred_fields:
+            queryset = queryset.defer(*self.deferred_fields)
+        return queryset
+
+    def read_tables(self) -> list:
+        # Tables behind _read_queryset(): the model and every related lookup.
+        tables = {self.model._meta.db_table}
+        for lookup in self.select_related + self.prefetch_related:
+            model = self.model
+            for part in getattr(lookup, 'prefetch_through', lookup).split('__'):
+                field = model._meta.get_field(part)
+                if field.many_to_many:
+                    through = getattr(field, 'through', None) or field.remote_field.through
+                    tables.add(through._meta.db_table)
+                model = field.related_model
+                tables.add(model._meta.db_table)
+        return sorted(tables)
+
     def get_all(self) -> List[T]:
-        return list(self.model.objects.all())
+        return list(self._read_queryset())
+
+    def get_page(self, after=None, limit: int = 50) -> List[T]:
+        # Keyset pagination: ordering by pk works for composite keys too,
+        # Django expands both the ORDER BY and the row comparison.
+        queryset = self._read_queryset().order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        return list(queryset[:limit])
+
+    def iterate(self, chunk_size: int = 2000) -> Iterator[T]:
+        return self._read_queryset().order_by('pk').iterator(chunk_size=chunk_size)
+
+    # Column tuples for ValuesSerializer (realty/serialisers.py): no model
+    # instances, and many-to-many ids come from the through table alone.
+
+    def values_page_queryset(self, columns, after=None, limit: int = 50, where=None):
+        # `where`: a Q the page is filtered by, keyset order is kept.
+        queryset = self.model.objects.order_by('pk')
+        if where is not None:
+            queryset = queryset.filter(where)
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        return queryset.values_list(*columns)[:limit]
+
+    def get_page_values(self, columns, after=None, limit: int = 50, where=None) -> List[tuple]:
+        return list(self.values_page_queryset(columns, after, limit, where))
+
+    def iterate_values(self, columns, chunk_size: int = 2000) -> Iterator[tuple]:
+        return self.model.objects.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size)
+
+    def _related_ids_queryset(self, relation, obj_ids):
+        field = self.model._meta.get_field(relation)
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+        return through.objects.filter(**{f"{source}__in": obj_ids}).order_by(source, target) \
+            .values_list(source, target)
+
+    def get_related_ids(self, relation: str, obj_ids: list) -> dict:
+        related = {}
+        for obj_id, related_id in self._related_ids_queryset(relation, obj_ids):
+            related.setdefault(obj_id, []).append(related_id)
+        return related
 
     def get_by_id(self, obj_id: int) -> T | None:
         try:
-            return self.model.objects.get(pk=obj_id)
+            return self._read_queryset().get(pk=obj_id)
         except self.model.DoesNotExist:
             return None
 
     def create(self, **kwargs) -> T:
-        obj = self.model.objects.create(**kwargs)
+        with self._write_scope():
+            # Subtype rows (Apartment, House) share the pk of an existing estate.
+            pk = self.model(**kwargs).pk if self._tracks_summaries() else None
+            before = self._snapshot([pk]) if pk is not None else None
+            obj = self.model.objects.create(**kwargs)
+            self._written(before, after_pks=[obj.pk])
         return obj
 
     def update(self, obj_id: int, **kwargs) -> T | None:
-        obj = self.get_by_id(obj_id)
+        obj = self.model.objects.filter(pk=obj_id).first()
         if obj:
-            for key, value in kwargs.items():
-                setattr(obj, key, value)
-            obj.save()
+            with self._write_scope():
+                before = self._snapshot([obj.pk])
+                for key, value in kwargs.items():
+                    setattr(obj, key, value)
+                obj.save(update_fields=[self.model._meta.get_field(key).name for key in kwargs] or None)
+                self._written(before, after_pks=[obj.pk])
             return obj
         return None
 
-    def delete(self, obj_id: int) -> None:
-        obj = self.get_by_id(obj_id)
-        if obj:
-            obj.delete()
+    def update_fields(self, obj_id: int, **kwargs) -> bool:
+        # One UPDATE ... WHERE pk = %s with only the given columns; nothing is
+        # fetched, a missing row shows up as zero affected rows.
+        with self._write_scope():
+            before = self._snapshot([obj_id])
+            updated = self.model.objects.filter(pk=obj_id).update(**kwargs) if kwargs else \
+                int(self.model.objects.filter(pk=obj_id).exists())
+            if updated:
+                self._written(before, after_pks=[obj_id])
+        return bool(updated)
+
+    def delete(self, obj_id: int) -> bool:
+        with self._write_scope():
+            before = self._snapshot([obj_id])
+            deleted, _ = self.model.objects.filter(pk=obj_id).delete()
+            if deleted:
+                self._written(before, after_pks=[obj_id])
+        return bool(deleted)
+
+    def bulk_create(self, rows: List[dict], batch_size: int = 500) -> List[T]:
+        objs = [self.model(**row) for row in rows]
+        with transaction.atomic():
+            before = self._snapshot([obj.pk for obj in objs if obj.pk is not None])
+            created = self.model.objects.bulk_create(objs, batch_size=batch_size)
+            self._written(before, after_pks=[obj.pk for obj in created])
+        return created
+
+    def bulk_update(self, rows: List[dict], batch_size: int = 500) -> int:
+        if not rows:
+            return 0
+
+        key_names = {f.name for f in self.model._meta.pk_fields} | {f.attname for f in self.model._meta.pk_fields}
+        # Rows are grouped by the columns they carry: an instance built from a
+        # row holds defaults for the rest, which must not be written back.
+        groups = {}
+        for row in rows:
+            obj = self.model(**row)
+            fields = tuple(sorted(set(row) - key_names - {'pk'}))
+            groups.setdefault(fields, []).append(obj)
+        pks = [obj.pk for objs in groups.values() for obj in objs]
+
+        with transaction.atomic():
+            before = self._snapshot(pks)
+            updated = sum(
+                self.model.objects.bulk_update(objs, fields, batch_size=batch_size)
+                for fields, objs in groups.items() if fields
+            )
+            self._written(before, after_pks=pks)
+        return updated
+
+    def bulk_delete(self, obj_ids: list, batch_size: int = 500) -> int:
+        deleted = 0
+        with transaction.atomic():
+            before = self._snapshot(obj_ids)
+            for start in range(0, len(obj_ids), batch_size):
+                count, _ = self.model.objects.filter(pk__in=obj_ids[start:start + batch_size]).delete()
+                deleted += count
+            self._written(before, after_pks=obj_ids)
+        return deleted
+
+    # Async reads use the async ORM. Writes stay synchronous underneath:
+    # transactions and summary maintenance need one connection on one thread.
+
+    async def aget_all(self) -> List[T]:
+        return [obj async for obj in self._read_queryset()]
+
+    async def aget_page(self, after=None, limit: int = 50) -> List[T]:
+        queryset = self._read_queryset().order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        return [obj async for obj in queryset[:limit]]
+
+    def aiterate(self, chunk_size: int = 2000) -> AsyncIterator[T]:
+        return self._read_queryset().order_by('pk').aiterator(chunk_size=chunk_size)
+
+    async def aget_page_values(self, columns, after=None, limit: int = 50, where=None) -> List[tuple]:
+        return [row async for row in self.values_page_queryset(columns, after, limit, where)]
+
+    async def aget_related_ids(self, relation: str, obj_ids: list) -> dict:
+        related = {}
+        async for obj_id, related_id in self._related_ids_queryset(relation, obj_ids):
+            related.setdefault(obj_id, []).append(related_id)
+        return related
+
+    async def aget_by_id(self, obj_id: int) -> T | None:
+        try:
+            return await self._read_queryset().aget(pk=obj_id)
+        except self.model.DoesNotExist:
+            return None
+
+    async def acreate(self, **kwargs) -> T:
+        return await sync_to_async(self.create)(**kwargs)
+
+    async def aupdate(self, obj_id: int, **kwargs) -> T | None:
+        return await sync_to_async(self.update)(obj_id, **kwargs)
+
+    async def aupdate_fields(self, obj_id: int, **kwargs) -> bool:
+        return await sync_to_async(self.update_fields)(obj_id, **kwargs)
+
+    async def adelete(self, obj_id: int) -> bool:
+        return await sync_to_async(self.delete)(obj_id)
+
+    def _tracks_summaries(self) -> bool:
+        return bool(self.summaries) and summaries.summaries_enabled()
+
+    def _write_scope(self):
+        # The fact row and its summary deltas are committed together.
+        return transaction.atomic() if self._tracks_summaries() else nullcontext()
+
+    def _snapshot(self, pks) -> dict:
+        if not self._tracks_summaries():
+            return {}
+        # Chunked so large bulk writes stay under the backend's parameter limit.
+        return {
+            summary: [row for start in range(0, len(pks), 1000) for row in summary.snapshot(pks[start:start + 1000])]
+            for summary in self.summaries
+        }
+
+    def _written(self, before=None, after_pks=()) -> None:
+        # Checked before the invalidation below: outside a transaction it
+        # bumps the table version at once.
+        index_current = self.search_indexed and search.is_current()
+        invalidate_tables(self.model._meta.db_table)
+        if self.search_indexed:
+            search.refresh(self.model, after_pks, index_current)
+        if self._tracks_summaries():
+            before = before or {}
+            for summary, after in self._snapshot(after_pks).items():
+                summary.apply(before.get(summary, []), after)
 
 
 class ApartmentRepository(DjangoORMRepository[Apartment]):
+    summaries = (summaries.settlement_stats,)
+
+    search_indexed = True
+
     def __init__(self):
         super().__init__(Apartment)
 
-    def stats_by_rooms(self):
-        return self.model.objects.values('rooms').annotate(
+    @cached_query(Apartment, Estate)
+    def stats_by_rooms(self, min_rooms=None):
+        queryset = self.model.objects.all()
+        if min_rooms is not None:
+            queryset = queryset.filter(rooms__gte=min_rooms)
+
+        return queryset.values('rooms').annotate(
             avg_price=Avg('estate__price'),
             max_price=Max('estate__price'),
             supply_count=Count('estate_id')
@@ -91,7 +408,16 @@ class AuthUserRepository(DjangoORMRepository[AuthUser]):
         super().__init__(AuthUser)
 
     def create(self, **kwargs) -> AuthUser:
-        return self.model.objects.create_user(**kwargs)
+        obj = self.model.objects.create_user(**kwargs)
+        self._written(after_pks=[obj.pk])
+        return obj
+
+    def _written(self, before=None, after_pks=()) -> None:
+        super()._written(before, after_pks)
+        # update_fields() and bulk_update() send no signals: drop the users'
+        # cached tokens here, once the change is visible to other requests.
+        pks = list(after_pks)
+        transaction.on_commit(lambda: [token_cache.invalidate_user(pk) for pk in pks])
 
 
 class ContactRepository(DjangoORMRepository[Contact]):
@@ -100,14 +426,35 @@ class ContactRepository(DjangoORMRepository[Contact]):
 
 
 class ContractRepository(DjangoORMRepository[Contract]):
+    summaries = (summaries.monthly_revenue,)
+    # Columns of the contract_list page; terms is cut in the database.
+    list_fields = ('contract_id', 'contract_type', 'date_signed', 'payment_amount')
+    terms_preview_length = 120
+
     def __init__(self):
         super().__init__(Contract)
 
+    def get_list_page(self, after=None, limit: int = 50) -> List[Contract]:
+        # One past the preview length, so the template can tell it was cut.
+        queryset = self.model.objects.only(*self.list_fields).annotate(
+            terms_preview=Substr('terms', 1, self.terms_preview_length + 1)
+        ).order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        return list(queryset[:limit])
+
+    @cached_query(Contract)
     def monthly_revenue_stream(self):
+        if summaries.summaries_enabled():
+            return MonthlyRevenueSummary.objects.values(
+                'month', 'total_revenue', 'total_deals'
+            ).order_by('month')
+
+        # Coalesced like the summary: a month of null payments has 0 revenue.
         return self.model.objects.annotate(
             month=TruncMonth('date_signed')
         ).values('month').annotate(
-            total_revenue=Sum('payment_amount'),
+            total_revenue=Coalesce(Sum('payment_amount'), Value(Decimal(0))),
             total_deals=Count('contract_id')
         ).order_by('month')
 
@@ -118,10 +465,67 @@ class EmailRepository(DjangoORMRepository[Email]):
 
 
 class EstateRepository(DjangoORMRepository[Estate]):
+    # EstateSerializer renders the owners/employees many-to-many ids, in pk
+    # order as get_related_ids() returns them.
+    prefetch_related = (
+        models.Prefetch('owners', queryset=Person.objects.order_by('pk')),
+        models.Prefetch('employees', queryset=Person.objects.order_by('pk')),
+    )
+    summaries = (summaries.price_matrix, summaries.settlement_stats)
+
+    search_indexed = True
+    # Subtype columns behind the listing filters (realty/listings.py).
+    rooms_lookups = {'apartment': 'apartment__rooms', 'house': 'house__rooms'}
+    area_lookups = {'apartment': 'apartment__area', 'house': 'house__land_area', 'office': 'office__area'}
+
     def __init__(self):
         super().__init__(Estate)
 
+    def listing_conditions(self, settlement=None, transaction_type=None, status=None, min_price=None,
+                           max_price=None, kind=None, min_rooms=None, max_rooms=None, min_area=None,
+                           max_area=None) -> Q:
+        where = Q()
+        for lookup, value in (
+            ('settlement_id', settlement), ('transaction_type', transaction_type), ('status', status),
+            ('price__gte', min_price), ('price__lte', max_price),
+        ):
+            if value is not None:
+                where &= Q(**{lookup: value})
+
+        rooms = {'gte': min_rooms, 'lte': max_rooms}
+        area = {'gte': min_area, 'lte': max_area}
+        wants_rooms = any(value is not None for value in rooms.values())
+        wants_area = any(value is not None for value in area.values())
+        if kind is None and not wants_rooms and not wants_area:
+            return where
+        if kind is not None and wants_rooms and kind not in self.rooms_lookups:
+            raise ValueError(f"Estates of kind '{kind}' have no rooms.")
+
+        # Without a kind, an estate matches if any subtype that has the
+        # filtered columns matches them all.
+        kinds = [kind] if kind else [k for k in self.area_lookups if not wants_rooms or k in self.rooms_lookups]
+        subtypes = Q()
+        for name in kinds:
+            condition = Q(**{f"{name}__isnull": False})
+            for lookups, bounds in ((self.rooms_lookups, rooms), (self.area_lookups, area)):
+                for operator, value in bounds.items():
+                    if value is not None:
+                        condition &= Q(**{f"{lookups[name]}__{operator}": value})
+            subtypes |= condition
+        return where & subtypes
+
+    @cached_query(Estate, Settlement)
     def get_price_matrix(self):
+        if summaries.summaries_enabled():
+            return PriceMatrixSummary.objects.values(
+                'settlement__name',
+                'transaction_type'
+            ).annotate(
+                avg_price=Cast(Sum('price_sum'), FloatField()) / NullIf(Sum('priced_count'), 0),
+                max_price=Max('max_price'),
+                inventory_count=Sum('inventory_count')
+            ).order_by('settlement__name')
+
         return self.model.objects.values(
             'settlement__name',
             'transaction_type'
@@ -143,6 +547,8 @@ class EstateOwnerRepository(DjangoORMRepository[EstateOwner]):
 
 
 class HouseRepository(DjangoORMRepository[House]):
+    summaries = (summaries.settlement_stats,)
+
     def __init__(self):
         super().__init__(House)
 
@@ -156,20 +562,26 @@ class PersonRepository(DjangoORMRepository[Person]):
     def __init__(self):
         super().__init__(Person)
 
-    def top_revenue_employees(self):
-        return self.model.objects.filter(
+    @cached_query(Person, Contract)
+    def top_revenue_employees(self, limit=None):
+        output = self.model.objects.filter(
             contract__isnull=False
         ).annotate(
             total_sales_volume=Sum('contract__payment_amount'),
             deals_closed=Count('contract')
         ).order_by('-total_sales_volume').values("surname", "total_sales_volume")
 
-    def top_owners(self, threshold=0):
-        return (self.model.objects
-                .annotate(total_assets=Sum("owned_estates__price"))
-                .filter(total_assets__gte=threshold)
-                .order_by("-total_assets")
-                .values("name", "surname", "total_assets"))
+        return output[:limit] if limit is not None else output
+
+    @cached_query(Person, EstateOwner, Estate)
+    def top_owners(self, threshold=0, limit=None):
+        output = (self.model.objects
+                  .annotate(total_assets=Sum("owned_estates__price"))
+                  .filter(total_assets__gte=threshold)
+                  .order_by("-total_assets")
+                  .values("name", "surname", "total_assets"))
+
+        return output[:limit] if limit is not None else output
 
 
 class PersonRoleRepository(DjangoORMRepository[PersonRole]):
@@ -188,21 +600,60 @@ class RoleRepository(DjangoORMRepository[Role]):
 
 
 class SettlementRepository(DjangoORMRepository[Settlement]):
+    search_indexed = True
+
     def __init__(self):
         super().__init__(Settlement)
 
-    def hot_settlements(self, threshold=1):
-        output = (Settlement.objects.annotate(
-            number_of_estates=Count("estate"))
+    @cached_query(Settlement, Estate)
+    def hot_settlements(self, threshold=1, limit=None, by_name=False):
+        # by_name merges same-named settlements with GROUP BY name instead of
+        # one row per settlement.
+        if summaries.summaries_enabled():
+            number_of_estates = Coalesce(F('stats_summary__number_of_estates'), 0)
+            if by_name:
+                number_of_estates = Coalesce(Sum('stats_summary__number_of_estates'), 0)
+        else:
+            number_of_estates = Count("estate")
+
+        queryset = self.model.objects.values("name") if by_name else self.model.objects
+        output = (queryset.annotate(number_of_estates=number_of_estates)
                   .filter(number_of_estates__gte=threshold)
                   .order_by("-number_of_estates")
                   .values("name", "number_of_estates"))
 
-        return output
-
-
-    def market_analysis(self):
-        return self.model.objects.annotate(
+        return output[:limit] if limit is not None else output
+
+
+    @cached_query(Settlement, Estate, House, Apartment)
+    def market_analysis(self, by_name=False):
+        queryset = self.model.objects.values('name') if by_name else self.model.objects
+
+        if summaries.summaries_enabled():
+            if by_name:
+                return queryset.annotate(
+                    avg_house_price=(
+                        Cast(Sum('stats_summary__house_price_sum'), FloatField())
+                        / NullIf(Sum('stats_summary__house_priced_count'), 0)
+                    ),
+                    avg_apartment_price=(
+                        Cast(Sum('stats_summary__apartment_price_sum'), FloatField())
+                        / NullIf(Sum('stats_summary__apartment_priced_count'), 0)
+                    )
+                ).values('name', 'avg_house_price', 'avg_apartment_price').order_by('name')
+
+            return queryset.annotate(
+                avg_house_price=(
+                    Cast('stats_summary__house_price_sum', FloatField())
+                    / NullIf('stats_summary__house_priced_count', 0)
+                ),
+                avg_apartment_price=(
+                    Cast('stats_summary__apartment_price_sum', FloatField())
+                    / NullIf('stats_summary__apartment_priced_count', 0)
+                )
+            ).values('name', 'avg_house_price', 'avg_apartment_price')
+
+        output = queryset.annotate(
             avg_house_price=Avg(
                 'estate__price',
                 filter=Q(estate__house__isnull=False)
@@ -213,22 +664,58 @@ class SettlementRepository(DjangoORMRepository[Settlement]):
             )
         ).values('name', 'avg_house_price', 'avg_apartment_price')
 
+        return output.order_by('name') if by_name else output
+
+
+class _SharedRepository:
+    # Repositories hold no per-request state: each is built on first access
+    # and then shared by every UnitOfWork in the process.
+    def __init__(self, repository_class):
+        self.repository_class = repository_class
+        self.instance = None
+        self.lock = threading.Lock()
+
+    def __get__(self, uow, owner=None):
+        if self.instance is None:
+            with self.lock:
+                if self.instance is None:
+                    self.instance = self.repository_class()
+        return self.instance
+
 
 class UnitOfWork:
+    """
+    Entry point to the repositories. Creating one is cheap; `with uow:` runs
+    the repository calls inside in one transaction, committed on exit and
+    rolled back if the block raises. Summary deltas of those writes are
+    applied inside the transaction; cache invalidation and search refreshes
+    wait until it commits.
+    """
+    apartments = _SharedRepository(ApartmentRepository)
+    auth_groups = _SharedRepository(AuthGroupRepository)
+    auth_users = _SharedRepository(AuthUserRepository)
+    contacts = _SharedRepository(ContactRepository)
+    contracts = _SharedRepository(ContractRepository)
+    emails = _SharedRepository(EmailRepository)
+    estates = _SharedRepository(EstateRepository)
+    estate_employees = _SharedRepository(EstateEmployeeRepository)
+    estate_owners = _SharedRepository(EstateOwnerRepository)
+    houses = _SharedRepository(HouseRepository)
+    offices = _SharedRepository(OfficeRepository)
+    people = _SharedRepository(PersonRepository)
+    person_roles = _SharedRepository(PersonRoleRepository)
+    phones = _SharedRepository(PhoneRepository)
+    roles = _SharedRepository(RoleRepository)
+    settlements = _SharedRepository(SettlementRepository)
+
     def __init__(self):
-        self.apartments = ApartmentRepository()
-        self.auth_groups = AuthGroupRepository()
-        self.auth_users = AuthUserRepository()
-        self.contacts = ContactRepository()
-        self.contracts = ContractRepository()
-        self.emails = EmailRepository()
-        self.estates = EstateRepository()
-        self.estate_employees = EstateEmployeeRepository()
-        self.estate_owners = EstateOwnerRepository()
-        self.houses = HouseRepository()
-        self.offices = OfficeRepository()
-        self.people = PersonRepository()
-        self.person_roles = PersonRoleRepository()
-        self.phones = PhoneRepository()
-        self.roles = RoleRepository()
-        self.settlements = SettlementRepository()
\ No newline at end of file
+        self._atomics = []
+
+    def __enter__(self):
+        atomic = transaction.atomic()
+        atomic.__enter__()
+        self._atomics.append(atomic)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._atomics.pop().__exit__(exc_type, exc_value, traceback)
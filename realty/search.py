@@ -0,0 +1,327 @@
+import bisect
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import Apartment, Estate, Settlement
+from .query_cache import table_versions
+
+TOKEN_RE = re.compile(r'\w+')
+FACETS = ('transaction_type', 'status', 'settlement_type', 'oblast')
+TABLES = (Estate._meta.db_table, Settlement._meta.db_table, Apartment._meta.db_table)
+
+
+def tokenize(*texts) -> set:
+    return {token for text in texts if text for token in TOKEN_RE.findall(str(text).casefold())}
+
+
+class EstateIndex:
+    """
+    In-process inverted index over estates: street, house and apartment
+    numbers and residential complex names, plus the settlement's name and
+    oblast. Settlement tokens are posted per settlement, so renaming one
+    touches a single entry instead of all its estates.
+
+    Every query token must match; the last one also matches as a prefix, for
+    search-as-you-type.
+    """
+    # Upper bounds of the price facet buckets; the last bucket is open.
+    price_bounds = (50_000, 100_000, 250_000, 500_000, 1_000_000)
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.docs = {}
+        self.settlements = {}
+        self.postings = {}
+        self.settlement_postings = {}
+        self.settlement_estates = {}
+        self._vocabulary = None
+        self.versions = None
+
+    # Building and maintenance
+
+    def build(self):
+        # Versions first: a write landing while the rows are read makes the
+        # index stale instead of being marked as seen.
+        versions = table_versions(*TABLES)
+        estates = Estate.objects.values_list(
+            'estate_id', 'settlement_id', 'street', 'house_number', 'apartment_number',
+            'transaction_type', 'status', 'price',
+        )
+        complexes = dict(Apartment.objects.exclude(residential_complex_name=None)
+                         .values_list('estate_id', 'residential_complex_name'))
+        settlements = Settlement.objects.values_list('settlement_id', 'name', 'oblast', 'settlement_type')
+
+        with self._lock:
+            self._reset()
+            for row in settlements:
+                self._add_settlement(*row)
+            for row in estates:
+                self._add_estate(*row, complexes.get(row[0]))
+            self.versions = versions
+
+    def _reset(self):
+        self.docs.clear()
+        self.settlements.clear()
+        self.postings.clear()
+        self.settlement_postings.clear()
+        self.settlement_estates.clear()
+        self._vocabulary = None
+
+    def _add_estate(self, estate_id, settlement_id, street, house_number, apartment_number,
+                    transaction_type, status, price, complex_name):
+        tokens = tokenize(street, house_number, apartment_number, complex_name)
+        self.docs[estate_id] = {
+            'estate_id': estate_id,
+            'settlement': settlement_id,
+            'street': street,
+            'house_number': house_number,
+            'apartment_number': apartment_number,
+            'residential_complex_name': complex_name,
+            'transaction_type': transaction_type,
+            'status': status,
+            'price': price,
+            'tokens': tokens,
+        }
+        for token in tokens:
+            self.postings.setdefault(token, set()).add(estate_id)
+        self.settlement_estates.setdefault(settlement_id, set()).add(estate_id)
+        self._vocabulary = None
+
+    def _remove_estate(self, estate_id):
+        doc = self.docs.pop(estate_id, None)
+        if doc is None:
+            return
+        for token in doc['tokens']:
+            self._discard(self.postings, token, estate_id)
+        self._discard(self.settlement_estates, doc['settlement'], estate_id)
+        self._vocabulary = None
+
+    def _add_settlement(self, settlement_id, name, oblast, settlement_type):
+        tokens = tokenize(name, oblast)
+        self.settlements[settlement_id] = {
+            'name': name, 'oblast': oblast, 'settlement_type': settlement_type, 'tokens': tokens,
+        }
+        for token in tokens:
+            self.settlement_postings.setdefault(token, set()).add(settlement_id)
+        self._vocabulary = None
+
+    def _remove_settlement(self, settlement_id):
+        settlement = self.settlements.pop(settlement_id, None)
+        if settlement is None:
+            return
+        for token in settlement['tokens']:
+            self._discard(self.settlement_postings, token, settlement_id)
+        self._vocabulary = None
+
+    @staticmethod
+    def _discard(postings, key, value):
+        values = postings.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del postings[key]
+
+    def refresh(self, model, pks, was_current):
+        # Re-reads the given rows; rows that no longer exist are dropped.
+        # `was_current`: the index had seen every write before this one. Only
+        # then is the written table's version advanced; otherwise writes of
+        # other processes are still missing and the next get_index() rebuilds.
+        pks = list(pks)
+        if model is Settlement:
+            rows = Settlement.objects.filter(pk__in=pks).values_list(
+                'settlement_id', 'name', 'oblast', 'settlement_type'
+            )
+            with self._lock:
+                for settlement_id in pks:
+                    self._remove_settlement(settlement_id)
+                for row in rows:
+                    self._add_settlement(*row)
+                self._advance(model, was_current)
+            return
+
+        # Apartments share their estate's pk.
+        estates = Estate.objects.filter(pk__in=pks).values_list(
+            'estate_id', 'settlement_id', 'street', 'house_number', 'apartment_number',
+            'transaction_type', 'status', 'price',
+        )
+        complexes = dict(Apartment.objects.filter(pk__in=pks).exclude(residential_complex_name=None)
+                         .values_list('estate_id', 'residential_complex_name'))
+        with self._lock:
+            for estate_id in pks:
+                self._remove_estate(estate_id)
+            for row in estates:
+                self._add_estate(*row, complexes.get(row[0]))
+            self._advance(model, was_current)
+
+    def _advance(self, model, was_current):
+        if not was_current or self.versions is None:
+            return
+        # The other tables keep their versions: a newer one there is a write
+        # this index has not seen.
+        table = model._meta.db_table
+        self.versions = [
+            version if name == table else known
+            for name, known, version in zip(TABLES, self.versions, table_versions(*TABLES))
+        ]
+
+    def is_current(self) -> bool:
+        # Writes made by other processes only show up as newer table versions.
+        return self.versions == table_versions(*TABLES)
+
+    # Querying
+
+    def _matches(self, token, prefix=False) -> set:
+        if not prefix:
+            tokens = [token]
+        else:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.postings.keys() | self.settlement_postings.keys())
+            start = bisect.bisect_left(self._vocabulary, token)
+            end = bisect.bisect_left(self._vocabulary, token + '\U0010ffff')
+            tokens = self._vocabulary[start:end]
+
+        estate_ids = set()
+        for candidate in tokens:
+            estate_ids |= self.postings.get(candidate, set())
+            for settlement_id in self.settlement_postings.get(candidate, ()):
+                estate_ids |= self.settlement_estates.get(settlement_id, set())
+        return estate_ids
+
+    def _price_bucket(self, price) -> int | None:
+        return None if price is None else bisect.bisect_right(self.price_bounds, price)
+
+    def search(self, q='', filters=None, min_price=None, max_price=None, limit=20, offset=0) -> dict:
+        filters = filters or {}
+        started = time.perf_counter()
+        with self._lock:
+            tokens = TOKEN_RE.findall(q.casefold())
+            if tokens:
+                # Rarest token first keeps the intersections small.
+                sets = [self._matches(token, prefix=i == len(tokens) - 1) for i, token in enumerate(tokens)]
+                sets.sort(key=len)
+                ids = set.intersection(*sets)
+            else:
+                ids = self.docs.keys()
+
+            hits = []
+            facets = {name: Counter() for name in FACETS}
+            price_counts = Counter()
+            for estate_id in ids:
+                doc = self.docs[estate_id]
+                settlement = self.settlements.get(doc['settlement'], {})
+                values = {
+                    'transaction_type': doc['transaction_type'],
+                    'status': doc['status'],
+                    'settlement_type': settlement.get('settlement_type'),
+                    'oblast': settlement.get('oblast'),
+                }
+                if any(values[name] != value for name, value in filters.items()):
+                    continue
+                price = doc['price']
+                if (min_price is not None or max_price is not None) and price is None:
+                    continue
+                if (min_price is not None and price < min_price) or (max_price is not None and price > max_price):
+                    continue
+
+                hits.append((estate_id, doc, settlement))
+                for name, value in values.items():
+                    facets[name][value] += 1
+                price_counts[self._price_bucket(price)] += 1
+
+        hits.sort(key=lambda hit: hit[0])
+        page = hits[offset:offset + limit]
+        return {
+            'count': len(hits),
+            'results': [self._hit(doc, settlement) for _, doc, settlement in page],
+            'facets': {
+                **{name: dict(counts.most_common()) for name, counts in facets.items()},
+                'price': self._price_facet(price_counts),
+            },
+            'took_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    @staticmethod
+    def _hit(doc, settlement) -> dict:
+        hit = {key: value for key, value in doc.items() if key != 'tokens'}
+        hit['price'] = None if doc['price'] is None else f"{doc['price']:.2f}"
+        hit['settlement_name'] = settlement.get('name')
+        hit['oblast'] = settlement.get('oblast')
+        hit['settlement_type'] = settlement.get('settlement_type')
+        return hit
+
+    def _price_facet(self, counts) -> list:
+        lower = (0,) + self.price_bounds
+        upper = self.price_bounds + (None,)
+        buckets = [
+            {'min': low, 'max': high, 'count': counts[index]}
+            for index, (low, high) in enumerate(zip(lower, upper))
+        ]
+        if counts[None]:
+            buckets.append({'min': None, 'max': None, 'count': counts[None]})
+        return buckets
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> EstateIndex:
+    # Built on first use and rebuilt when another process changed the tables.
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = EstateIndex()
+            index.build()
+            _index = index
+        elif not _index.is_current():
+            _index.build()
+        return _index
+
+
+def is_current() -> bool:
+    return _index is not None and _index.is_current()
+
+
+def refresh(model, pks, was_current) -> None:
+    # Called by repository writes with is_current() as it was before the
+    # write invalidated its table; nothing to do until the index exists.
+    if _index is None:
+        return
+    pks = list(pks)
+    transaction.on_commit(lambda: _index.refresh(model, pks, was_current))
+
+
+def parse_search(params) -> dict:
+    """Query string -> EstateIndex.search() arguments; ValueError on bad input."""
+    arguments = {'q': params.get('q', ''), 'filters': {}}
+    for name in FACETS:
+        value = params.get(name)
+        if value:
+            arguments['filters'][name] = value
+    for name in ('min_price', 'max_price'):
+        raw = params.get(name)
+        if raw is not None:
+            try:
+                arguments[name] = Decimal(raw)
+            except InvalidOperation:
+                raise ValueError(f"Invalid value for '{name}': {raw}.")
+            if not arguments[name].is_finite():
+                raise ValueError(f"Invalid value for '{name}': {raw}.")
+    for name, default, maximum in (('limit', 20, 100), ('offset', 0, None)):
+        raw = params.get(name)
+        if raw is None:
+            arguments[name] = default
+            continue
+        try:
+            value = int(raw)
+        except ValueError:
+            raise ValueError(f"Invalid value for '{name}': {raw}.")
+        if value < 0 or (name == 'limit' and value == 0):
+            raise ValueError(f"Invalid value for '{name}': {raw}.")
+        arguments[name] = min(value, maximum) if maximum else value
+    return arguments
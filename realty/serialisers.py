@@ -3,7 +3,13 @@ from .models import (
     EstateEmployee, EstateOwner, House, Office, Person, PersonRole,
     Phone, Role, Settlement
 )
-from rest_framework import serializers
+import datetime
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 
 class ApartmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -76,3 +82,141 @@ class SettlementSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+def bulk_serializer(serializer_class, data):
+    # Validating a batch row by row would cost queries per row: one for each
+    # unique field and one for each related key. Uniqueness is left to the
+    # database constraints and related keys are resolved with one in_bulk()
+    # query per field.
+    serializer = serializer_class(data=data, many=True)
+    child = serializer.child
+    child.validators = [v for v in child.validators if not isinstance(v, UniqueTogetherValidator)]
+
+    for name, field in child.fields.items():
+        field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and not field.read_only:
+            _prefetch_related_keys(field, [row.get(name) for row in data if isinstance(row, dict)])
+
+    return serializer
+
+
+def _prefetch_related_keys(field, values):
+    queryset = field.get_queryset()
+    pk_field = queryset.model._meta.pk
+    keys = set()
+    for value in values:
+        try:
+            keys.add(pk_field.to_python(value))
+        except Exception:
+            pass
+    keys.discard(None)
+    objects = queryset.in_bulk(list(keys))
+
+    def to_internal_value(data):
+        try:
+            return objects[pk_field.to_python(data)]
+        except KeyError:
+            field.fail('does_not_exist', pk_value=data)
+        except Exception:
+            field.fail('incorrect_type', data_type=type(data).__name__)
+
+    field.to_internal_value = to_internal_value
+
+
+class ValuesSerializer:
+    """
+    Read-only twin of a ModelSerializer for list endpoints. Rows are
+    .values_list() tuples; each column goes through a converter chosen once
+    per field, instead of building model instances and dispatching every
+    field through DRF. Output equals serializer_class(instance).data.
+    """
+    # Fields whose to_representation() is the identity for database values.
+    identity_fields = (serializers.IntegerField, serializers.CharField, serializers.BooleanField,
+                       serializers.FloatField)
+
+    def __init__(self, serializer_class):
+        model = serializer_class.Meta.model
+        self.names = []
+        self.columns = []
+        self.converters = []
+        # Many-to-many fields: (output name, model field name).
+        self.relations = []
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ManyRelatedField) and \
+                    isinstance(field.child_relation, serializers.PrimaryKeyRelatedField) and \
+                    field.child_relation.pk_field is None:
+                self.relations.append((name, field.source))
+                continue
+
+            model_field = model._meta.get_field(field.source)
+            if model_field.primary_key and len(model._meta.pk_fields) > 1:
+                raise ImproperlyConfigured(f"{serializer_class.__name__}: composite primary keys are not supported.")
+            self.names.append(name)
+            self.columns.append(model_field.attname)
+            self.converters.append(self._converter(serializer_class, name, field))
+
+        pk = model._meta.pk.attname
+        if pk not in self.columns:
+            self.columns.append(pk)
+        self.pk_index = self.columns.index(pk)
+
+    @classmethod
+    def _converter(cls, serializer_class, name, field):
+        # None: the value is used as is.
+        if isinstance(field, serializers.DecimalField):
+            coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+            if coerce_to_string and not field.localize and not field.normalize_output \
+                    and field.decimal_places is not None:
+                # Stored values already have exactly decimal_places digits.
+                return f"{{:.{field.decimal_places}f}}".format
+            return field.to_representation
+        if isinstance(field, serializers.DateField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+            if output_format is not None and output_format.lower() == ISO_8601:
+                return datetime.date.isoformat
+            return field.to_representation
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is None:
+                return None
+        elif isinstance(field, (serializers.ChoiceField, serializers.DateTimeField)):
+            return field.to_representation
+        elif isinstance(field, cls.identity_fields):
+            return None
+        raise ImproperlyConfigured(
+            f"{serializer_class.__name__}.{name}: {type(field).__name__} has no values() conversion."
+        )
+
+    def to_representation(self, rows, related=None) -> list:
+        """`related`: {field name: {pk: [related pks]}} for many-to-many fields."""
+        plan = list(zip(self.names, self.converters))
+        relations = [(name, (related or {}).get(name, {})) for name, _ in self.relations]
+        pk_index = self.pk_index
+        data = []
+        for row in rows:
+            item = {
+                name: value if convert is None or value is None else convert(value)
+                for (name, convert), value in zip(plan, row)
+            }
+            for name, ids in relations:
+                item[name] = ids.get(row[pk_index], [])
+            data.append(item)
+        return data
+
+    def serialize(self, repository, rows) -> list:
+        # One through-table query per many-to-many field for the whole batch.
+        pks = [row[self.pk_index] for row in rows]
+        related = {name: repository.get_related_ids(source, pks) for name, source in self.relations} if pks else {}
+        return self.to_representation(rows, related)
+
+    async def aserialize(self, repository, rows) -> list:
+        pks = [row[self.pk_index] for row in rows]
+        related = {name: await repository.aget_related_ids(source, pks) for name, source in self.relations} \
+            if pks else {}
+        return self.to_representation(rows, related)
+
+
+@lru_cache(maxsize=None)
+def values_serializer(serializer_class) -> ValuesSerializer:
+    return ValuesSerializer(serializer_class)
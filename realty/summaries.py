@@ -0,0 +1,220 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+
+from .models import (
+    Apartment, Contract, Estate, House, MonthlyRevenueSummary, PriceMatrixSummary,
+    SettlementStatsSummary,
+)
+
+
+def summaries_enabled() -> bool:
+    return getattr(settings, 'USE_SUMMARY_TABLES', False)
+
+
+class Summary:
+    # A summary table holding additive measures per group. Repositories take a
+    # snapshot of the fact rows they are about to write and another one after
+    # the write; the difference is applied to the summary as UPDATE ... SET
+    # col = col + delta, so a write costs O(touched groups), not O(rows).
+    model = None
+    key_fields: tuple = ()
+    count_field = None
+
+    def snapshot(self, pks) -> list:
+        raise NotImplementedError
+
+    def key(self, row) -> tuple:
+        return tuple(row[field] for field in self.key_fields)
+
+    def measures(self, row) -> dict:
+        raise NotImplementedError
+
+    def rebuild(self) -> int:
+        raise NotImplementedError
+
+    def apply(self, before, after) -> None:
+        deltas = defaultdict(lambda: defaultdict(int))
+        for sign, rows in ((-1, before), (1, after)):
+            for row in rows:
+                group = deltas[self.key(row)]
+                for column, value in self.measures(row).items():
+                    group[column] += sign * value
+
+        for key, measures in deltas.items():
+            measures = {column: value for column, value in measures.items() if value}
+            if measures:
+                self._apply_group(key, measures)
+
+        self.after_apply(before, after)
+
+    def after_apply(self, before, after) -> None:
+        pass
+
+    def _group(self, key):
+        return self.model.objects.filter(**dict(zip(self.key_fields, key)))
+
+    def _apply_group(self, key, measures) -> None:
+        increments = {column: F(column) + value for column, value in measures.items()}
+        if self._group(key).update(**increments):
+            self._drop_if_empty(key)
+            return
+
+        if measures.get(self.count_field, 0) <= 0:
+            # Removing from a group that is not materialised: the table has
+            # drifted and only `rebuild_summaries` can fix it.
+            return
+
+        try:
+            with transaction.atomic():
+                self.model.objects.create(**dict(zip(self.key_fields, key)), **self.initial(key, measures))
+        except IntegrityError:
+            # A concurrent writer created the group first; if there is no
+            # such row the insert itself was invalid.
+            if not self._group(key).update(**increments):
+                raise
+
+    def initial(self, key, measures) -> dict:
+        return measures
+
+    def _drop_if_empty(self, key) -> None:
+        if self.count_field:
+            self._group(key).filter(**{f"{self.count_field}__lte": 0}).delete()
+
+
+class MonthlyRevenue(Summary):
+    model = MonthlyRevenueSummary
+    key_fields = ('month',)
+    count_field = 'total_deals'
+
+    def snapshot(self, pks) -> list:
+        return list(Contract.objects.filter(pk__in=pks).values('date_signed', 'payment_amount'))
+
+    def key(self, row) -> tuple:
+        return (row['date_signed'].replace(day=1),)
+
+    def measures(self, row) -> dict:
+        return {
+            'total_revenue': row['payment_amount'] or Decimal(0),
+            'total_deals': 1,
+        }
+
+    def initial(self, key, measures) -> dict:
+        # Zero deltas are dropped by apply(): a null payment adds no revenue.
+        return {'total_revenue': Decimal(0), 'total_deals': 0, **measures}
+
+    def rebuild(self) -> int:
+        rows = Contract.objects.annotate(
+            month=TruncMonth('date_signed')
+        ).values('month').annotate(
+            total_revenue=Coalesce(Sum('payment_amount'), Value(Decimal(0))),
+            total_deals=Count('contract_id')
+        ).order_by('month')
+
+        self.model.objects.all().delete()
+        return len(self.model.objects.bulk_create([self.model(**row) for row in rows], batch_size=1000))
+
+
+class PriceMatrix(Summary):
+    model = PriceMatrixSummary
+    key_fields = ('settlement_id', 'transaction_type')
+    count_field = 'inventory_count'
+
+    def snapshot(self, pks) -> list:
+        return list(Estate.objects.filter(pk__in=pks).values('settlement_id', 'transaction_type', 'price'))
+
+    def measures(self, row) -> dict:
+        priced = row['price'] is not None
+        return {
+            'price_sum': row['price'] if priced else Decimal(0),
+            'priced_count': int(priced),
+            'inventory_count': 1,
+        }
+
+    def initial(self, key, measures) -> dict:
+        return {'price_sum': Decimal(0), 'priced_count': 0, **measures, 'max_price': None}
+
+    def after_apply(self, before, after) -> None:
+        # Max is not additive. A new price can only raise it, but a removed
+        # price may have been the maximum, so that group is re-aggregated.
+        removed = {self.key(row) for row in before if row['price'] is not None}
+        for key in removed:
+            max_price = Estate.objects.filter(**dict(zip(self.key_fields, key))).aggregate(
+                max_price=Max('price')
+            )['max_price']
+            self._group(key).update(max_price=max_price)
+
+        for row in after:
+            key = self.key(row)
+            if row['price'] is not None and key not in removed:
+                self._group(key).update(
+                    max_price=Greatest(Coalesce('max_price', Value(row['price'])), Value(row['price']))
+                )
+
+    def rebuild(self) -> int:
+        rows = Estate.objects.values('settlement_id', 'transaction_type').annotate(
+            price_sum=Coalesce(Sum('price'), Value(Decimal(0))),
+            priced_count=Count('price'),
+            max_price=Max('price'),
+            inventory_count=Count('estate_id')
+        ).order_by()
+
+        self.model.objects.all().delete()
+        return len(self.model.objects.bulk_create([self.model(**row) for row in rows], batch_size=1000))
+
+
+class SettlementStats(Summary):
+    # Keyed by estate id: Estate, Apartment and House writes all change it.
+    model = SettlementStatsSummary
+    key_fields = ('settlement_id',)
+    count_field = 'number_of_estates'
+
+    def snapshot(self, pks) -> list:
+        return list(Estate.objects.filter(pk__in=pks).annotate(
+            is_house=Exists(House.objects.filter(estate_id=OuterRef('pk'))),
+            is_apartment=Exists(Apartment.objects.filter(estate_id=OuterRef('pk'))),
+        ).values('settlement_id', 'price', 'is_house', 'is_apartment'))
+
+    def measures(self, row) -> dict:
+        price = row['price']
+        house = row['is_house'] and price is not None
+        apartment = row['is_apartment'] and price is not None
+        return {
+            'number_of_estates': 1,
+            'house_price_sum': price if house else Decimal(0),
+            'house_priced_count': int(house),
+            'apartment_price_sum': price if apartment else Decimal(0),
+            'apartment_priced_count': int(apartment),
+        }
+
+    def initial(self, key, measures) -> dict:
+        return {
+            'house_price_sum': Decimal(0), 'house_priced_count': 0,
+            'apartment_price_sum': Decimal(0), 'apartment_priced_count': 0,
+            **measures,
+        }
+
+    def rebuild(self) -> int:
+        house = Q(house__isnull=False)
+        apartment = Q(apartment__isnull=False)
+        rows = Estate.objects.values('settlement_id').annotate(
+            number_of_estates=Count('estate_id'),
+            house_price_sum=Coalesce(Sum('price', filter=house), Value(Decimal(0))),
+            house_priced_count=Count('price', filter=house),
+            apartment_price_sum=Coalesce(Sum('price', filter=apartment), Value(Decimal(0))),
+            apartment_priced_count=Count('price', filter=apartment),
+        ).order_by()
+
+        self.model.objects.all().delete()
+        return len(self.model.objects.bulk_create([self.model(**row) for row in rows], batch_size=1000))
+
+
+monthly_revenue = MonthlyRevenue()
+price_matrix = PriceMatrix()
+settlement_stats = SettlementStats()
+
+ALL_SUMMARIES = (monthly_revenue, price_matrix, settlement_stats)
@@ -1,3 +1,984 @@
-from django.test import TestCase
+"""
+The realty models are unmanaged, so setUpModule creates their tables in the
+test database. Runs against MySQL or, locally, SQLite:
 
-# Create your tests here.
+    BENCHMARK_SQLITE=/tmp/realty.sqlite3 python manage.py test realty real_estate_project
+"""
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.authtoken.models import Token
+
+from real_estate_project import settings as project_settings
+from real_estate_project.benchmark.fixtures import ensure_schema
+
+from . import models as m
+from . import search
+from . import serialisers as s
+from .analytics import BUNDLE_QUERIES, revenue_statistics
+from .authentication import token_cache
+from .conditional import validators
+from .db_pool import ConnectionPool, ConnectionPoolMiddleware, get_pool
+from .pagination import encode_cursor_values
+from .query_cache import check_shared_versions, invalidate_tables, table_versions
+from .query_stats import QueryBudgetExceeded
+from .repositories import UnitOfWork
+from .summaries import ALL_SUMMARIES
+from .urls import router
+from .views import BaseRepositoryViewSet
+
+
+def setUpModule():
+    ensure_schema()
+
+
+def populate(start, stop):
+    """Rows with ids start..stop-1 in every realty table, related to each other."""
+    ids = range(start, stop)
+    m.Settlement.objects.bulk_create(
+        m.Settlement(settlement_id=i, name=f"Settlement {i}", amalgamated_hromada="Hromada",
+                     oblast="Oblast", settlement_type='місто')
+        for i in ids
+    )
+    m.Person.objects.bulk_create(m.Person(person_id=i, surname=f"Surname {i}", name="Name") for i in ids)
+    m.Role.objects.bulk_create(m.Role(role_id=i, name=f"Role {i}") for i in ids)
+
+    # Three estates per id: an apartment, a house and an office.
+    m.Estate.objects.bulk_create(
+        m.Estate(estate_id=3 * i + kind, settlement_id=i, street="Street", house_number=str(3 * i + kind),
+                 transaction_type='sale', price=Decimal(100_000 + i), status='active')
+        for i in ids for kind in range(3)
+    )
+    m.Apartment.objects.bulk_create(
+        m.Apartment(estate_id=3 * i, area=Decimal(50), rooms=2, floor=1, total_floors=9, elevator=1, balcony=1)
+        for i in ids
+    )
+    m.House.objects.bulk_create(
+        m.House(estate_id=3 * i + 1, land_area=Decimal(6), floors=2, rooms=5, garage=1, parking=1,
+                basement=0, garden=1, heating_type='gas')
+        for i in ids
+    )
+    m.Office.objects.bulk_create(
+        m.Office(estate_id=3 * i + 2, area=Decimal(120), floor=3, total_floors=5, openspace=1,
+                 conference_rooms=2, parking=1, elevator=1)
+        for i in ids
+    )
+    m.EstateOwner.objects.bulk_create(
+        m.EstateOwner(estate_id=3 * i + kind, owner_id=i) for i in ids for kind in range(3)
+    )
+    m.EstateEmployee.objects.bulk_create(
+        m.EstateEmployee(estate_id=3 * i + kind, person_id=i) for i in ids for kind in range(3)
+    )
+    m.Contract.objects.bulk_create(
+        m.Contract(contract_id=i, estate_id=3 * i, employee_id=i, client_id=i, contract_type='sale',
+                   date_signed=datetime.date(2024, 1, 1), payment_amount=Decimal(1000), terms="Terms")
+        for i in ids
+    )
+    m.Contact.objects.bulk_create(m.Contact(contact_id=i, client_id=i, employee_id=i, estate_id=3 * i) for i in ids)
+    m.PersonRole.objects.bulk_create(m.PersonRole(person_id=i, role_id=i) for i in ids)
+    m.Phone.objects.bulk_create(m.Phone(number=f"+380{i:09d}", person_id=i) for i in ids)
+    m.Email.objects.bulk_create(m.Email(address=f"person{i}@example.com", person_id=i) for i in ids)
+
+
+class RealtyTestCase(TestCase):
+    def setUp(self):
+        # Table versions, cached analytics and validated tokens outlive the
+        # rolled-back test transaction otherwise.
+        caches['analytics'].clear()
+        token_cache.clear()
+
+    def authenticate(self):
+        user = get_user_model().objects.create_user('tester')
+        self.token = Token.objects.create(user=user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Token {self.token.key}"
+        return user
+
+
+class ListQueryCountTests(RealtyTestCase):
+    paths = [
+        f"/api/{prefix}/" for prefix, viewset, _ in router.registry if issubclass(viewset, BaseRepositoryViewSet)
+    ]
+
+    def _query_counts(self) -> dict:
+        counts = {}
+        for path in self.paths:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            counts[path] = len(queries)
+        return counts
+
+    def test_query_count_does_not_grow_with_rows(self):
+        populate(1, 3)
+        few = self._query_counts()
+        populate(3, 40)
+        many = self._query_counts()
+        for path in self.paths:
+            with self.subTest(path=path):
+                self.assertEqual(few[path], many[path])
+
+    def test_estate_list_runs_fixed_queries(self):
+        # Estates, then the owner and employee ids from the through tables.
+        populate(1, 20)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/estates/')
+        self.assertEqual(len(response.json()['results']), 50)
+
+
+class PaginationTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 5)
+        # Several owners per estate, so pages split within one estate_id.
+        m.EstateOwner.objects.bulk_create(m.EstateOwner(estate_id=3, owner_id=i) for i in (2, 3, 4))
+
+    def walk(self, path):
+        rows, pages = [], 0
+        while path:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            rows += response.json()['results']
+            path = response.json()['next']
+            pages += 1
+        return rows, pages
+
+    def test_composite_key_pages(self):
+        rows, pages = self.walk('/api/estate-owners/?page_size=2')
+        pairs = [(row['estate'], row['owner']) for row in rows]
+        self.assertEqual(pairs, sorted(m.EstateOwner.objects.values_list('estate_id', 'owner_id')))
+        self.assertEqual(pages, 8)
+
+    def test_single_key_pages(self):
+        rows, _ = self.walk('/api/estates/?page_size=5')
+        self.assertEqual([row['estate_id'] for row in rows], list(range(3, 15)))
+
+    def test_tampered_cursor(self):
+        for cursor in ('!!!', encode_cursor_values([3]), encode_cursor_values(['x', 1]),
+                       encode_cursor_values({'estate': 3})):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/estate-owners/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+        for page_size in ('0', 'x'):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.client.get('/api/estates/', {'page_size': page_size}).status_code, 400)
+
+
+class NDJSONTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 8)
+
+    def test_streams_every_row(self):
+        # Contracts are streamed from model instances, estates from value rows.
+        for prefix in ('contracts', 'estates', 'estate-owners'):
+            with self.subTest(prefix=prefix):
+                response = self.client.get(f'/api/{prefix}/', HTTP_ACCEPT='application/x-ndjson')
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+                lines = b''.join(response.streaming_content).decode().splitlines()
+                expected = self.client.get(f'/api/{prefix}/?page_size=500').json()['results']
+                self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_format_parameter(self):
+        response = self.client.get('/api/people/?format=ndjson')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 7)
+
+
+class QueryCacheTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 4)
+        self.uow = UnitOfWork()
+
+    def test_hits_until_a_table_it_reads_is_written(self):
+        contracts, apartments = self.uow.contracts, self.uow.apartments
+        revenue = contracts.monthly_revenue_stream()
+        rooms = apartments.stats_by_rooms()
+        with self.assertNumQueries(0):
+            self.assertEqual(contracts.monthly_revenue_stream(), revenue)
+            self.assertEqual(async_to_sync(contracts.amonthly_revenue_stream)(), revenue)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            contracts.create(contract_id=100, estate_id=3, contract_type='sale',
+                             date_signed=datetime.date(2025, 1, 5), payment_amount=Decimal(10))
+        with self.assertNumQueries(1):
+            self.assertEqual(len(contracts.monthly_revenue_stream()), len(revenue) + 1)
+        # Apartments and estates were not written.
+        with self.assertNumQueries(0):
+            self.assertEqual(apartments.stats_by_rooms(), rooms)
+
+    def test_rolled_back_write_keeps_entries(self):
+        contracts = self.uow.contracts
+        revenue = contracts.monthly_revenue_stream()
+        with self.captureOnCommitCallbacks() as callbacks:
+            contracts.update_fields(1, payment_amount=Decimal(5))
+        self.assertTrue(callbacks)
+        # Not committed: readers elsewhere still see the old rows.
+        with self.assertNumQueries(0):
+            self.assertEqual(contracts.monthly_revenue_stream(), revenue)
+
+    def test_arguments_are_part_of_the_key(self):
+        settlements = self.uow.settlements
+        self.assertEqual(len(settlements.hot_settlements(limit=1)), 1)
+        self.assertEqual(len(settlements.hot_settlements(limit=2)), 2)
+
+
+class FastReadTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 5)
+        # Nulls, several related ids and values that need converting.
+        m.Estate.objects.filter(pk=3).update(price=None, year_built=1999, apartment_number="12a")
+        m.EstateOwner.objects.bulk_create(m.EstateOwner(estate_id=3, owner_id=i) for i in (4, 2))
+        m.Contract.objects.filter(pk=1).update(payment_amount=None, fee_percentage=Decimal('2.50'),
+                                               start_date=datetime.date(2024, 2, 29), terms=None)
+
+    def test_matches_model_serializer(self):
+        viewsets = [viewset for _, viewset, _ in router.registry
+                    if issubclass(viewset, BaseRepositoryViewSet) and viewset.fast_read]
+        self.assertTrue(viewsets)
+        for viewset in viewsets:
+            with self.subTest(viewset=viewset.__name__):
+                repository = getattr(UnitOfWork(), viewset.repository_name)
+                reader = s.values_serializer(viewset.serializer_class)
+                rows = repository.get_page_values(reader.columns, limit=100)
+                expected = viewset.serializer_class(repository.get_page(limit=100), many=True).data
+                self.assertEqual(reader.serialize(repository, rows), expected)
+
+    def test_list_endpoints_match(self):
+        viewsets = {prefix: viewset for prefix, viewset, _ in router.registry}
+        for prefix in ('estates', 'contracts'):
+            with self.subTest(prefix=prefix):
+                fast = self.client.get(f'/api/{prefix}/?page_size=4').json()
+                with mock.patch.object(viewsets[prefix], 'fast_read', False):
+                    self.assertEqual(self.client.get(f'/api/{prefix}/?page_size=4').json(), fast)
+
+    def test_composite_keys_are_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            s.ValuesSerializer(s.EstateOwnerSerializer)
+
+
+class TokenCacheTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.authenticate()
+
+    def assertTokenCached(self):
+        self.assertEqual(self.client.get('/api/roles/').status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/roles/').status_code, 200)
+        self.assertFalse([query for query in queries if 'authtoken_token' in query['sql']])
+
+    def test_token_delete_evicts(self):
+        self.assertTokenCached()
+        self.token.delete()
+        self.assertEqual(self.client.get('/api/roles/').status_code, 401)
+
+    def test_deactivation_through_realty_auth_user_evicts(self):
+        self.assertTokenCached()
+        user = m.AuthUser.objects.get(pk=self.user.pk)
+        user.is_active = 0
+        user.save()
+        self.assertEqual(self.client.get('/api/roles/').status_code, 401)
+
+    def test_deactivation_through_repository_update_evicts(self):
+        # update_fields() is a queryset update: no signals are sent.
+        self.assertTokenCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            UnitOfWork().auth_users.update_fields(self.user.pk, is_active=0)
+        self.assertEqual(self.client.get('/api/roles/').status_code, 401)
+
+
+class ListingFilterTests(RealtyTestCase):
+    def test_non_finite_numbers_are_rejected(self):
+        for param in ('min_price', 'max_price', 'min_area', 'max_area'):
+            for value in ('NaN', 'Infinity', '-inf', 'sNaN'):
+                with self.subTest(param=param, value=value):
+                    response = self.client.get('/api/estates/listings/', {param: value})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_finite_bounds_filter(self):
+        populate(1, 4)
+        response = self.client.get('/api/estates/listings/', {'min_price': '100002', 'kind': 'house'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['estate_id'] for row in response.json()['results']], [7, 10])
+
+
+class AnalyticsFilterTests(RealtyTestCase):
+    def test_non_finite_threshold_is_rejected(self):
+        for path in ('/api/analytics/owners/whales/', '/api/async/analytics/whale_owners/'):
+            for value in ('NaN', 'Infinity'):
+                with self.subTest(path=path, value=value):
+                    self.assertEqual(self.client.get(path, {'threshold': value}).status_code, 400)
+        response = self.client.get('/api/analytics/bundle/', {'whale_owners.threshold': 'NaN'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_finite_threshold(self):
+        response = self.client.get('/api/analytics/owners/whales/', {'threshold': '1000.50'})
+        self.assertEqual(response.status_code, 200)
+
+
+class AnalyticsResponseTests(RealtyTestCase):
+    paths = (
+        '/api/analytics/financials/monthly/',
+        '/api/analytics/settlements/hot/',
+        '/api/analytics/settlements/market/',
+        '/api/analytics/apartments/rooms/',
+        '/api/analytics/employees/top/',
+        '/api/analytics/owners/whales/',
+    )
+
+    def setUp(self):
+        super().setUp()
+        populate(1, 5)
+
+    def test_columns_hold_the_same_rows(self):
+        for path in self.paths:
+            with self.subTest(path=path):
+                records = self.client.get(path).json()
+                columns = self.client.get(path, {'orient': 'columns'}).json()
+                self.assertTrue(records)
+                self.assertEqual([dict(zip(columns, values)) for values in zip(*columns.values())], records)
+
+    def test_null_aggregates_stay_null(self):
+        m.Settlement.objects.create(settlement_id=99, name="Empty", amalgamated_hromada="Hromada", oblast="Oblast",
+                                    settlement_type='село')
+        rows = {row['name']: row for row in self.client.get('/api/analytics/settlements/market/').json()}
+        self.assertEqual(rows["Empty"], {'name': "Empty", 'avg_house_price': None, 'avg_apartment_price': None})
+
+    def test_revenue_statistics(self):
+        rows = [{'total_revenue': Decimal(value)} for value in ('10', '40', '20', '30')] + [{'total_revenue': None}]
+        self.assertEqual(revenue_statistics(rows), {'mean': Decimal(25), 'median': Decimal(25),
+                                                    'max': Decimal(40), 'min': Decimal(10)})
+        self.assertIsNone(revenue_statistics([{'total_revenue': None}]))
+
+
+class BundleTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 5)
+        # Every entry runs inline: pool workers cannot read rows this test
+        # transaction wrote on SQLite.
+        patcher = mock.patch.object(get_pool(), 'try_acquire', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def bundle(self, **params):
+        response = self.client.get('/api/analytics/bundle/', params)
+        return response.status_code, response.json()
+
+    def test_entries_match_their_endpoints(self):
+        status_code, data = self.bundle()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(set(data), {*BUNDLE_QUERIES, 'general_statistics'})
+        self.assertEqual(data['market_analysis'], self.client.get('/api/analytics/settlements/market/').json())
+        self.assertEqual(data['general_statistics'], self.client.get('/api/analytics/general-statistics/').json())
+
+    def test_include_and_scoped_filters(self):
+        status_code, data = self.bundle(**{'include': 'hot_settlements,stats_by_rooms', 'hot_settlements.limit': '1',
+                                           'limit': '3', 'whale_owners.limit': 'x'})
+        self.assertEqual(status_code, 200)
+        # Unscoped filters and filters of entries left out are ignored.
+        self.assertEqual(set(data), {'hot_settlements', 'stats_by_rooms'})
+        self.assertEqual(data['hot_settlements'], self.client.get('/api/analytics/settlements/hot/?limit=1').json())
+
+        status_code, data = self.bundle(include='monthly_revenue', orient='columns')
+        self.assertEqual(set(data['monthly_revenue']), {'month', 'total_revenue', 'total_deals'})
+        self.assertIn('general_statistics', data)
+
+    def test_invalid_requests(self):
+        for params in ({'include': 'monthly_revenue,nope'}, {'hot_settlements.limit': '0'},
+                       {'include': 'stats_by_rooms', 'stats_by_rooms.min_rooms': 'two'}):
+            with self.subTest(params=params):
+                status_code, data = self.bundle(**params)
+                self.assertEqual(status_code, 400)
+                self.assertIn('detail', data)
+
+
+class TableVersionTests(RealtyTestCase):
+    @override_settings(TABLE_VERSION_TTL=0.05)
+    def test_process_local_stamps_expire(self):
+        etag, _ = validators(['estate'])
+        versions = table_versions('estate')
+        self.assertEqual(table_versions('estate'), versions)
+        time.sleep(0.1)
+        self.assertGreater(table_versions('estate'), versions)
+        self.assertNotEqual(validators(['estate'])[0], etag)
+
+    def test_not_modified_until_written(self):
+        etag = self.client.get('/api/estates/')['ETag']
+        self.assertEqual(self.client.get('/api/estates/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            UnitOfWork().settlements.create(settlement_id=1, name="New", amalgamated_hromada="Hromada",
+                                            oblast="Oblast", settlement_type='місто')
+            UnitOfWork().estates.create(estate_id=1, settlement_id=1, street="Street", house_number="1",
+                                        transaction_type='sale', status='active')
+        response = self.client.get('/api/estates/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_last_modified_waits_for_its_second_to_pass(self):
+        second = 1_700_000_000 * 1_000_000_000
+        with mock.patch('time.time_ns', return_value=second + 200_000_000) as time_ns:
+            table_versions(*UnitOfWork().estates.read_tables())
+            time_ns.return_value = second + 1_100_000_000
+            response = self.client.get('/api/estates/')
+            last_modified = response['Last-Modified']
+            self.assertEqual(self.client.get('/api/estates/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code,
+                             304)
+
+            # A write in the same second as the stamp the date came from.
+            time_ns.return_value = second + 1_600_000_000
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate_tables(m.Estate._meta.db_table)
+            response = self.client.get('/api/estates/', HTTP_IF_MODIFIED_SINCE=http_date(second // 1_000_000_000))
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('Last-Modified'))
+
+            time_ns.return_value = second + 2_000_000_000
+            response = self.client.get('/api/estates/', HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Last-Modified'], http_date(second // 1_000_000_000 + 1))
+
+    def test_check_warns_about_process_local_cache(self):
+        self.assertEqual([warning.id for warning in check_shared_versions(None)], ['realty.W001'])
+        shared = {**settings.CACHES, 'analytics': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                   'LOCATION': 'analytics_cache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_versions(None), [])
+
+
+class BulkWriteTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 4)
+        self.authenticate()
+
+    def test_bulk_update_leaves_omitted_columns_alone(self):
+        rows = [
+            {'contract_id': 1, 'estate': 3, 'contract_type': 'rent', 'date_signed': '2024-02-01',
+             'payment_amount': '5.00'},
+            {'contract_id': 2, 'estate': 6, 'contract_type': 'rent', 'date_signed': '2024-02-01'},
+        ]
+        response = self.client.put('/api/contracts/bulk/', rows, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {'updated': 2})
+
+        first, second = m.Contract.objects.filter(pk__in=[1, 2]).order_by('pk')
+        self.assertEqual((first.contract_type, first.payment_amount, first.terms), ('rent', Decimal('5.00'), "Terms"))
+        self.assertEqual((second.contract_type, second.payment_amount, second.terms), ('rent', Decimal(1000), "Terms"))
+
+
+@override_settings(USE_SUMMARY_TABLES=True, QUERY_CACHE_ENABLED=False)
+class SummaryTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 4)
+        for summary in ALL_SUMMARIES:
+            summary.rebuild()
+        self.uow = UnitOfWork()
+
+    @staticmethod
+    def _rows(rows):
+        # Summaries divide floats where the raw queries average decimals.
+        def value(v):
+            return round(float(v), 2) if isinstance(v, (Decimal, float)) else v
+        return sorted((tuple((key, value(v)) for key, v in sorted(row.items())) for row in rows), key=repr)
+
+    def assertSummariesMatchRaw(self):
+        reads = {
+            'monthly_revenue_stream': self.uow.contracts.monthly_revenue_stream,
+            'get_price_matrix': self.uow.estates.get_price_matrix,
+            'hot_settlements': self.uow.settlements.hot_settlements,
+            'market_analysis': self.uow.settlements.market_analysis,
+        }
+        for name, read in reads.items():
+            with self.subTest(read=name):
+                summarised = self._rows(read())
+                with override_settings(USE_SUMMARY_TABLES=False):
+                    self.assertEqual(summarised, self._rows(read()))
+
+    def test_contract_writes(self):
+        contracts = self.uow.contracts
+        # The month's first contract has no payment.
+        contracts.create(contract_id=100, estate_id=3, contract_type='sale', date_signed=datetime.date(2025, 5, 10))
+        self.assertEqual(m.MonthlyRevenueSummary.objects.get(month=datetime.date(2025, 5, 1)).total_deals, 1)
+        self.assertSummariesMatchRaw()
+        contracts.update_fields(100, payment_amount=Decimal(250))
+        self.assertSummariesMatchRaw()
+        contracts.update(100, date_signed=datetime.date(2025, 6, 1), payment_amount=None)
+        self.assertSummariesMatchRaw()
+        contracts.delete(100)
+        self.assertSummariesMatchRaw()
+        self.assertFalse(m.MonthlyRevenueSummary.objects.filter(month__gte=datetime.date(2025, 1, 1)).exists())
+
+    def test_estate_writes(self):
+        estates = self.uow.estates
+        estates.create(estate_id=100, settlement_id=1, street="New", house_number="1", transaction_type='rent',
+                       status='active')
+        self.assertSummariesMatchRaw()
+        self.uow.houses.create(estate_id=100, land_area=Decimal(4), floors=1, rooms=3, garage=0, parking=0,
+                               basement=0, garden=0, heating_type='gas')
+        estates.update_fields(100, price=Decimal(500))
+        self.assertSummariesMatchRaw()
+        # Removing the group's highest price recomputes max_price.
+        estates.update_fields(4, price=None)
+        self.assertSummariesMatchRaw()
+        self.uow.houses.delete(100)
+        estates.delete(100)
+        self.assertSummariesMatchRaw()
+
+    def test_bulk_writes(self):
+        self.uow.contracts.bulk_create([
+            {'contract_id': 100, 'estate_id': 3, 'contract_type': 'sale', 'date_signed': datetime.date(2025, 5, 1)},
+            {'contract_id': 101, 'estate_id': 6, 'contract_type': 'rent', 'date_signed': datetime.date(2025, 5, 2),
+             'payment_amount': Decimal(70)},
+        ])
+        self.uow.estates.bulk_create([
+            {'estate_id': 100 + i, 'settlement_id': 2, 'street': "Bulk", 'house_number': str(i),
+             'transaction_type': 'sale', 'status': 'active', 'price': Decimal(10 * i) if i else None}
+            for i in range(3)
+        ])
+        self.assertSummariesMatchRaw()
+        self.uow.contracts.bulk_update([{'contract_id': 101, 'payment_amount': None}, {'contract_id': 1,
+                                        'date_signed': datetime.date(2025, 5, 3)}])
+        self.uow.estates.bulk_update([{'estate_id': 100, 'price': Decimal(5)}, {'estate_id': 101, 'price': None}])
+        self.assertSummariesMatchRaw()
+        self.uow.contracts.bulk_delete([100, 101])
+        self.uow.estates.bulk_delete([100, 101, 102])
+        self.assertSummariesMatchRaw()
+
+
+class SearchTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 4)
+        search._index = None
+        self.addCleanup(setattr, search, '_index', None)
+        self.uow = UnitOfWork()
+
+    def ids(self, q, **arguments):
+        return [hit['estate_id'] for hit in search.get_index().search(q, **arguments)['results']]
+
+    def test_search_and_facets(self):
+        result = search.get_index().search('settlement 2')
+        self.assertEqual([hit['estate_id'] for hit in result['results']], [6, 7, 8])
+        self.assertEqual(result['results'][0]['settlement_name'], "Settlement 2")
+        self.assertEqual(result['facets']['transaction_type'], {'sale': 3})
+        self.assertEqual(result['facets']['oblast'], {'Oblast': 3})
+        self.assertEqual([bucket['count'] for bucket in result['facets']['price']], [0, 0, 3, 0, 0, 0])
+        self.assertEqual(self.ids('', filters={'status': 'sold'}), [])
+        self.assertEqual(self.ids('street', min_price=Decimal(100_003)), [9, 10, 11])
+
+    def test_last_token_matches_as_prefix(self):
+        self.assertEqual(self.ids('sett'), list(range(3, 12)))
+        self.assertEqual(self.ids('7 stre'), [7])
+        self.assertEqual(self.ids('sett 2'), [])
+
+    def test_refresh_applies_local_writes(self):
+        index = search.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uow.estates.update_fields(6, street="Market")
+            self.uow.settlements.update_fields(1, name="Renamed")
+        self.assertTrue(index.is_current())
+        self.assertEqual(self.ids('market'), [6])
+        self.assertEqual(self.ids('renamed'), [3, 4, 5])
+        self.assertIs(search.get_index(), index)
+
+    def test_refresh_keeps_index_stale_after_unseen_write(self):
+        index = search.get_index()
+        # Another process renames a settlement: only its table version moves.
+        m.Settlement.objects.filter(pk=1).update(name="Renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_tables(m.Settlement._meta.db_table)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uow.estates.update_fields(6, street="Market")
+        self.assertFalse(index.is_current())
+        self.assertEqual(self.ids('renamed'), [3, 4, 5])
+        self.assertEqual(self.ids('market'), [6])
+
+    def test_build_reads_versions_before_rows(self):
+        # The stand-in version is the number of queries run so far.
+        index = search.EstateIndex()
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch.object(search, 'table_versions', side_effect=lambda *tables: len(queries)):
+            index.build()
+        self.assertEqual(index.versions, 0)
+        self.assertTrue(queries)
+
+
+class AsyncViewTests(RealtyTestCase):
+    # Sync DRF view -> async twin with the same payload.
+    analytics_paths = {
+        'monthly_revenue': '/api/analytics/financials/monthly/',
+        'hot_settlements': '/api/analytics/settlements/hot/?limit=2',
+        'market_analysis': '/api/analytics/settlements/market/?by_name=1',
+        'stats_by_rooms': '/api/analytics/apartments/rooms/',
+        'top_employees': '/api/analytics/employees/top/',
+        'whale_owners': '/api/analytics/owners/whales/?threshold=1',
+    }
+
+    def setUp(self):
+        super().setUp()
+        populate(1, 5)
+
+    def assertSamePayload(self, path, async_path):
+        expected, response = self.client.get(path), self.client.get(async_path)
+        self.assertEqual(response.status_code, expected.status_code, async_path)
+        data = response.json()
+        if isinstance(data, dict) and data.get('next'):
+            # Pages link back to their own route.
+            data['next'] = data['next'].replace('/api/async/', '/api/')
+        self.assertEqual(data, expected.json(), async_path)
+
+    def test_list_matches_sync(self):
+        for prefix in ('estates', 'contracts', 'estate-owners', 'phones'):
+            with self.subTest(prefix=prefix):
+                self.assertSamePayload(f'/api/{prefix}/?page_size=3', f'/api/async/{prefix}/?page_size=3')
+        cursor = self.client.get('/api/async/estates/?page_size=3').json()['next'].split('cursor=')[1]
+        self.assertSamePayload(f'/api/estates/?cursor={cursor}', f'/api/async/estates/?cursor={cursor}')
+        self.assertEqual(self.client.get('/api/async/estates/?cursor=bad').status_code, 400)
+
+    def test_detail(self):
+        for path in ('estates/3/', 'apartments/3/', 'contracts/2/', 'phones/+380000000001/'):
+            with self.subTest(path=path):
+                self.assertSamePayload(f'/api/{path}', f'/api/async/{path}')
+        for path in ('estates/999/', 'estates/abc/', 'estate-owners/3/', 'person-roles/1/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(f'/api/async/{path}').status_code, 404)
+
+    def test_analytics_match_sync(self):
+        for name, path in self.analytics_paths.items():
+            with self.subTest(name=name):
+                query = path.partition('?')[2]
+                self.assertSamePayload(path, f'/api/async/analytics/{name}/?{query}')
+        self.assertEqual(self.client.get('/api/async/analytics/unknown/').status_code, 404)
+        self.assertEqual(self.client.get('/api/async/analytics/hot_settlements/?limit=0').status_code, 400)
+
+    def test_bundle(self):
+        # No free pool slots: every entry runs on the request's own thread,
+        # which alone sees the rows this test transaction wrote.
+        query = 'include=monthly_revenue,hot_settlements&hot_settlements.limit=2'
+        with mock.patch.object(get_pool(), 'try_acquire', return_value=False):
+            self.assertSamePayload(f'/api/analytics/bundle/?{query}', f'/api/async/analytics/bundle/?{query}')
+            data = self.client.get(f'/api/async/analytics/bundle/?{query}').json()
+        self.assertEqual(set(data), {'monthly_revenue', 'hot_settlements', 'general_statistics'})
+        self.assertEqual(data['monthly_revenue'], self.client.get('/api/analytics/financials/monthly/').json())
+        self.assertEqual(len(data['hot_settlements']), 2)
+
+        for query in ('include=monthly_revenue,unknown', 'hot_settlements.limit=x'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/async/analytics/bundle/?{query}').status_code, 400)
+
+
+class UnitOfWorkTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 3)
+
+    def test_repositories_are_shared(self):
+        first, second = UnitOfWork(), UnitOfWork()
+        self.assertIs(first.contracts, second.contracts)
+        self.assertIs(first.estates, second.estates)
+
+    def test_commits_block(self):
+        uow = UnitOfWork()
+        with self.captureOnCommitCallbacks() as callbacks:
+            with uow:
+                uow.contracts.update_fields(1, contract_type='rent')
+        self.assertEqual(m.Contract.objects.get(pk=1).contract_type, 'rent')
+        # Cache invalidation waits for the commit.
+        self.assertTrue(callbacks)
+
+    def test_rolls_back_block_that_raises(self):
+        uow = UnitOfWork()
+        with self.captureOnCommitCallbacks() as callbacks, self.assertRaises(RuntimeError):
+            with uow:
+                uow.contracts.update_fields(1, contract_type='rent')
+                uow.estates.update_fields(3, status='sold')
+                raise RuntimeError
+        self.assertEqual(m.Contract.objects.get(pk=1).contract_type, 'sale')
+        self.assertEqual(m.Estate.objects.get(pk=3).status, 'active')
+        self.assertEqual(callbacks, [])
+
+
+class UpdateTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 3)
+        self.authenticate()
+
+    def test_response_shows_stored_row(self):
+        body = {'contract_id': 1, 'estate': 3, 'contract_type': 'rent', 'date_signed': '2024-03-01'}
+        response = self.client.put('/api/contracts/1/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual((data['contract_type'], data['terms'], data['payment_amount']), ('rent', "Terms", '1000.00'))
+        self.assertEqual(data, self.client.get('/api/contracts/1/').json())
+
+    def test_full_body_is_one_update(self):
+        body = {'person_id': 1, 'surname': "New", 'name': "Name", 'patronym': None, 'gender': 'f',
+                'birth_date': '1990-01-02'}
+        self.client.get('/api/people/1/')  # caches the token
+        with self.assertNumQueries(1):
+            response = self.client.put('/api/people/1/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), body)
+        self.assertEqual(self.client.get('/api/people/1/').json(), body)
+
+    def test_body_cannot_move_the_row(self):
+        body = {'person_id': 2, 'surname': "New", 'name': "Name"}
+        response = self.client.put('/api/people/1/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            list(m.Person.objects.order_by('pk').values_list('pk', 'surname')),
+            [(1, "Surname 1"), (2, "Surname 2")],
+        )
+
+    def test_missing_row(self):
+        body = {'contract_id': 99, 'estate': 3, 'contract_type': 'rent', 'date_signed': '2024-03-01'}
+        response = self.client.put('/api/contracts/99/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.put('/api/contracts/abc/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+class MetricsAccessTests(RealtyTestCase):
+    def test_allowed_address(self):
+        response = self.client.get('/api/metrics/', REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'realty_db_pool_size', response.content)
+
+    def test_other_address(self):
+        self.assertEqual(self.client.get('/api/metrics/', REMOTE_ADDR='10.0.0.6').status_code, 403)
+        # Forwarded headers are not trusted.
+        response = self.client.get('/api/metrics/', REMOTE_ADDR='10.0.0.6', HTTP_X_FORWARDED_FOR='10.0.0.5')
+        self.assertEqual(response.status_code, 403)
+
+    def test_default_is_staff_only(self):
+        # Anonymous, from loopback as behind a same-host proxy.
+        with self.settings(METRICS_ALLOWED_IPS=project_settings.METRICS_ALLOWED_IPS):
+            self.assertEqual(self.client.get('/api/metrics/', REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+    def test_staff_session(self):
+        user = get_user_model().objects.create_user('member')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True, QUERY_CACHE_ENABLED=False)
+class QueryBudgetTests(RealtyTestCase):
+    # A request for every view in settings.QUERY_BUDGETS.
+    paths = {
+        'estate-list': '/api/estates/',
+        'estate-detail': '/api/estates/3/',
+        'estate-listings': '/api/estates/listings/?kind=apartment&min_rooms=2',
+        'estate-search': '/api/estates/search/?q=street',
+        'apartment-list': '/api/apartments/',
+        'house-list': '/api/houses/',
+        'contract-list': '/api/contracts/',
+        'settlement-list': '/api/settlements/',
+        'person-list': '/api/people/',
+        'analytics-get-general-statistics': '/api/analytics/general-statistics/',
+        'analytics-hot-settlements': '/api/analytics/settlements/hot/',
+        'analytics-top-employees': '/api/analytics/employees/top/',
+        'analytics-whale-owners': '/api/analytics/owners/whales/',
+        'analytics-market-analysis': '/api/analytics/settlements/market/',
+        'analytics-monthly-revenue': '/api/analytics/financials/monthly/',
+        'analytics-stats-by-rooms': '/api/analytics/apartments/rooms/',
+        'async-estate-list': '/api/async/estates/',
+        'contract_list': '/api/contract_list',
+    }
+
+    def test_every_budget_is_covered(self):
+        self.assertEqual(set(self.paths) | {'analytics-bundle'}, set(settings.QUERY_BUDGETS))
+
+    def test_views_stay_within_budget(self):
+        populate(1, 30)
+        for view, path in self.paths.items():
+            with self.subTest(view=view):
+                # Over budget raises QueryBudgetExceeded out of the test client.
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+
+    def test_over_budget_raises(self):
+        with override_settings(QUERY_BUDGETS={'estate-list': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/estates/')
+
+    def test_bundle_counts_worker_queries(self):
+        # No rows written here: bundle workers use their own connections and
+        # SQLite would lock them out of tables this test transaction wrote.
+        response = self.client.get('/api/analytics/bundle/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+
+class ContractListTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 5)
+
+    def contract_ids(self):
+        response = self.client.get('/api/contract_list')
+        self.assertEqual(response.status_code, 200)
+        return [int(i) for i in re.findall(r'/api/contract_list/(\d+)/', response.content.decode())]
+
+    def test_page_is_cached_until_a_write(self):
+        self.assertEqual(self.contract_ids(), [1, 2, 3, 4])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.contract_ids(), [1, 2, 3, 4])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/create-contract/', {
+                'estate': 3, 'contract_type': 'rent', 'date_signed': '2024-02-01', 'payment_amount': '500',
+            })
+        self.assertRedirects(response, '/api/contract_list', fetch_redirect_response=False)
+        created = m.Contract.objects.get(contract_type='rent').contract_id
+        self.assertEqual(self.contract_ids(), [1, 2, 3, 4, created])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/contract_list/2/delete/')
+        self.assertEqual(self.contract_ids(), [1, 3, 4, created])
+
+    def test_pages_are_cached_separately(self):
+        with override_settings(CONTRACT_LIST_PAGE_SIZE=2):
+            self.assertEqual(self.contract_ids(), [1, 2])
+            response = self.client.get('/api/contract_list', {'cursor': encode_cursor_values([2])})
+        self.assertContains(response, '/api/contract_list/3/')
+        self.assertNotContains(response, '/api/contract_list/1/')
+
+
+class DashboardTests(RealtyTestCase):
+    def setUp(self):
+        super().setUp()
+        populate(1, 5)
+        patcher = mock.patch.object(get_pool(), 'try_acquire', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rendered_dashboard_is_cached_until_a_write(self):
+        from . import dashboard
+        with mock.patch.object(dashboard, 'build_components', wraps=dashboard.build_components) as build:
+            first = self.client.get('/api/dashboard/v2/')
+            with self.assertNumQueries(0):
+                second = self.client.get('/api/dashboard/v2/')
+            self.assertEqual(build.call_count, 1)
+            self.assertEqual(first.content, second.content)
+
+            self.client.get('/api/dashboard/v2/', {'top_cities': '3'})
+            self.assertEqual(build.call_count, 2)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                UnitOfWork().contracts.delete(1)
+            self.client.get('/api/dashboard/v2/')
+            self.assertEqual(build.call_count, 3)
+
+    def test_resources(self):
+        from .dashboard import render_resources
+        static = render_resources('static')
+        self.assertIn(f'src="{settings.STATIC_URL}bokeh/static/js/bokeh.min.js"', static)
+        self.assertTrue(finders.find('bokeh/static/js/bokeh.min.js'))
+        self.assertIn('https://cdn.bokeh.org/', render_resources('cdn'))
+        self.assertNotIn('src=', render_resources('inline').split('>', 1)[0])
+
+        response = self.client.get('/api/dashboard/v2/')
+        self.assertContains(response, static, html=False)
+        with override_settings(BOKEH_RESOURCES='cdn'):
+            self.assertContains(self.client.get('/api/dashboard/v2/'), 'https://cdn.bokeh.org/')
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_urlconf_does_not_load_pandas_or_bokeh(self):
+        # A fresh interpreter: this test process may already have them loaded.
+        code = (
+            "import importlib, sys, django; django.setup()\n"
+            "from django.conf import settings\n"
+            "importlib.import_module(settings.ROOT_URLCONF)\n"
+            "import realty.views, realty.async_views\n"
+            "print(sorted({name.split('.')[0] for name in sys.modules} & {'pandas', 'bokeh'}))\n"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'real_estate_project.settings'}
+        result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(2, timeout=0.05)
+        patcher = mock.patch('realty.db_pool.get_pool', return_value=self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = RequestFactory().get('/api/estates/')
+
+    def test_timeout_returns_503(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        response = ConnectionPoolMiddleware(lambda request: HttpResponse())(self.request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.pool.metrics()['timeouts'], 1)
+        self.assertEqual(self.pool.metrics()['in_use'], 2)
+
+    def test_slot_released_when_view_raises(self):
+        def view(request):
+            raise RuntimeError
+
+        middleware = ConnectionPoolMiddleware(view)
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                middleware(self.request)
+        self.assertEqual(self.pool.metrics()['in_use'], 0)
+
+    def test_streamed_response_holds_slot_until_closed(self):
+        response = ConnectionPoolMiddleware(lambda request: StreamingHttpResponse(iter([b'row'])))(self.request)
+        self.assertEqual(self.pool.metrics()['in_use'], 1)
+        b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(self.pool.metrics()['in_use'], 0)
+
+    def test_try_acquire_under_contention(self):
+        threads = 8
+        barrier = threading.Barrier(threads)
+        results = []
+
+        def contend():
+            barrier.wait()
+            results.append(self.pool.try_acquire())
+
+        workers = [threading.Thread(target=contend) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(results.count(True), 2)
+        metrics = self.pool.metrics()
+        self.assertEqual((metrics['in_use'], metrics['rejected']), (2, threads - 2))
+        self.pool.release()
+        self.assertTrue(self.pool.try_acquire())
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 
@@ -20,7 +20,24 @@ router.register(r'person-roles', views.PersonRoleViewSet, basename='personrole')
 router.register(r'phones', views.PhoneViewSet, basename='phone')
 router.register(r'analytics', views.AnalyticsViewSet, basename='analytics')
 
-urlpatterns = [
+# Async read-only twins of the repository viewsets, for ASGI deployments.
+async_urlpatterns = [
+    path('async/analytics/bundle/', async_views.analytics_bundle, name='async-analytics-bundle'),
+    path('async/analytics/<str:name>/', async_views.analytics_query, name='async-analytics-query'),
+]
+for prefix, viewset, basename in router.registry:
+    if issubclass(viewset, views.BaseRepositoryViewSet):
+        async_urlpatterns.append(
+            path(f'async/{prefix}/', async_views.resource_list, {'viewset': viewset}, name=f'async-{basename}-list')
+        )
+        # Composite keys have no single-segment URL form: list only.
+        if not viewset.queryset.model._meta.is_composite_pk:
+            async_urlpatterns.append(
+                path(f'async/{prefix}/<str:pk>/', async_views.resource_detail, {'viewset': viewset},
+                     name=f'async-{basename}-detail')
+            )
+
+urlpatterns = async_urlpatterns + [
     path(
         'reports/estates-by-settlement/',
         views.EstateCountBySettlementReportView.as_view(),
@@ -28,6 +45,7 @@ urlpatterns = [
     ),
     path('dashboard/', views.analytics_dashboard, name='analytics_dashboard'),
     path('dashboard/v2/', views.analytics_dashboard_bokeh, name='analytics_dashboard_bokeh'),
+    path('metrics/', views.metrics, name='metrics'),
     path('', include(router.urls)),
     path("contract_list", views.contract_list, name="contract_list"),
     path("contract_list/<int:contract_id>/", views.contract_detail, name="contract_detail"),
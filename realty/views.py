@@ -1,270 +1,158 @@
-import pandas as pd
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import permissions
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 from . import models as m
+from .analytics import (
+    BUNDLE_QUERIES, bundle_filters, bundle_tables, collect_bundle, general_statistics, parse_filters, to_columns,
+)
+from .conditional import conditional_response
 from .forms import ContractForm
+from .listings import TABLES as LISTING_TABLES, parse_listing_filters
+from .metrics import render_prometheus
+from .pagination import KeysetPagination
+from .renderers import NDJSONRenderer
+from .query_cache import table_versions
 from .repositories import UnitOfWork
+from .search import TABLES as SEARCH_TABLES, get_index, parse_search
 from . import serialisers as s
 from django.db.models import Count
 from rest_framework.views import APIView
-from math import pi
-from bokeh.plotting import figure
-from bokeh.embed import components
-from bokeh.models import ColumnDataSource, HoverTool
-from bokeh.palettes import Spectral6, Magma256, Viridis256
-from bokeh.transform import cumsum, factor_cmap
-from bokeh.resources import CDN, INLINE
 
 
 def analytics_dashboard_bokeh(request):
-    uow = UnitOfWork()
+    # Imported on first use: pandas and Bokeh are a large share of a worker's
+    # startup time and memory, and CRUD-only workers never need them.
+    from .dashboard import analytics_dashboard_bokeh as render_dashboard
+    return render_dashboard(request)
+
+
+class ConditionalGetMixin:
+    def _conditional(self, tables, respond):
+        # 304 before any query when the client's copy is current; the body also
+        # depends on the query string and the negotiated renderer.
+        request = self.request
+        return conditional_response(
+            request, tables, respond, (request.get_full_path(), request.accepted_media_type)
+        )
 
-    try:
-        top_cities_filter = int(request.GET.get('top_cities', 20))
-        min_rooms_filter = int(request.GET.get('min_rooms', 0))
-    except ValueError:
-        top_cities_filter = 20
-        min_rooms_filter = 0
-
-    def safe_dataframe(data, float_cols=None, str_cols=None):
-        df = pd.DataFrame(list(data))
-
-        if df.empty:
-            all_cols = (float_cols or []) + (str_cols or [])
-            return pd.DataFrame({c: [] for c in all_cols})
-
-        if float_cols:
-            for col in float_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(float)
-
-        if str_cols:
-            for col in str_cols:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).fillna("")
-
-        from decimal import Decimal
-        for col in df.columns:
-            if df[col].dtype == object:
-                df[col] = df[col].apply(lambda x: float(x) if isinstance(x, Decimal) else x)
-
-        return df
-
-    df_rev = safe_dataframe(
-        uow.contracts.monthly_revenue_stream(),
-        float_cols=['total_revenue']
-    )
-
-    if not df_rev.empty and 'month' in df_rev.columns:
-        df_rev['month'] = pd.to_datetime(df_rev['month'])
-
-    df_hot = safe_dataframe(
-        uow.settlements.hot_settlements(),
-        float_cols=['number_of_estates'],
-        str_cols=['name']
-    )
-
-    if not df_hot.empty:
-        df_hot = df_hot.groupby('name', as_index=False)['number_of_estates'].sum()
-
-    df_hot = df_hot.sort_values('number_of_estates', ascending=False).head(top_cities_filter)
-
-    df_mkt = safe_dataframe(
-        uow.settlements.market_analysis(),
-        float_cols=['avg_house_price', 'avg_apartment_price'],
-        str_cols=['name']
-    )
-
-    if not df_mkt.empty:
-        df_mkt = df_mkt.groupby('name', as_index=False)[['avg_house_price', 'avg_apartment_price']].mean()
-
-    df_rooms = safe_dataframe(
-        uow.apartments.stats_by_rooms(),
-        float_cols=['avg_price', 'rooms']
-    )
-
-    if not df_rooms.empty:
-        df_rooms = df_rooms[df_rooms['rooms'] >= min_rooms_filter]
-
-    df_emp = safe_dataframe(
-        uow.people.top_revenue_employees(),
-        float_cols=['total_sales_volume'],
-        str_cols=['surname']
-    )
-
-    df_whale = safe_dataframe(
-        uow.people.top_owners(),
-        float_cols=['total_assets'],
-        str_cols=['surname']
-    ).sort_values('total_assets', ascending=False).head(5)
-
-    source_rev = ColumnDataSource(df_rev)
-    p1 = figure(title="Monthly Revenue Trend", x_axis_type="datetime", height=350, sizing_mode="stretch_width")
-    if not df_rev.empty:
-        p1.line(x='month', y='total_revenue', source=source_rev, line_width=3, color="green", legend_label="Revenue")
-        p1.scatter(x='month', y='total_revenue', source=source_rev, size=8, color="green")
-        p1.add_tools(HoverTool(tooltips=[("Date", "@month{%F}"), ("Revenue", "$@total_revenue{0.00 a}")],
-                               formatters={'@month': 'datetime'}))
-
-    source_hot = ColumnDataSource(df_hot)
-    cities = df_hot['name'].tolist()
-    p2 = figure(x_range=cities, title=f"Most Active Markets (Top {top_cities_filter})", height=350,
-                sizing_mode="stretch_width")
-    if not df_hot.empty:
-        palette = Magma256[:len(cities)] if len(cities) <= 256 else Magma256
-        p2.vbar(x='name', top='number_of_estates', width=0.8, source=source_hot,
-                line_color='white', fill_color=factor_cmap('name', palette=palette, factors=cities))
-    p2.xaxis.major_label_orientation = 1.2
-
-    source_rooms = ColumnDataSource(df_rooms)
-    p3 = figure(title="Price vs Rooms Correlation", height=350, sizing_mode="stretch_width")
-    if not df_rooms.empty:
-        p3.scatter(x='rooms', y='avg_price', size=15, source=source_rooms, color="navy", alpha=0.6)
-        p3.add_tools(HoverTool(tooltips=[("Rooms", "@rooms"), ("Avg Price", "$@avg_price{0.00 a}")]))
-    p3.xaxis.axis_label = "Number of Rooms"
-    p3.yaxis.axis_label = "Average Price"
-
-    df_emp_sorted = df_emp.sort_values('total_sales_volume', ascending=True).tail(10)
-    source_emp = ColumnDataSource(df_emp_sorted)
-    employees = df_emp_sorted['surname'].tolist()
-    p4 = figure(y_range=employees, title="Top Agents", height=350, sizing_mode="stretch_width")
-    if not df_emp.empty:
-        p4.hbar(y='surname', right='total_sales_volume', height=0.8, source=source_emp, color="#8B5CF6")
-        p4.add_tools(HoverTool(tooltips=[("Agent", "@surname"), ("Sales", "$@total_sales_volume{0.00 a}")]))
-
-    source_mkt = ColumnDataSource(df_mkt)
-    mkt_cities = df_mkt['name'].tolist()
-    p5 = figure(x_range=mkt_cities, title="House (Blue) vs Apt (Red) Prices", height=350, sizing_mode="stretch_width")
-    if not df_mkt.empty:
-        p5.vbar(x='name', top='avg_house_price', width=0.4, source=source_mkt, color="blue", legend_label="House")
-        p5.scatter(x='name', y='avg_apartment_price', size=10, source=source_mkt, color="red", legend_label="Apartment")
-        p5.add_tools(
-            HoverTool(tooltips=[("City", "@name"), ("House", "$@avg_house_price"), ("Apt", "$@avg_apartment_price")]))
-    p5.xaxis.major_label_orientation = 1.2
-
-    if not df_whale.empty and df_whale['total_assets'].sum() > 0:
-        df_whale['angle'] = df_whale['total_assets'] / df_whale['total_assets'].sum() * 2 * pi
-        count = len(df_whale)
-        if count <= 6:
-            df_whale['color'] = Spectral6[:count]
-        else:
-            df_whale['color'] = Magma256[:count] if count <= 256 else Magma256[:256]
-    else:
-        df_whale['angle'] = []
-        df_whale['color'] = []
-
-    source_whale = ColumnDataSource(df_whale)
-    p6 = figure(title="Top 20 Whale Owners", height=350, sizing_mode="stretch_width",
-                tooltips="@surname: @total_assets{0.00 a}")
-    if not df_whale.empty:
-        p6.wedge(x=0, y=1, radius=0.4, start_angle=cumsum('angle', include_zero=True), end_angle=cumsum('angle'),
-                 line_color="white", fill_color='color', legend_field='surname', source=source_whale)
-    p6.axis.axis_label = None
-    p6.axis.visible = False
-    p6.grid.grid_line_color = None
-
-    script, divs = components({
-        'revenue': p1, 'hot': p2, 'rooms': p3,
-        'employees': p4, 'market': p5, 'whale': p6
-    })
-
-    resources = INLINE.render()
-
-    return render(request, "dashboard_bokeh.html", {
-        'script': script,
-        'divs': divs,
-        'resources': resources,
-        'current_filters': {
-            'top_cities': top_cities_filter,
-            'min_rooms': min_rooms_filter
-        }
-    })
-
-
-class AnalyticsViewSet(viewsets.ViewSet):
+
+class AnalyticsViewSet(ConditionalGetMixin, viewsets.ViewSet):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.uow = UnitOfWork()
 
-    def _queryset_to_response(self, queryset):
-        if hasattr(queryset, 'values'):
-            data_list = list(queryset.values())
-        else:
-            data_list = list(queryset)
-
-        df = pd.DataFrame(data_list)
-
-        if df.empty:
-            return Response([])
+    def _columnar(self):
+        return self.request.query_params.get('orient') == 'columns'
 
-        df.fillna(0)
-
-        return Response(df.to_dict(orient='records'))
+    def _queryset_to_response(self, queryset):
+        # Repository aggregates already yield dict rows; ?orient=columns
+        # returns {column: [values]} instead of a list of records.
+        rows = list(queryset)
+        return Response(to_columns(rows) if self._columnar() else rows)
+
+    def _analytics_response(self, name, query):
+        try:
+            filters = parse_filters(name, self.request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._conditional(query.cached_tables, lambda: self._queryset_to_response(query(**filters)))
 
     @action(detail=False, methods=['get'], url_path='general-statistics')
     def get_general_statistics(self, request):
-        revenue_data = self.uow.contracts.monthly_revenue_stream()
-
-        df = pd.DataFrame(list(revenue_data))
-
-        stats = {
-            "description": "Monthly revenue statistics (based on signed contracts)",
-            "data": None
-        }
-
-        if not df.empty:
-            stats["data"] = {
-                "mean": round(df['total_revenue'].mean(), 2),
-                "median": round(df['total_revenue'].median(), 2),
-                "max": round(df['total_revenue'].max(), 2),
-                "min": round(df['total_revenue'].min(), 2)
-            }
-
-        return Response(stats)
+        query = self.uow.contracts.monthly_revenue_stream
+        return self._conditional(query.cached_tables, lambda: Response(general_statistics(query())))
+
+    @action(detail=False, methods=['get'], url_path='bundle')
+    def bundle(self, request):
+        include = request.query_params.get('include')
+        names = [name for name in include.split(',') if name] if include else None
+
+        unknown = set(names or ()) - set(BUNDLE_QUERIES)
+        if unknown:
+            return Response(
+                {"detail": f"Unknown bundle entries: {', '.join(sorted(unknown))}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            filters = bundle_filters(request.query_params, names)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self._conditional(bundle_tables(self.uow, names), lambda: self._bundle_response(names, filters))
+
+    def _bundle_response(self, names, filters):
+        data = collect_bundle(self.uow, names, filters)
+        stats = general_statistics(data['monthly_revenue']) if 'monthly_revenue' in data else None
+
+        if self._columnar():
+            data = {name: to_columns(rows) for name, rows in data.items()}
+        if stats is not None:
+            data['general_statistics'] = stats
+        return Response(data)
 
     @action(detail=False, methods=['get'], url_path='settlements/hot')
     def hot_settlements(self, request):
-        data = self.uow.settlements.hot_settlements()
-        return self._queryset_to_response(data)
+        return self._analytics_response('hot_settlements', self.uow.settlements.hot_settlements)
 
     @action(detail=False, methods=['get'], url_path='employees/top')
     def top_employees(self, request):
-        data = self.uow.people.top_revenue_employees()
-        return self._queryset_to_response(data)
+        return self._analytics_response('top_employees', self.uow.people.top_revenue_employees)
 
     @action(detail=False, methods=['get'], url_path='owners/whales')
     def whale_owners(self, request):
-        data = self.uow.people.top_owners()
-        return self._queryset_to_response(data)
+        return self._analytics_response('whale_owners', self.uow.people.top_owners)
 
     @action(detail=False, methods=['get'], url_path='settlements/market')
     def market_analysis(self, request):
-        data = self.uow.settlements.market_analysis()
-        return self._queryset_to_response(data)
+        return self._analytics_response('market_analysis', self.uow.settlements.market_analysis)
 
     @action(detail=False, methods=['get'], url_path='financials/monthly')
     def monthly_revenue(self, request):
-        data = self.uow.contracts.monthly_revenue_stream()
-        return self._queryset_to_response(data)
+        return self._analytics_response('monthly_revenue', self.uow.contracts.monthly_revenue_stream)
 
     @action(detail=False, methods=['get'], url_path='apartments/rooms')
     def stats_by_rooms(self, request):
-        data = self.uow.apartments.stats_by_rooms()
-        return self._queryset_to_response(data)
+        return self._analytics_response('stats_by_rooms', self.uow.apartments.stats_by_rooms)
 
 
 def analytics_dashboard(request):
     return render(request, "dashboard.html")
 
 
-class BaseRepositoryViewSet(viewsets.ViewSet):
+def metrics(request):
+    # Prometheus text format: connection pool gauges, plus repository method
+    # timings when REPOSITORY_METRICS is on. Scrapers are admitted by address
+    # (REMOTE_ADDR, not a forwarded header), people by a staff session.
+    allowed = request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+    if not (allowed or request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class BaseRepositoryViewSet(ConditionalGetMixin, viewsets.ViewSet):
     serializer_class = None
     queryset = None
     repository_name = None
+    pagination_class = KeysetPagination
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
+    stream_chunk_size = 2000
+    bulk_batch_size = 500
+    max_bulk_items = 10000
+    # Opt-in: lists are read with .values_list() and rendered by
+    # serialisers.ValuesSerializer, same output without model instances.
+    fast_read = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -275,11 +163,48 @@ class BaseRepositoryViewSet(viewsets.ViewSet):
             raise AttributeError("ViewSet must define 'repository_name'.")
 
     def list(self, request):
-        items = self.repository.get_all()
+        return self._conditional(self.repository.read_tables(), lambda: self._list_response(request))
+
+    def _list_response(self, request):
+        if isinstance(request.accepted_renderer, NDJSONRenderer):
+            return self._stream_list(request.accepted_renderer)
+
+        paginator = self.pagination_class()
+        try:
+            if self.fast_read:
+                reader = s.values_serializer(self.serializer_class)
+                rows = paginator.paginate_values(self.repository, request, reader.columns, reader.pk_index)
+                return Response(paginator.get_response_data(reader.serialize(self.repository, rows)))
+            items = paginator.paginate(self.repository, request)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = self.serializer_class(items, many=True)
-        return Response(serializer.data)
+        return Response(paginator.get_response_data(serializer.data))
+
+    def _stream_list(self, renderer):
+        content_type = f"{renderer.media_type}; charset={renderer.charset}"
+        if self.fast_read:
+            return StreamingHttpResponse(self._stream_values(renderer), content_type=content_type)
+
+        serializer = self.serializer_class()
+        rows = (
+            renderer.render_row(serializer.to_representation(item))
+            for item in self.repository.iterate(chunk_size=self.stream_chunk_size)
+        )
+        return StreamingHttpResponse(rows, content_type=content_type)
+
+    def _stream_values(self, renderer):
+        reader = s.values_serializer(self.serializer_class)
+        rows = self.repository.iterate_values(reader.columns, chunk_size=self.stream_chunk_size)
+        while chunk := list(islice(rows, self.stream_chunk_size)):
+            for item in reader.serialize(self.repository, chunk):
+                yield renderer.render_row(item)
 
     def retrieve(self, request, pk=None):
+        return self._conditional(self.repository.read_tables(), lambda: self._retrieve_response(pk))
+
+    def _retrieve_response(self, pk):
         item = self.repository.get_by_id(pk)
         if item is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
@@ -294,24 +219,78 @@ class BaseRepositoryViewSet(viewsets.ViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def update(self, request, pk=None):
-        item_to_update = self.repository.get_by_id(pk)
-        if item_to_update is None:
+        # One UPDATE per PUT: validation fetches nothing, a pk-only instance
+        # lets the unique validators exclude this row, and the response is
+        # rendered from the request unless it left columns out.
+        model = self.repository.model
+        try:
+            item_to_update = model(pk=model._meta.pk.to_python(pk))
+        except (ValidationError, ValueError, TypeError):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         serializer = self.serializer_class(item_to_update, data=request.data)
-        if serializer.is_valid():
-            updated_item = self.repository.update(pk, **serializer.validated_data)
-            return Response(self.serializer_class(updated_item).data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        for field in model._meta.pk_fields:
+            # The URL addresses the row: its own key needs no uniqueness query.
+            if field.name in serializer.fields:
+                pk_field = serializer.fields[field.name]
+                pk_field.validators = [v for v in pk_field.validators if not isinstance(v, UniqueValidator)]
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        body = model(**{field.name: data[field.name] for field in model._meta.pk_fields if field.name in data})
+        if any(field.name in data and getattr(body, field.attname) != getattr(item_to_update, field.attname)
+               for field in model._meta.pk_fields):
+            return Response({"detail": "The primary key cannot be changed."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not self.repository.update_fields(item_to_update.pk, **data):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        omitted = any(not field.write_only and field.source not in data for field in serializer.fields.values())
+        if omitted:
+            # Columns the body left out keep their stored values: read them back.
+            item_to_update = self.repository.get_by_id(item_to_update.pk)
+            if item_to_update is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+        else:
+            for key, value in data.items():
+                setattr(item_to_update, key, value)
+        return Response(self.serializer_class(item_to_update).data, status=status.HTTP_200_OK)
 
     def destroy(self, request, pk=None):
-        item_to_delete = self.repository.get_by_id(pk)
-        if item_to_delete is None:
+        if not self.repository.delete(pk):
             return Response(status=status.HTTP_404_NOT_FOUND)
-
-        self.repository.delete(pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['post', 'put', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.max_bulk_items:
+            return Response(
+                {"detail": f"At most {self.max_bulk_items} items per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            if request.method == 'DELETE':
+                obj_ids = [tuple(pk) if isinstance(pk, list) else pk for pk in request.data]
+                deleted = self.repository.bulk_delete(obj_ids, batch_size=self.bulk_batch_size)
+                return Response({"deleted": deleted}, status=status.HTTP_200_OK)
+
+            serializer = s.bulk_serializer(self.serializer_class, request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            if request.method == 'PUT':
+                updated = self.repository.bulk_update(serializer.validated_data, batch_size=self.bulk_batch_size)
+                return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+            created = self.repository.bulk_create(serializer.validated_data, batch_size=self.bulk_batch_size)
+            return Response(self.serializer_class(created, many=True).data, status=status.HTTP_201_CREATED)
+        except (IntegrityError, ValidationError, ValueError, TypeError) as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 
 class EstateCountBySettlementReportView(APIView):
     def get(self, request, format=None):
@@ -331,6 +310,7 @@ class ApartmentViewSet(BaseRepositoryViewSet):
     serializer_class = s.ApartmentSerializer
     queryset = m.Apartment.objects.all()
     repository_name = "apartments"
+    fast_read = True
 
 
 class SettlementViewSet(BaseRepositoryViewSet):
@@ -349,12 +329,41 @@ class EstateViewSet(BaseRepositoryViewSet):
     serializer_class = s.EstateSerializer
     queryset = m.Estate.objects.all()
     repository_name = "estates"
+    fast_read = True
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        try:
+            arguments = parse_search(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._conditional(SEARCH_TABLES, lambda: Response(get_index().search(**arguments)))
+
+    @action(detail=False, methods=['get'], url_path='listings')
+    def listings(self, request):
+        # Filtered list, same rows and cursor pagination as list().
+        try:
+            where = self.repository.listing_conditions(**parse_listing_filters(request.query_params))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        tables = sorted(set(LISTING_TABLES) | set(self.repository.read_tables()))
+        return self._conditional(tables, lambda: self._listings_response(request, where))
+
+    def _listings_response(self, request, where):
+        reader = s.values_serializer(self.serializer_class)
+        paginator = self.pagination_class()
+        try:
+            rows = paginator.paginate_values(self.repository, request, reader.columns, reader.pk_index, where)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(paginator.get_response_data(reader.serialize(self.repository, rows)))
 
 
 class ContractViewSet(BaseRepositoryViewSet):
     serializer_class = s.ContractSerializer
     queryset = m.Contract.objects.all()
     repository_name = "contracts"
+    fast_read = True
 
 
 class RoleViewSet(BaseRepositoryViewSet):
@@ -391,6 +400,7 @@ class HouseViewSet(BaseRepositoryViewSet):
     serializer_class = s.HouseSerializer
     queryset = m.House.objects.all()
     repository_name = "houses"
+    fast_read = True
 
 
 class OfficeViewSet(BaseRepositoryViewSet):
@@ -412,8 +422,25 @@ class PhoneViewSet(BaseRepositoryViewSet):
 
 
 def contract_list(request):
-    contract_list = m.Contract.objects.all()
-    context = {"contract_list": contract_list}
+    repository = UnitOfWork().contracts
+    paginator = KeysetPagination(page_size=getattr(settings, 'CONTRACT_LIST_PAGE_SIZE', 100))
+    try:
+        page = paginator.lazy_page(repository, request, repository.get_list_page)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    # The rendered list is a cached fragment keyed on the cursor and on the
+    # contract table version, so repository writes invalidate it and a hit
+    # runs no query at all.
+    context = {
+        "page": page,
+        "cursor": request.GET.get(paginator.cursor_query_param, ''),
+        "page_size": page.limit,
+        "terms_preview_length": repository.terms_preview_length,
+        "table_version": table_versions(m.Contract._meta.db_table)[0],
+        "cache_alias": getattr(settings, 'QUERY_CACHE_ALIAS', 'analytics'),
+        "cache_timeout": getattr(settings, 'CONTRACT_LIST_CACHE_TIMEOUT', 300),
+    }
     return render(request, "contract_list.html", context)
 
 
@@ -426,7 +453,8 @@ def create_contract(request):
     if request.method == 'POST':
         form = ContractForm(request.POST)
         if form.is_valid():
-            form.save()
+            # Through the repository, so cached pages and analytics see the write.
+            UnitOfWork().contracts.create(**form.cleaned_data)
             return redirect('contract_list')
     else:
         form = ContractForm()
@@ -435,10 +463,9 @@ def create_contract(request):
 
 
 def delete_contract(request, contract_id):
-    contract = get_object_or_404(m.Contract, pk=contract_id)
-
     if request.method == "POST":
-        contract.delete()
+        if not UnitOfWork().contracts.delete(contract_id):
+            raise Http404("No Contract matches the given query.")
         return redirect("contract_list")
 
-    return redirect("contract_detail", contract_id=contract.contract_id)
\ No newline at end of file
+    return redirect("contract_detail", contract_id=contract_id)
@@ -0,0 +1,47 @@
+-- Composite indexes for GET /api/estates/listings/ (realty/listings.py).
+-- The models are managed = False, so apply this script by hand, then check
+-- the plans with:  python manage.py explain_listings
+--
+-- Listings are keyset-paginated: WHERE <filters> AND estate_id > ?
+-- ORDER BY estate_id LIMIT n. InnoDB appends the primary key to every
+-- secondary index, so an index whose columns are all matched by equality
+-- returns rows already in estate_id order and the scan stops after n rows.
+-- summary_tables.sql already adds (settlement_id, transaction_type, price).
+--
+-- MySQL has no CREATE INDEX IF NOT EXISTS, so each index is created only
+-- when information_schema.statistics does not list it yet; the script is
+-- safe to re-apply.
+
+-- settlement, settlement + transaction_type + status.
+SET @ddl = IF(EXISTS(SELECT 1 FROM information_schema.statistics
+                     WHERE table_schema = DATABASE() AND table_name = 'estate'
+                       AND index_name = 'idx_estate_settlement_transaction_status'),
+    'DO 0', 'CREATE INDEX idx_estate_settlement_transaction_status ON estate (settlement_id, transaction_type, status)');
+PREPARE ddl FROM @ddl; EXECUTE ddl; DEALLOCATE PREPARE ddl;
+
+-- transaction_type + status across settlements, optionally with a price range.
+SET @ddl = IF(EXISTS(SELECT 1 FROM information_schema.statistics
+                     WHERE table_schema = DATABASE() AND table_name = 'estate'
+                       AND index_name = 'idx_estate_transaction_status_price'),
+    'DO 0', 'CREATE INDEX idx_estate_transaction_status_price ON estate (transaction_type, status, price)');
+PREPARE ddl FROM @ddl; EXECUTE ddl; DEALLOCATE PREPARE ddl;
+
+-- Subtype filters: the range columns narrow the subtype rows, which join
+-- back to estate by primary key.
+SET @ddl = IF(EXISTS(SELECT 1 FROM information_schema.statistics
+                     WHERE table_schema = DATABASE() AND table_name = 'apartment'
+                       AND index_name = 'idx_apartment_rooms_area'),
+    'DO 0', 'CREATE INDEX idx_apartment_rooms_area ON apartment (rooms, area)');
+PREPARE ddl FROM @ddl; EXECUTE ddl; DEALLOCATE PREPARE ddl;
+
+SET @ddl = IF(EXISTS(SELECT 1 FROM information_schema.statistics
+                     WHERE table_schema = DATABASE() AND table_name = 'house'
+                       AND index_name = 'idx_house_rooms_land_area'),
+    'DO 0', 'CREATE INDEX idx_house_rooms_land_area ON house (rooms, land_area)');
+PREPARE ddl FROM @ddl; EXECUTE ddl; DEALLOCATE PREPARE ddl;
+
+SET @ddl = IF(EXISTS(SELECT 1 FROM information_schema.statistics
+                     WHERE table_schema = DATABASE() AND table_name = 'office'
+                       AND index_name = 'idx_office_area'),
+    'DO 0', 'CREATE INDEX idx_office_area ON office (area)');
+PREPARE ddl FROM @ddl; EXECUTE ddl; DEALLOCATE PREPARE ddl;
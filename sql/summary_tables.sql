@@ -0,0 +1,44 @@
+-- Materialized aggregate tables read by the analytics repositories.
+-- The models are managed = False, so apply this script by hand, then fill
+-- the tables once with:  python manage.py rebuild_summaries
+-- and set USE_SUMMARY_TABLES = True in settings.py (it defaults to off).
+-- Afterwards they are kept current by the repositories on every write.
+-- Tables and the index are created only if missing, so re-applying is safe.
+
+CREATE TABLE IF NOT EXISTS summary_monthly_revenue (
+    month          DATE           NOT NULL,
+    total_revenue  DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    total_deals    INT            NOT NULL DEFAULT 0,
+    PRIMARY KEY (month)
+);
+
+CREATE TABLE IF NOT EXISTS summary_price_matrix (
+    settlement_id     INT            NOT NULL,
+    transaction_type  VARCHAR(50)    NOT NULL,
+    price_sum         DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    priced_count      INT            NOT NULL DEFAULT 0,
+    max_price         DECIMAL(15, 2) NULL,
+    inventory_count   INT            NOT NULL DEFAULT 0,
+    PRIMARY KEY (settlement_id, transaction_type),
+    CONSTRAINT fk_summary_price_matrix_settlement
+        FOREIGN KEY (settlement_id) REFERENCES settlement (settlement_id)
+);
+
+CREATE TABLE IF NOT EXISTS summary_settlement_stats (
+    settlement_id           INT            NOT NULL,
+    number_of_estates       INT            NOT NULL DEFAULT 0,
+    house_price_sum         DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    house_priced_count      INT            NOT NULL DEFAULT 0,
+    apartment_price_sum     DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    apartment_priced_count  INT            NOT NULL DEFAULT 0,
+    PRIMARY KEY (settlement_id),
+    CONSTRAINT fk_summary_settlement_stats_settlement
+        FOREIGN KEY (settlement_id) REFERENCES settlement (settlement_id)
+);
+
+-- Used when a removed price forces a price-matrix group to recompute max_price.
+SET @ddl = IF(EXISTS(SELECT 1 FROM information_schema.statistics
+                     WHERE table_schema = DATABASE() AND table_name = 'estate'
+                       AND index_name = 'idx_estate_settlement_transaction_price'),
+    'DO 0', 'CREATE INDEX idx_estate_settlement_transaction_price ON estate (settlement_id, transaction_type, price)');
+PREPARE ddl FROM @ddl; EXECUTE ddl; DEALLOCATE PREPARE ddl;